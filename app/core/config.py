@@ -1,20 +1,78 @@
 from pydantic_settings import BaseSettings
 from pydantic import Field
+from typing import Dict, List, Optional
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "FastAPI Workshop"
     ENV: str = "development"
     LOG_LEVEL: str = "INFO"
+    LOG_REQUEST_ID: bool = True
+    LOG_FORMAT: str = "text"
+    LOG_LEVELS: Dict[str, str] = {}
+    LOG_QUEUE_SIZE: int = 10000
+    LOG_DEBUG_SAMPLE_RATE: float = 1.0
+    METRICS_ENABLED: bool = True
+    WARMUP_ON_STARTUP: bool = True
     MODEL_NAME: str = "sentence-transformers/all-mpnet-base-v2"
+    EMBEDDING_CACHE_SIZE: int = 2048
+    EMBEDDING_CACHE_TTL_SECONDS: float = 3600
+    EMBEDDING_CACHE_PATH: str = ""
+    EMBEDDING_BATCH_SIZE: int = 64
+    EMBEDDING_WORKERS: int = 1
+    INDEX_CHUNK_ROWS: int = 2000
     vectorDBPath: str = "app/utils/vectorDB"
+    RETRIEVAL_K: int = 5
+    RETRIEVAL_SCORE_THRESHOLD: Optional[float] = None
+    RETRIEVAL_TOKEN_BUDGET: int = 600
+    RETRIEVAL_FIELDS: List[str] = ["name", "category", "price", "description", "specifications", "order_count"]
+    RETRIEVAL_HYBRID: bool = True
+    RETRIEVAL_KEYWORD_FAST_PATH: bool = True
+    RETRIEVAL_RRF_K: int = 60
     product_data_path: str = "data/product_catalog_real.csv"
+    sales_data_path: str = "data/sales_history_real.csv"
+    inventory_data_path: str = "data/current_inventory_real.csv"
+    forecast_model_path: str = "app/models/demand_forecast_model.pkl"
+    feature_store_path: str = "app/models/feature_store.npz"
+    DATA_RELOAD_CHECK_SECONDS: float = 5.0
+    PRODUCT_MATCH_MIN_SCORE: float = 0.45
+    AVAILABILITY_CACHE_SIZE: int = 4096
+    AVAILABILITY_CACHE_TTL_SECONDS: float = 300
+    AVAILABILITY_BATCH_MAX_ITEMS: int = 50
+    LLM_PROVIDER: str = "openai"
+    LLM_CONNECT_TIMEOUT: float = 5.0
+    LLM_READ_TIMEOUT: float = 60.0
+    LLM_POOL_TIMEOUT: float = 10.0
+    LLM_MAX_CONNECTIONS: int = 100
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    LLM_KEEPALIVE_EXPIRY: float = 30.0
+    LLM_HTTP2: bool = True
+    LLM_MAX_RETRIES: int = 2
+    LOCAL_LLM_SCRIPT_PATH: str = ""
+    LOCAL_LLM_LATENCY_SECONDS: float = 0.3
+    LOCAL_LLM_TOKEN_INTERVAL_SECONDS: float = 0.02
+    LOCAL_LLM_JITTER: float = 0.0
+    LOCAL_LLM_SEED: int = 0
     OPENAI_MODEL_NAME: str = "gpt-4o-mini" #"gpt-5-mini" 
     GROQ_MODEL_NAME: str = "llama-3.3-70b-versatile"
     TOOL_CHOICE: str = "auto"
     MAX_TOKENS: int = 1024
     TEMPERATURE: float = 0.7
-    GROQ_API_KEY: str = Field(..., env="GROQ_API_KEY")
-    OPENAI_API_KEY: str = Field(..., env="OPENAI_API_KEY")
+    CONVERSATION_MAX_SESSIONS: int = 10000
+    CONVERSATION_MAX_TURNS: int = 20
+    CONVERSATION_TTL_SECONDS: float = 3600
+    CONVERSATION_MAX_BYTES: int = 64 * 1024 * 1024
+    CONVERSATION_DB_PATH: str = ""
+    PROMPT_BYTECODE_CACHE_DIR: str = ""
+    HISTORY_TOKEN_BUDGET: int = 1500
+    HISTORY_RECENT_TURNS: int = 4
+    HISTORY_SUMMARY_TOKENS: int = 300
+    TOOL_WORKERS: int = 8
+    TOOL_TIMEOUT_SECONDS: float = 30.0
+    TOOL_QUEUE_TIMEOUT_SECONDS: float = 30.0
+    TOOL_TIMEOUT_OVERRIDES: Dict[str, float] = {}
+    # Only required for the provider in use; the local provider needs neither
+    GROQ_API_KEY: Optional[str] = Field(None, env="GROQ_API_KEY")
+    OPENAI_API_KEY: Optional[str] = Field(None, env="OPENAI_API_KEY")
 
     class Config:
         env_file = ".env"
@@ -1,10 +1,135 @@
+import atexit
+import json
 import logging
+import queue
+import random
 import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
 from app.core.config import settings
+from app.core.metrics import RequestIdFilter, LOG_RECORDS_DROPPED
+
+TEXT_FORMAT = "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
+TEXT_FORMAT_WITH_REQUEST_ID = "%(asctime)s | %(levelname)s | %(request_id)s | %(name)s | %(message)s"
+
+# Attributes every LogRecord has; anything else was passed through extra={...}
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id"}
+
+_listener = None
+_queue_handler = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with any extra={...} fields as top-level keys."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DebugSamplingFilter(logging.Filter):
+    """Keeps only a fraction of DEBUG records; INFO and above always pass."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno > logging.DEBUG or random.random() < self.rate
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full.
+
+    Formatting and I/O happen on the listener thread, so a request only pays
+    for building the record; a stalled stdout costs log lines, not latency.
+    Dropped records are counted in chatbot_log_records_dropped_total.
+    """
+
+    def __init__(self, handler_queue):
+        super().__init__(handler_queue)
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+            LOG_RECORDS_DROPPED.inc()
+
+    def prepare(self, record):
+        # Merge args in the calling thread so the record is safe to hand over,
+        # but leave exc_info in place for the formatter on the listener side
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        return record
+
+
+def _formatter():
+    if settings.LOG_FORMAT.lower() == "json":
+        return JsonFormatter()
+    return logging.Formatter(TEXT_FORMAT_WITH_REQUEST_ID if settings.LOG_REQUEST_ID else TEXT_FORMAT)
+
 
 def setup_logging():
-    logging.basicConfig(
-        level=settings.LOG_LEVEL,
-        format="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
-        stream=sys.stdout,
-    )
+    """Route all logging through a bounded queue drained by a background thread.
+
+    Output format (LOG_FORMAT 'text' or 'json'), per-logger levels
+    (LOG_LEVELS, e.g. {"app.utils.custom_functions": "DEBUG"}) and the sampled
+    fraction of DEBUG records (LOG_DEBUG_SAMPLE_RATE) come from settings.
+    Calling it again reconfigures logging.
+    """
+    global _listener, _queue_handler
+    shutdown_logging()
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(_formatter())
+
+    queue_handler = DroppingQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE))
+    # Filters run in the calling thread, where the request id context is set
+    queue_handler.addFilter(RequestIdFilter())
+    if settings.LOG_DEBUG_SAMPLE_RATE < 1.0:
+        queue_handler.addFilter(DebugSamplingFilter(settings.LOG_DEBUG_SAMPLE_RATE))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(settings.LOG_LEVEL)
+    for name, level in settings.LOG_LEVELS.items():
+        logging.getLogger(name).setLevel(level.upper())
+
+    _queue_handler = queue_handler
+    _listener = QueueListener(queue_handler.queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging():
+    """Flush queued records, stop the background logging thread and report dropped records."""
+    global _listener, _queue_handler
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    if _queue_handler is not None:
+        if _queue_handler.dropped:
+            # The listener is stopped, so write straight to stderr
+            print(f"Logging dropped {_queue_handler.dropped} records because the log queue was full",
+                  file=sys.stderr, flush=True)
+        _queue_handler = None
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,139 @@
+import contextvars
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+from prometheus_client import Counter, Histogram, CONTENT_TYPE_LATEST, generate_latest
+
+logger = logging.getLogger(__name__)
+
+# Request id of the request being served; copied into worker threads with the context
+request_id_var = contextvars.ContextVar("request_id", default="-")
+
+_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+STAGE_LATENCY = Histogram(
+    "chatbot_stage_duration_seconds", "Time spent in each pipeline stage", ["stage"], buckets=_LATENCY_BUCKETS
+)
+HTTP_REQUESTS = Counter(
+    "chatbot_http_requests_total", "HTTP requests served", ["method", "path", "status"]
+)
+HTTP_LATENCY = Histogram(
+    "chatbot_http_request_duration_seconds", "HTTP request latency", ["method", "path"], buckets=_LATENCY_BUCKETS
+)
+TOOL_CALLS = Counter(
+    "chatbot_tool_calls_total", "Tool calls executed for the LLM", ["tool", "status"]
+)
+LLM_ROUNDS = Counter(
+    "chatbot_llm_rounds_total", "LLM completion round-trips", ["provider"]
+)
+LLM_TOKENS = Counter(
+    "chatbot_llm_tokens_total", "Tokens reported by the LLM provider", ["provider", "kind"]
+)
+PROMPT_TOKENS = Histogram(
+    "chatbot_prompt_tokens", "Tokens in each built chat prompt",
+    buckets=(250, 500, 750, 1000, 1500, 2000, 3000, 4000, 6000, 8000, 16000)
+)
+CACHE_EVENTS = Counter(
+    "chatbot_cache_events_total", "Cache lookups by cache and result", ["cache", "result"]
+)
+RETRIEVAL_PATHS = Counter(
+    "chatbot_retrieval_total", "retrieve_document calls by retrieval path", ["path"]
+)
+LOG_RECORDS_DROPPED = Counter(
+    "chatbot_log_records_dropped_total", "Log records dropped because the logging queue was full"
+)
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+@contextmanager
+def span(stage: str):
+    """Time a block of code as a pipeline stage.
+
+    Usage:
+        with span("render_prompt"):
+            ...
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - started)
+
+
+def record_stage(stage: str, elapsed: float):
+    """Record a stage duration measured by the caller, e.g. one that excludes time suspended at a yield."""
+    STAGE_LATENCY.labels(stage=stage).observe(elapsed)
+    logger.debug("stage=%s duration_ms=%.2f", stage, elapsed * 1000)
+
+
+def record_cache(cache: str, result: str):
+    """Count a cache lookup; result is e.g. 'hit', 'miss' or 'disk_hit'."""
+    CACHE_EVENTS.labels(cache=cache, result=result).inc()
+
+
+def record_llm_usage(provider: str, usage):
+    """Count prompt/completion tokens from a provider usage object, if it has one."""
+    if usage is None:
+        return
+    for kind in ("prompt_tokens", "completion_tokens"):
+        value = getattr(usage, kind, None)
+        if value:
+            LLM_TOKENS.labels(provider=provider, kind=kind.replace("_tokens", "")).inc(value)
+
+
+def render_metrics() -> tuple:
+    """Return (body, content type) for the Prometheus text exposition."""
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+class RequestIdFilter(logging.Filter):
+    """Adds the current request id to every log record as %(request_id)s."""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class RequestContextMiddleware:
+    """ASGI middleware that assigns a request id and records HTTP request metrics.
+
+    The id is taken from an incoming X-Request-ID header or generated, stored in
+    request_id_var for log correlation (including while a streaming response
+    is being sent) and echoed back in the X-Request-ID response header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        request_id = headers.get(b"x-request-id", b"").decode("latin-1")[:64] or new_request_id()
+        token = request_id_var.set(request_id)
+        started = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            # Label by route template, not raw path, to keep label cardinality bounded
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            elapsed = time.perf_counter() - started
+            HTTP_REQUESTS.labels(method=scope["method"], path=path, status=str(status["code"])).inc()
+            HTTP_LATENCY.labels(method=scope["method"], path=path).observe(elapsed)
+            request_id_var.reset(token)
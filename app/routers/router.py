@@ -1,15 +1,27 @@
+import asyncio
+import json
 import logging
+import uuid
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse, StreamingResponse, Response
 from app.utils.vectordb_gen import VectorDBGenerator
 from app.schemas.chat_schema import ChatRequest
-from app.utils.flow_controller import run_bot
+from app.schemas.availability_schema import AvailabilityBatchRequest
+from app.utils.custom_functions import check_availability_items
+from app.utils.flow_controller import run_bot_async, stream_bot
+from app.utils.readiness import readiness_status
+from app.utils.conversation_store import conversation_store
+from app.core.config import settings
+from app.core.metrics import render_metrics
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-# In-memory conversation history (can be replaced with database for production)
-conversation_history = []
+
+def _session_id(request: ChatRequest) -> str:
+    """Use the client's session id, or start a new session."""
+    return request.session_id or uuid.uuid4().hex
 
 @router.get("/", tags=["Root"])
 def root():
@@ -26,30 +38,109 @@ def health_check():
     return {"status": "ok"}
 
 
+@router.get("/ready", tags=["Health"])
+def readiness_check():
+    """Readiness probe: 200 only once the embedding model, vector store and forecast model are loaded."""
+    status = readiness_status()
+    return JSONResponse(
+        status_code=200 if status["ready"] else 503,
+        content={"status": "ready" if status["ready"] else "warming_up", **status}
+    )
+
+
+@router.get("/metrics", tags=["Health"])
+def metrics():
+    """Prometheus metrics: stage latencies, HTTP, tool, LLM, token and cache counters."""
+    if not settings.METRICS_ENABLED:
+        return JSONResponse(status_code=404, content={"detail": "Metrics are disabled"})
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
 @router.post("/create_vectorDB", tags=["VectorDB"])
-def create_vectorDB():
-    """Create and persist vector database from product catalog."""
+def create_vectorDB(mode: str = "incremental", resume: bool = True):
+    """Create or sync the vector database from the product catalog.
+    
+    mode='incremental' embeds only new or changed products, mode='full' rebuilds everything.
+    resume=True continues an interrupted build of the same catalog.
+    """
     try:
-        response = VectorDBGenerator().generate_vector_db()
-        return {"status": response}
+        generator = VectorDBGenerator()
+        response = generator.generate_vector_db(mode, resume)
+        return {"status": response, "report": generator.report}
     except Exception as e:
         logger.error(f"Error creating vector DB: {str(e)}")
         return {"status": f"Error: {str(e)}"}
 
 
+@router.post("/availability/batch", tags=["Availability"])
+def availability_batch(request: AvailabilityBatchRequest):
+    """Check availability of several products with a single model inference."""
+    try:
+        results = check_availability_items([(item.product_name, item.quantity) for item in request.items])
+        return {"status": "success", "results": results}
+    except Exception as e:
+        logger.error(f"Error in batch availability check: {str(e)}")
+        return {"status": "error", "message": f"Error: {str(e)}"}
+
+
 @router.post("/chat", tags=["Chat"])
-def chat(request: ChatRequest):
+async def chat(request: ChatRequest):
     """Chat endpoint with multi-turn conversation support and tool calling.
     
-    Maintains conversation history and calls LLM with tool definitions.
+    Conversation history is kept per session_id; requests without one start a
+    new session whose id is returned. Runs on the event loop with async LLM
+    clients, so a worker is not limited by its threadpool.
     """
-    global conversation_history
+    session_id = _session_id(request)
     try:
-        provider = "openai"
+        provider = settings.LLM_PROVIDER
         user_type = "general"
-        response = run_bot(provider, None, request.user_query, user_type, conversation_history)
+        # The store may hit SQLite; keep blocking I/O off the event loop
+        history, history_offset = await asyncio.to_thread(conversation_store.get_window, session_id)
+        turn_start = len(history)
+        response = await run_bot_async(provider, None, request.user_query, user_type, history, session_id, history_offset)
+        await asyncio.to_thread(conversation_store.extend, session_id, history[turn_start:])
         logger.info(f"Chat response generated for query: {request.user_query[:50]}...")
-        return {"response": response}
+        return {"response": response, "session_id": session_id}
     except Exception as e:
         logger.error(f"Error in chat endpoint: {str(e)}")
-        return {"response": f"Error: {str(e)}"}
\ No newline at end of file
+        return {"response": f"Error: {str(e)}", "session_id": session_id}
+
+
+def _sse(event: dict) -> str:
+    """Format an event dict as a server-sent event named after its type."""
+    return f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+@router.post("/chat/stream", tags=["Chat"])
+async def chat_stream(request: ChatRequest):
+    """Streaming chat endpoint (server-sent events).
+    
+    Emits 'tool_call' and 'tool_result' events while tools run, 'token' events as
+    the final answer is generated ('discard' drops tokens that turned out not to be
+    the answer), and a closing 'done' event with the full response. The first
+    event, 'session', carries the session_id to send with the next message.
+    """
+    provider = settings.LLM_PROVIDER
+    user_type = "general"
+    session_id = _session_id(request)
+
+    async def events():
+        yield _sse({"type": "session", "session_id": session_id})
+        try:
+            history, history_offset = await asyncio.to_thread(conversation_store.get_window, session_id)
+            turn_start = len(history)
+            async for event in stream_bot(provider, request.user_query, user_type, history, session_id, history_offset):
+                if event["type"] == "done":
+                    await asyncio.to_thread(conversation_store.extend, session_id, history[turn_start:])
+                yield _sse(event)
+        except Exception as e:
+            logger.error(f"Error in chat stream endpoint: {str(e)}")
+            yield _sse({"type": "done", "response": f"Error: {str(e)}"})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
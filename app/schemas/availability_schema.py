@@ -0,0 +1,10 @@
+from typing import List
+from pydantic import BaseModel, Field
+from app.core.config import settings
+
+class AvailabilityItem(BaseModel):
+    product_name: str
+    quantity: int = Field(..., ge=1)
+
+class AvailabilityBatchRequest(BaseModel):
+    items: List[AvailabilityItem] = Field(..., min_length=1, max_length=settings.AVAILABILITY_BATCH_MAX_ITEMS)
@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from typing import Optional
+from pydantic import BaseModel, Field
 
 class ChatRequest(BaseModel):
-    user_query: str
\ No newline at end of file
+    user_query: str
+    session_id: Optional[str] = Field(None, min_length=1, max_length=128)
@@ -1,11 +1,26 @@
-from langchain_community.embeddings import HuggingFaceEmbeddings
 from app.core.config import settings
+from app.utils.embedding_cache import CachedQueryEmbeddings
+from app.utils.lazy_embeddings import LazyEmbeddings
 
 
 model_kwargs = {'device': 'cpu'}
-encode_kwargs = {'normalize_embeddings': False}
-embedding =  HuggingFaceEmbeddings(
-                                model_name=settings.MODEL_NAME,
-                                model_kwargs=model_kwargs,
-                                encode_kwargs=encode_kwargs
+encode_kwargs = {'normalize_embeddings': False, 'batch_size': settings.EMBEDDING_BATCH_SIZE}
+
+
+def _build_embedding_model():
+    # Imported here so torch and sentence-transformers load on first use, not at import
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(
+        model_name=settings.MODEL_NAME,
+        model_kwargs=model_kwargs,
+        encode_kwargs=encode_kwargs
+    )
+
+
+embedding =  CachedQueryEmbeddings(
+                                LazyEmbeddings(_build_embedding_model),
+                                max_size=settings.EMBEDDING_CACHE_SIZE,
+                                ttl_seconds=settings.EMBEDDING_CACHE_TTL_SECONDS,
+                                disk_path=settings.EMBEDDING_CACHE_PATH,
+                                model_name=settings.MODEL_NAME
                             )
\ No newline at end of file
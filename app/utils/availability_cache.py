@@ -0,0 +1,77 @@
+import threading
+import time
+from collections import OrderedDict
+from app.core.config import settings
+from app.core.metrics import record_cache
+
+
+class AvailabilityCache:
+    """Bounded LRU of per-product availability snapshots with a TTL.
+
+    A snapshot holds everything about a product's availability that does not
+    depend on the requested quantity: the prediction, class probabilities,
+    inventory figures and demand insights. Entries are keyed by product_id and
+    tagged with the data/model version they were computed from, so a reload of
+    the catalog, sales history, inventory or model invalidates them.
+    """
+
+    def __init__(self, max_size: int = 4096, ttl_seconds: float = 300):
+        """Initialize availability cache.
+
+        Args:
+            max_size: Maximum number of products held (0 disables the cache)
+            ttl_seconds: Seconds an entry stays valid (0 disables expiry)
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, product_id, version: tuple):
+        """Return the cached snapshot for the product at this data version, or None."""
+        if not self.max_size:
+            return None
+        with self._lock:
+            entry = self._entries.get(product_id)
+            if entry is not None:
+                snapshot, entry_version, stored_at = entry
+                expired = self.ttl_seconds and time.monotonic() - stored_at > self.ttl_seconds
+                if entry_version == version and not expired:
+                    self._entries.move_to_end(product_id)
+                    self.hits += 1
+                    record_cache("availability", "hit")
+                    return snapshot
+                del self._entries[product_id]
+            self.misses += 1
+        record_cache("availability", "miss")
+        return None
+
+    def put(self, product_id, version: tuple, snapshot: dict):
+        if not self.max_size:
+            return
+        with self._lock:
+            self._entries[product_id] = (snapshot, version, time.monotonic())
+            self._entries.move_to_end(product_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Return cache counters."""
+        return {
+            'size': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+
+availability_cache = AvailabilityCache(
+    max_size=settings.AVAILABILITY_CACHE_SIZE,
+    ttl_seconds=settings.AVAILABILITY_CACHE_TTL_SECONDS
+)
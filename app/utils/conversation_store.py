@@ -0,0 +1,220 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Rough per-message bookkeeping cost added to the content length for the memory ceiling
+MESSAGE_OVERHEAD_BYTES = 200
+
+
+def _message_size(message: dict) -> int:
+    return len(message['role']) + len(message['content'] or '') + MESSAGE_OVERHEAD_BYTES
+
+
+class _Session:
+    __slots__ = ('messages', 'offset', 'last_access', 'size')
+
+    def __init__(self, messages: list, offset: int = 0):
+        self.messages = messages
+        # Number of earlier messages trimmed by the turn cap; offset + i is message i's position in the session
+        self.offset = offset
+        self.last_access = time.monotonic()
+        self.size = sum(_message_size(message) for message in messages)
+
+
+class _SessionDB:
+    """SQLite persistence for conversation messages."""
+
+    PRUNE_EVERY = 500
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS conversation_messages ("
+            "session_id TEXT NOT NULL, seq INTEGER NOT NULL, role TEXT NOT NULL, content TEXT, "
+            "created REAL NOT NULL, PRIMARY KEY (session_id, seq))"
+        )
+        self._conn.commit()
+
+    def load(self, session_id: str, max_messages: int, ttl_seconds: float) -> tuple:
+        """Return the session's last messages and the number of earlier messages before them."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT role, content, created, seq FROM conversation_messages WHERE session_id = ? "
+                "ORDER BY seq DESC LIMIT ?", (session_id, max_messages)
+            ).fetchall()
+        if not rows or (ttl_seconds and time.time() - rows[0][2] > ttl_seconds):
+            return [], 0
+        # seq starts at 1 for a session's first message
+        return [{'role': role, 'content': content} for role, content, _, _ in reversed(rows)], rows[-1][3] - 1
+
+    def append(self, session_id: str, messages: list, max_messages: int, ttl_seconds: float):
+        now = time.time()
+        with self._lock:
+            last = self._conn.execute(
+                "SELECT COALESCE(MAX(seq), 0) FROM conversation_messages WHERE session_id = ?", (session_id,)
+            ).fetchone()[0]
+            self._conn.executemany(
+                "INSERT INTO conversation_messages (session_id, seq, role, content, created) VALUES (?, ?, ?, ?, ?)",
+                [(session_id, last + i + 1, m['role'], m['content'], now) for i, m in enumerate(messages)]
+            )
+            # Only the last max_messages are ever loaded, so older rows can go
+            self._conn.execute(
+                "DELETE FROM conversation_messages WHERE session_id = ? AND seq <= ?",
+                (session_id, last + len(messages) - max_messages)
+            )
+            self._writes += 1
+            if ttl_seconds and self._writes % self.PRUNE_EVERY == 0:
+                self._conn.execute(
+                    "DELETE FROM conversation_messages WHERE session_id IN ("
+                    "SELECT session_id FROM conversation_messages GROUP BY session_id HAVING MAX(created) < ?)",
+                    (now - ttl_seconds,)
+                )
+            self._conn.commit()
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM conversation_messages WHERE session_id = ?", (session_id,))
+            self._conn.commit()
+
+
+class ConversationStore:
+    """Session-keyed conversation histories with bounded memory.
+
+    Each session keeps at most max_turns user/assistant turns. Idle sessions
+    expire after ttl_seconds, and the least recently used sessions are dropped
+    from memory when there are more than max_sessions or their total size
+    exceeds max_bytes. With a db_path, messages are also written to SQLite, so
+    sessions dropped from memory (or lost in a restart) are reloaded on their
+    next request.
+    """
+
+    def __init__(self, max_sessions: int = None, max_turns: int = None, ttl_seconds: float = None,
+                 max_bytes: int = None, db_path: str = None):
+        """Initialize conversation store.
+
+        Args:
+            max_sessions: Maximum sessions held in memory (defaults to settings)
+            max_turns: Maximum user/assistant turns kept per session (defaults to settings)
+            ttl_seconds: Idle seconds after which a session expires, 0 disables (defaults to settings)
+            max_bytes: Approximate memory ceiling for all in-memory sessions (defaults to settings)
+            db_path: SQLite file for persistence, empty disables it (defaults to settings)
+        """
+        self.max_sessions = settings.CONVERSATION_MAX_SESSIONS if max_sessions is None else max_sessions
+        self.max_turns = settings.CONVERSATION_MAX_TURNS if max_turns is None else max_turns
+        self.ttl_seconds = settings.CONVERSATION_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.max_bytes = settings.CONVERSATION_MAX_BYTES if max_bytes is None else max_bytes
+        db_path = settings.CONVERSATION_DB_PATH if db_path is None else db_path
+        self._db = _SessionDB(db_path) if db_path else None
+        self._sessions = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def max_messages(self) -> int:
+        return self.max_turns * 2
+
+    def _expired(self, session: _Session, now: float) -> bool:
+        return bool(self.ttl_seconds) and now - session.last_access > self.ttl_seconds
+
+    def _drop(self, session_id: str):
+        session = self._sessions.pop(session_id)
+        self._size -= session.size
+
+    def _evict(self, now: float):
+        """Drop expired sessions, then least recently used ones until within limits."""
+        # Sessions are ordered by last access, so expired ones are at the front
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if not self._expired(session, now):
+                break
+            self._drop(session_id)
+        while self._sessions and (len(self._sessions) > self.max_sessions or self._size > self.max_bytes):
+            self._drop(next(iter(self._sessions)))
+
+    def _session(self, session_id: str, now: float) -> _Session:
+        session = self._sessions.get(session_id)
+        if session is not None and self._expired(session, now):
+            self._drop(session_id)
+            session = None
+        if session is None:
+            messages, offset = self._db.load(session_id, self.max_messages, self.ttl_seconds) if self._db else ([], 0)
+            session = _Session(messages, offset)
+            self._sessions[session_id] = session
+            self._size += session.size
+        session.last_access = now
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def get_history(self, session_id: str) -> list:
+        """Return a copy of the session's messages (oldest first)."""
+        return self.get_window(session_id)[0]
+
+    def get_window(self, session_id: str) -> tuple:
+        """Return a copy of the session's messages and their offset in the whole conversation.
+
+        The offset counts the session's messages already trimmed by the turn cap,
+        so offset + i identifies message i even after older turns are dropped.
+
+        Returns:
+            Tuple of (messages oldest first, offset)
+        """
+        with self._lock:
+            now = time.monotonic()
+            session = self._session(session_id, now)
+            window = list(session.messages), session.offset
+            self._evict(now)
+            return window
+
+    def extend(self, session_id: str, messages: list):
+        """Append messages to a session, trimming it to the turn cap."""
+        if not messages:
+            return
+        messages = [{'role': m['role'], 'content': m['content']} for m in messages]
+        with self._lock:
+            now = time.monotonic()
+            session = self._session(session_id, now)
+            session.messages.extend(messages)
+            overflow = len(session.messages) - self.max_messages
+            if overflow > 0:
+                del session.messages[:overflow]
+                session.offset += overflow
+            previous_size = session.size
+            session.size = sum(_message_size(message) for message in session.messages)
+            self._size += session.size - previous_size
+            self._evict(now)
+        if self._db is not None:
+            try:
+                self._db.append(session_id, messages, self.max_messages, self.ttl_seconds)
+            except sqlite3.Error as e:
+                logger.error(f"Error persisting conversation {session_id}: {str(e)}")
+
+    def clear(self, session_id: str):
+        """Forget a session in memory and on disk."""
+        with self._lock:
+            if session_id in self._sessions:
+                self._drop(session_id)
+        if self._db is not None:
+            self._db.delete(session_id)
+
+    def stats(self) -> dict:
+        """Return in-memory session counters."""
+        return {
+            'sessions': len(self._sessions),
+            'approx_bytes': self._size,
+            'persistent': self._db is not None,
+        }
+
+
+conversation_store = ConversationStore()
@@ -1,17 +1,27 @@
 import json
 import logging
-from app.utils import embedding
-from langchain_community.vectorstores import Chroma
+from functools import lru_cache
 from app.core.config import settings
+from app.utils.vector_store import vector_store
+from app.core.metrics import span, RETRIEVAL_PATHS
+from app.utils.data_store import data_store
+from app.utils.feature_store import feature_store
+from app.utils.availability_cache import availability_cache
+from app.utils.retrieval_format import format_retrieval_results, parse_product_document
+from app.utils.keyword_index import keyword_index, reciprocal_rank_fusion
+from app.utils.retrieval_filters import build_filters, chroma_where, metadata_matches
+from app.utils.product_index import product_resolver
 import pandas as pd
 import numpy as np
-import joblib
-from datetime import datetime, timedelta
+from datetime import datetime
 import warnings
 warnings.filterwarnings('ignore')
 
 logger = logging.getLogger(__name__)
 
+# Extra vector hits fetched per requested result when filters have to be applied after the search
+UNFILTERED_OVERFETCH = 4
+
 
 def _generate_recommendation(prediction, confidence, quantity, current_stock, 
                             avg_daily_sales, days_until_stockout, product_name):
@@ -64,321 +74,435 @@ def _generate_recommendation(prediction, confidence, quantity, current_stock,
         return f"Product: {product_name}. Current stock: {current_stock} units. Requested: {quantity} units. Status: {prediction}. Please contact support for detailed availability information."
 
 
-def retrieve_document(query: str) -> str:
+@lru_cache(maxsize=4)
+def _catalog_categories(data_version: tuple) -> tuple:
+    """Distinct catalog categories, recomputed only when the catalog is reloaded."""
+    catalog_df = data_store.get_product_data().catalog_df
+    return tuple(catalog_df['category'].dropna().astype(str).unique())
+
+
+def _keyword_search(query: str, filters: dict = None):
+    """BM25 search of the keyword index built with the vector DB.
+    
+    Args:
+        query: User's search query
+        filters: Retrieval filters the results must match
+        
+    Returns:
+        Tuple of (confident match, ranked (Document, score) pairs), or None if there is no keyword index
+    """
+    try:
+        index = keyword_index.get()
+    except Exception as e:
+        logger.error(f"Error loading keyword index: {str(e)}")
+        return None
+    if index is None:
+        return None
+    with span("retrieval_keyword"):
+        hits = index.search(query, k=settings.RETRIEVAL_K, filters=filters)
+        confident = index.is_confident(query, hits)
+    return confident, [(index.document(position), score) for position, score in hits]
+
+
+def retrieve_document(query: str, category: str = None, min_price: float = None,
+                      max_price: float = None, min_order_count: int = None) -> str:
     """Retrieve relevant documents from Vector DB based on user query.
     
+    Filters are applied inside the store before similarity ranking, so a
+    filtered query only ranks the matching products.
+    
     Args:
         query: User's search query
+        category: Only products in this category
+        min_price: Only products priced at or above this
+        max_price: Only products priced at or below this
+        min_order_count: Only products ordered at least this many times (popularity)
         
     Returns:
-        JSON string with search results or error
+        Compact JSON string with the matching products or error
     """
     scope = "general"
-    function_description = "Retrieve product information from the vector database based on user query."
+    function_description = "Retrieve product information from the vector database based on user query. Optional filters narrow the search to a category, a price range or popular products; pass null for filters the user did not ask for."
     query_description = "Search query to find relevant products"
+    category_description = "Product category to restrict the search to, e.g. 'furniture_decor', or null"
+    category_schema = {"type": ["string", "null"]}
+    min_price_description = "Minimum price, e.g. 20 for 'over $20', or null"
+    min_price_schema = {"type": ["number", "null"]}
+    max_price_description = "Maximum price, e.g. 50 for 'under $50', or null"
+    max_price_schema = {"type": ["number", "null"]}
+    min_order_count_description = "Minimum number of orders, for 'popular' or 'best selling' products, or null"
+    min_order_count_schema = {"type": ["integer", "null"]}
     
     try:
         logger.info(f"Retrieving documents for query: {query}")
-        db = Chroma(persist_directory=settings.vectorDBPath, embedding_function=embedding)
-        results = db.similarity_search_with_score(query, k=5)
-        return str(results)
+        filters = {}
+        if any(value not in (None, "") for value in (category, min_price, max_price, min_order_count)):
+            categories = _catalog_categories(data_store.data_version()) if category else ()
+            filters = build_filters(category, min_price, max_price, min_order_count, categories)
+        
+        keyword_search = _keyword_search(query, filters) if settings.RETRIEVAL_HYBRID else None
+        confident, keyword_results = keyword_search or (False, [])
+        if confident and settings.RETRIEVAL_KEYWORD_FAST_PATH:
+            # Exact product name or category: skip the embedding model and vector search
+            RETRIEVAL_PATHS.labels(path="keyword").inc()
+            return format_retrieval_results(query, keyword_results, filters=filters)
+        
+        db = vector_store.get()
+        where = chroma_where(filters)
+        post_filter = where is not None and not vector_store.has_typed_metadata()
+        if post_filter:
+            # A where clause on metadata the store does not have would silently match nothing
+            logger.warning("Vector DB has no typed product metadata, filtering vector results by their text; "
+                           "rebuild it with /create_vectorDB to filter inside the store")
+            where = None
+        # Same as similarity_search_with_score, split so embedding and search are timed separately
+        with span("retrieval_embedding"):
+            query_embedding = db.embeddings.embed_query(query)
+        with span("retrieval_search"):
+            results = db.similarity_search_by_vector_with_relevance_scores(
+                query_embedding, k=settings.RETRIEVAL_K * (UNFILTERED_OVERFETCH if post_filter else 1), filter=where
+            )
+        if post_filter:
+            results = [(doc, score) for doc, score in results
+                       if metadata_matches(parse_product_document(doc), filters)][:settings.RETRIEVAL_K]
+        # Chroma scores are distances, lower is more similar
+        if settings.RETRIEVAL_SCORE_THRESHOLD is not None:
+            results = [(doc, score) for doc, score in results if score <= settings.RETRIEVAL_SCORE_THRESHOLD]
+        
+        if keyword_results:
+            RETRIEVAL_PATHS.labels(path="hybrid").inc()
+            results = reciprocal_rank_fusion([results, keyword_results], k=settings.RETRIEVAL_RRF_K)
+        else:
+            RETRIEVAL_PATHS.labels(path="vector").inc()
+        return format_retrieval_results(query, results, filters=filters)
     except Exception as e:
         logger.error(f"Error retrieving documents: {str(e)}")
         return json.dumps({"error": str(e)})
     
 
-def check_availability(product_name: str, quantity: int):
-    """Check product availability using ML model and inventory data.
+def _find_product(product_data, product_name: str):
+    """Find the catalog row for a product name using the fuzzy product name index.
     
     Args:
-        product_name: Name of the product to check
-        quantity: Number of units requested (default: 1)
+        product_data: Indexed product data
+        product_name: Product name given by the user
         
     Returns:
-        JSON string with availability status and recommendations
+        Tuple of (product row, match score, None) or (None, None, error dict) when not found
     """
-    scope = "general"
-    function_description = "The function used to check the availability of the product, when ever user plans to buy a product or ask for the product availability this function will be used to provide the availability status using ML model"
-    product_name_description = "Product name for which availability needs to be checked"
-    quantity_description = "Number of items to check availability for the product give by user. Need to ask user every time"
+    match, candidates = product_resolver.resolve(product_name)
+    # The name index reloads on its own, so it can know a product this data snapshot does not
+    product = product_data.get_product(match.product_id) if match is not None else None
+    
+    if product is None:
+        return None, None, {
+            'status': 'error',
+            'message': f"Product '{product_name}' not found in catalog",
+            'suggestion': "Please check the product name and try again",
+            'did_you_mean': [candidate.product_name for candidate in candidates[:3] if candidate.score >= product_resolver.min_score / 2],
+            'available_products': product_data.catalog_df['product_name'].head(10).tolist()
+        }
+    
+    return product, match.score, None
 
-    try:
-        # CRITICAL: Convert quantity to int (LLM may pass it as string)
-        quantity = int(quantity) #if quantity else 1
-        product_name = str(product_name).strip()
-        
-        print(product_name, quantity)
-        # ========================================================================
-        # STEP 1: Load Required Data
-        # ========================================================================
-        
-        print(f"\n{'='*70}")
-        print(f"CHECKING AVAILABILITY: {product_name}")
-        print(f"{'='*70}")
-        
-        # Load product catalog
-        catalog_df = pd.read_csv(r'D:\RND\workshop2\tai3_workshop\data\product_catalog_real.csv')
-        
-        # Load sales history
-        sales_df = pd.read_csv(r'D:\RND\workshop2\tai3_workshop\data\sales_history_real.csv')
-        sales_df['date'] = pd.to_datetime(sales_df['date'])
+
+def _availability_snapshot(product_id, features: dict, prediction, probabilities, product_data) -> dict:
+    """Collect the quantity-independent availability of one scored product.
+    
+    Args:
+        product_id: ID of the product
+        features: Engineered features of the product
+        prediction: Predicted stock class
+        probabilities: Class probabilities from the model
+        product_data: Indexed product data used for the inventory lookup
         
-        # Load current inventory
-        inventory_df = pd.read_csv(r'D:\RND\workshop2\tai3_workshop\data\current_inventory_real.csv')
+    Returns:
+        Snapshot dict with the prediction, inventory figures and demand insights
+    """
+    # Map probabilities to classes
+    prob_dict = {
+        'low_stock': float(probabilities[0]),
+        'medium_stock': float(probabilities[1]),
+        'high_stock': float(probabilities[2])
+    }
+    
+    confidence = float(probabilities.max())
+    
+    logger.debug("Prediction for %s: %s (confidence %.2f%%)", product_id, prediction, confidence * 100)
+    
+    # ========================================================================
+    # Get Current Inventory Status
+    # ========================================================================
+    
+    inventory_info = product_data.get_inventory(product_id)
+    
+    if inventory_info is not None:
+        current_stock = int(inventory_info['current_stock'])
+        avg_daily_sales = float(inventory_info['avg_daily_sales'])
+        days_until_stockout = float(inventory_info['days_until_stockout'])
+    else:
+        # Estimate if not in inventory
+        current_stock = int(features['sales_mean_30d'] * 10)
+        avg_daily_sales = float(features['sales_mean_7d'])
+        days_until_stockout = current_stock / (avg_daily_sales + 0.1)
+    
+    # Sanitize values before passing to recommendation
+    current_stock = int(current_stock) if pd.notna(current_stock) else 0
+    avg_daily_sales = float(avg_daily_sales) if pd.notna(avg_daily_sales) and np.isfinite(avg_daily_sales) else 0
+    days_until_stockout = float(days_until_stockout) if pd.notna(days_until_stockout) and np.isfinite(days_until_stockout) else 0
+    
+    logger.debug(
+        "Inventory for %s: stock=%d avg_daily_sales=%.1f days_until_stockout=%.1f",
+        product_id, current_stock, avg_daily_sales, days_until_stockout
+    )
+    
+    return {
+        'prediction': str(prediction),
+        'confidence': confidence,
+        'probabilities': prob_dict,
+        'current_stock': current_stock,
+        'avg_daily_sales': avg_daily_sales,
+        'days_until_stockout': days_until_stockout,
+        'demand_insights': {
+            'recent_7d_sales': int(features['sales_sum_7d']),
+            'recent_30d_sales': int(features['sales_sum_30d']),
+            'sales_velocity': float(features['sales_velocity']),
+            'trend': 'increasing' if features['sales_trend'] > 0 else 'stable/decreasing'
+        }
+    }
+
+
+def _build_availability_result(product, snapshot: dict, quantity: int) -> dict:
+    """Build the availability response for one product from its snapshot.
+    
+    Args:
+        product: Catalog row of the product
+        snapshot: Availability snapshot from _availability_snapshot (possibly cached)
+        quantity: Number of units requested
         
-        # Load trained ML model
-        model_artifacts = joblib.load(r'D:\RND\workshop2\tai3_workshop\app\models\demand_forecast_model.pkl')
-        model = model_artifacts['model']
-        scaler = model_artifacts['scaler']
-        feature_names = model_artifacts['feature_names']
+    Returns:
+        Availability result dict
+    """
+    product_id = product['product_id']
+    full_product_name = product['product_name']
+    current_stock = snapshot['current_stock']
+    
+    # ========================================================================
+    # Generate Recommendation
+    # ========================================================================
+    
+    recommendation = _generate_recommendation(
+        prediction=snapshot['prediction'],
+        confidence=snapshot['confidence'],
+        quantity=quantity,
+        current_stock=current_stock,
+        avg_daily_sales=snapshot['avg_daily_sales'],
+        days_until_stockout=snapshot['days_until_stockout'],
+        product_name=full_product_name
+    )
+    
+    logger.debug("Recommendation for %s: %.100s", product_id, recommendation)
+    
+    # ========================================================================
+    # Build Response
+    # ========================================================================
+    
+    return {
+        'status': 'success',
+        'product': {
+            'id': str(product_id),
+            'name': str(full_product_name),
+            'price': float(product['price']),
+            'category': str(product.get('category', 'N/A'))
+        },
+        'availability': {
+            'status': snapshot['prediction'],
+            'confidence': snapshot['confidence'],
+            'probabilities': dict(snapshot['probabilities'])
+        },
+        'inventory': {
+            'current_stock': int(current_stock),
+            'can_fulfill': bool(current_stock >= quantity),
+            'units_requested': int(quantity),
+            'avg_daily_sales': float(snapshot['avg_daily_sales']),
+            'days_until_stockout': float(snapshot['days_until_stockout'])
+        },
+        'demand_insights': dict(snapshot['demand_insights']),
+        'recommendation': str(recommendation),
+        'timestamp': datetime.now().isoformat()
+    }
+
+
+def check_availability_items(items: list) -> list:
+    """Check availability for several products with a single model inference.
+    
+    Products are resolved and their features looked up one by one, then all
+    found products are scored together in one feature matrix.
+    
+    Args:
+        items: List of (product_name, quantity) pairs
         
-        print("✅ Data and model loaded")
+    Returns:
+        List of availability result dicts in the same order as items
+    """
+    # ========================================================================
+    # STEP 1: Load Required Data
+    # ========================================================================
+    
+    # Shared, change-aware data and model store (loaded once per process)
+    with span("availability_data_load"):
+        product_data = data_store.get_product_data()
+        model_artifacts, model_version = data_store.get_versioned_model_artifacts()
+    model = model_artifacts['model']
+    scaler = model_artifacts['scaler']
+    feature_names = model_artifacts['feature_names']
+    # Cached snapshots are only valid for the data and model they came from; the
+    # version is taken from the loaded objects so a concurrent reload cannot mislabel them
+    version = product_data.version + (model_version,)
+    # One feature snapshot for the whole batch, so every lookup sees the same rows
+    with span("feature_lookup"):
+        features_snapshot = feature_store.snapshot()
+    
+    results = [None] * len(items)
+    scored = []
+    for slot, (product_name, quantity) in enumerate(items):
+        product_name = str(product_name).strip() if product_name is not None else ''
+        if not product_name:
+            results[slot] = {
+                'status': 'error',
+                'message': "Missing product name",
+                'suggestion': "Please provide the name of the product to check"
+            }
+            continue
+        try:
+            # CRITICAL: Convert quantity to int (LLM may pass it as string)
+            quantity = int(quantity)
+        except (TypeError, ValueError):
+            quantity = None
+        if quantity is None or quantity < 1:
+            results[slot] = {
+                'status': 'error',
+                'message': f"Invalid quantity '{items[slot][1]}' for product '{product_name}'",
+                'suggestion': "Please provide the quantity as a whole number of at least 1"
+            }
+            continue
         
-        # ========================================================================
+        # ====================================================================
         # STEP 2: Find Product in Catalog
-        # ========================================================================
+        # ====================================================================
         
-        print(f"\n🔍 Searching for product: '{product_name}'")
+        with span("product_resolution"):
+            product, match_score, error = _find_product(product_data, product_name)
+        if error:
+            results[slot] = error
+            continue
         
-        # Search by name (case-insensitive, partial match)
-        product_match = catalog_df[
-            catalog_df['product_name'].str.lower().str.contains(product_name.lower(), na=False)
-        ]
-        
-        if product_match.empty:
-            return json.dumps({
-                'status': 'error',
-                'message': f"Product '{product_name}' not found in catalog",
-                'suggestion': "Please check the product name and try again",
-                'available_products': catalog_df['product_name'].head(10).tolist()
-            })
-        
-        # Get best match (first result)
-        product = product_match.iloc[0]
-        product_id = product['product_id']
-        full_product_name = product['product_name']
-        product_price = product['price']
-        
-        print(f"✅ Found: {full_product_name} (ID: {product_id})")
-        print(f"   Price: ${product_price:.2f}")
+        logger.debug(
+            "Resolved %r to %s (ID: %s, match score: %.2f)",
+            product_name, product['product_name'], product['product_id'], match_score
+        )
         
-        # ========================================================================
-        # STEP 3: Get Recent Sales Data and Engineer Features
-        # ========================================================================
+        # Repeat products skip feature lookup and inference; only quantity differs
+        snapshot = availability_cache.get(product['product_id'], version)
+        if snapshot is not None:
+            results[slot] = _build_availability_result(product, snapshot, quantity)
+            results[slot]['product']['match_score'] = match_score
+            continue
         
-        print(f"\n📊 Analyzing recent sales patterns...")
+        # ====================================================================
+        # STEP 3: Look Up Engineered Features
+        # ====================================================================
         
-        # Get product sales history
-        product_sales = sales_df[sales_df['product_id'] == product_id].copy()
+        # Precomputed features from the batch's feature store snapshot
+        features, history_length = features_snapshot.get_features(product['product_id'])
         
-        if len(product_sales) < 30:
-            return json.dumps({
+        if history_length < 30:
+            results[slot] = {
                 'status': 'error',
-                'message': f"Insufficient sales history for {full_product_name}",
+                'message': f"Insufficient sales history for {product['product_name']}",
                 'suggestion': "This product may be new or have limited sales data"
-            })
-        
-        # Sort by date
-        product_sales = product_sales.sort_values('date')
-        
-        # Add time features if not present (for feature engineering)
-        if 'day_of_week' not in product_sales.columns:
-            product_sales['day_of_week'] = product_sales['date'].dt.dayofweek
-        if 'month' not in product_sales.columns:
-            product_sales['month'] = product_sales['date'].dt.month
-        if 'year' not in product_sales.columns:
-            product_sales['year'] = product_sales['date'].dt.year
-        if 'is_weekend' not in product_sales.columns:
-            product_sales['is_weekend'] = product_sales['day_of_week'].isin([5, 6]).astype(int)
-        if 'is_holiday_season' not in product_sales.columns:
-            product_sales['is_holiday_season'] = product_sales['month'].isin([11, 12]).astype(int)
-        
-        # Get last 30 days
-        latest_date = product_sales['date'].max()
-        last_30_days = product_sales[product_sales['date'] >= (latest_date - timedelta(days=30))]
-        
-        # ========================================================================
-        # STEP 4: Engineer Features (Same as Training)
-        # ========================================================================
-        
-        print(f"🔧 Engineering features...")
-        
-        features = {}
-        
-        # Rolling statistics
-        for window in [7, 14, 30]:
-            last_window = product_sales.tail(window)
-            features[f'sales_mean_{window}d'] = last_window['daily_sales'].mean()
-            features[f'sales_std_{window}d'] = last_window['daily_sales'].std() if len(last_window) > 1 else 0
-            features[f'sales_sum_{window}d'] = last_window['daily_sales'].sum()
-            features[f'sales_max_{window}d'] = last_window['daily_sales'].max()
-            features[f'sales_min_{window}d'] = last_window['daily_sales'].min()
-            features[f'revenue_sum_{window}d'] = last_window['daily_revenue'].sum()
-        
-        # Lag features
-        for lag in [1, 7, 14]:
-            lag_value = product_sales['daily_sales'].iloc[-lag] if len(product_sales) >= lag else 0
-            features[f'sales_lag_{lag}'] = lag_value
-        
-        # Trend features
-        features['sales_velocity'] = features['sales_mean_7d'] / (features['sales_mean_30d'] + 0.1)
-        features['sales_trend'] = features['sales_mean_7d'] - features['sales_mean_14d']
-        features['sales_acceleration'] = 0  # Simplified
-        
-        # Variability
-        features['sales_cv'] = features['sales_std_30d'] / (features['sales_mean_30d'] + 0.1)
-        features['sales_range_30d'] = features['sales_max_30d'] - features['sales_min_30d']
-        
-        # Zero sales streak
-        zero_streak = 0
-        for sale in product_sales['daily_sales'].tail(7).values[::-1]:
-            if sale == 0:
-                zero_streak += 1
-            else:
-                break
-        features['zero_sales_streak'] = zero_streak
-        
-        # Days since last sale
-        sales_dates = product_sales[product_sales['daily_sales'] > 0]['date']
-        if len(sales_dates) > 0:
-            features['days_since_sale'] = (latest_date - sales_dates.max()).days
-        else:
-            features['days_since_sale'] = 30
+            }
+            continue
         
-        # Product features
-        features['product_price'] = product_price
-        features['product_popularity'] = product['order_count']
-        features['category_encoded'] = 0  # Simplified
-        
-        # Fill NaN
-        for key in features:
-            if pd.isna(features[key]):
-                features[key] = 0
-        
-        # Only keep features that exist in the model's feature_names
-        # Create a complete feature dict with all required features
-        final_features = {}
-        for fname in feature_names:
-            if fname in features:
-                final_features[fname] = features[fname]
-            else:
-                final_features[fname] = 0  # Default value for missing features
-        
-        print(f"✅ Features engineered")
-        
-        # ========================================================================
-        # STEP 5: Make ML Prediction
-        # ========================================================================
-        
-        print(f"\n🤖 Running ML prediction...")
-        
-        # Create feature vector using final_features (ensure correct order)
-        X = pd.DataFrame([final_features])[feature_names]
+        scored.append((slot, product, match_score, features, quantity))
+    
+    if not scored:
+        return results
+    
+    # ========================================================================
+    # STEP 4: Build Model Feature Matrix and Make ML Prediction
+    # ========================================================================
+    
+    logger.debug("Running ML prediction for %d product(s)", len(scored))
+    
+    with span("model_inference"):
+        # Features the model expects but the store does not engineer default to 0
+        X = pd.DataFrame(
+            features_snapshot.get_vectors([product['product_id'] for _, product, _, _, _ in scored], feature_names),
+            columns=feature_names
+        )
         
-        # Scale features
+        # Scale features and predict all products at once
         X_scaled = scaler.transform(X)
-        
-        # Predict
-        prediction = model.predict(X_scaled)[0]
-        probabilities = model.predict_proba(X_scaled)[0]
-        
-        # Map probabilities to classes
-        classes = ['Low Stock', 'Medium Stock', 'High Stock']
-        prob_dict = {
-            'low_stock': float(probabilities[0]),
-            'medium_stock': float(probabilities[1]),
-            'high_stock': float(probabilities[2])
-        }
-        
-        confidence = float(probabilities.max())
-        
-        print(f"✅ Prediction: {prediction} (Confidence: {confidence:.2%})")
-        
-        # ========================================================================
-        # STEP 6: Get Current Inventory Status
-        # ========================================================================
-        
-        print(f"\n📦 Checking current inventory...")
-        
-        inventory_info = inventory_df[inventory_df['product_id'] == product_id]
-        
-        if not inventory_info.empty:
-            inventory_info = inventory_info.iloc[0]
-            current_stock = int(inventory_info['current_stock'])
-            avg_daily_sales = float(inventory_info['avg_daily_sales'])
-            days_until_stockout = float(inventory_info['days_until_stockout'])
-        else:
-            # Estimate if not in inventory
-            current_stock = int(features['sales_mean_30d'] * 10)
-            avg_daily_sales = float(features['sales_mean_7d'])
-            days_until_stockout = current_stock / (avg_daily_sales + 0.1)
-        
-        # Sanitize values before passing to recommendation
-        current_stock = int(current_stock) if pd.notna(current_stock) else 0
-        avg_daily_sales = float(avg_daily_sales) if pd.notna(avg_daily_sales) and np.isfinite(avg_daily_sales) else 0
-        days_until_stockout = float(days_until_stockout) if pd.notna(days_until_stockout) and np.isfinite(days_until_stockout) else 0
-        
-        print(f"   Current stock: {current_stock} units")
-        print(f"   Avg daily sales: {avg_daily_sales:.1f} units")
-        print(f"   Days until stockout: {days_until_stockout:.1f} days")
-        
-        # ========================================================================
-        # STEP 7: Generate Recommendation
-        # ========================================================================
-        
-        print(f"\n💡 Generating recommendation...")
-        
-        recommendation = _generate_recommendation(
-            prediction=prediction,
-            confidence=confidence,
-            quantity=quantity,
-            current_stock=current_stock,
-            avg_daily_sales=avg_daily_sales,
-            days_until_stockout=days_until_stockout,
-            product_name=full_product_name
+        predictions = model.predict(X_scaled)
+        probabilities = model.predict_proba(X_scaled)
+    
+    # ========================================================================
+    # STEP 5: Inventory, Recommendation and Response per Product
+    # ========================================================================
+    
+    for (slot, product, match_score, features, quantity), prediction, product_probabilities in zip(scored, predictions, probabilities):
+        snapshot = _availability_snapshot(
+            product['product_id'], features, prediction, product_probabilities, product_data
         )
+        availability_cache.put(product['product_id'], version, snapshot)
+        results[slot] = _build_availability_result(product, snapshot, quantity)
+        results[slot]['product']['match_score'] = match_score
+    
+    return results
+
+
+def _parse_availability_items(items) -> list:
+    """Normalize batch tool input into (product_name, quantity) pairs.
+    
+    Args:
+        items: List (or JSON string of a list) of {"product_name", "quantity"} objects or pairs
         
-        print(f"✅ Recommendation generated: {recommendation[:100]}...")
-        
-        # ========================================================================
-        # STEP 8: Build Response
-        # ========================================================================
+    Returns:
+        List of (product_name, quantity) tuples
+    """
+    if isinstance(items, str):
+        items = json.loads(items)
+    pairs = []
+    for item in items:
+        if isinstance(item, dict):
+            pairs.append((item.get('product_name'), item.get('quantity')))
+        else:
+            product_name, quantity = item
+            pairs.append((product_name, quantity))
+    return pairs
+
+
+def check_availability(product_name: str, quantity: int):
+    """Check product availability using ML model and inventory data.
+    
+    Args:
+        product_name: Name of the product to check
+        quantity: Number of units requested (default: 1)
         
-        result = {
-            'status': 'success',
-            'product': {
-                'id': str(product_id),
-                'name': str(full_product_name),
-                'price': float(product_price),
-                'category': str(product.get('category', 'N/A'))
-            },
-            'availability': {
-                'status': str(prediction),
-                'confidence': float(confidence),
-                'probabilities': prob_dict
-            },
-            'inventory': {
-                'current_stock': int(current_stock),
-                'can_fulfill': bool(current_stock >= quantity),
-                'units_requested': int(quantity),
-                'avg_daily_sales': float(avg_daily_sales),
-                'days_until_stockout': float(days_until_stockout)
-            },
-            'demand_insights': {
-                'recent_7d_sales': int(final_features['sales_sum_7d']),
-                'recent_30d_sales': int(final_features['sales_sum_30d']),
-                'sales_velocity': float(final_features['sales_velocity']),
-                'trend': 'increasing' if final_features['sales_trend'] > 0 else 'stable/decreasing'
-            },
-            'recommendation': str(recommendation),
-            'timestamp': datetime.now().isoformat()
-        }
+    Returns:
+        JSON string with availability status and recommendations
+    """
+    scope = "general"
+    function_description = "The function used to check the availability of the product, when ever user plans to buy a product or ask for the product availability this function will be used to provide the availability status using ML model"
+    product_name_description = "Product name for which availability needs to be checked"
+    quantity_description = "Number of items to check availability for the product give by user. Need to ask user every time"
+
+    try:
+        # Name and quantity are validated (and quantity converted) per item
+        logger.debug("Checking availability of %r (quantity %r)", product_name, quantity)
         
-        print(f"\n{'='*70}")
-        print(f"✅ AVAILABILITY CHECK COMPLETE")
-        print(f"{'='*70}")
-        print(f"Status: {prediction}")
-        print(f"Recommendation: {recommendation}")
+        result = check_availability_items([(product_name, quantity)])[0]
         
         # Return JSON string
         return json.dumps(result, ensure_ascii=False)
@@ -388,7 +512,7 @@ def check_availability(product_name: str, quantity: int):
         return json.dumps({
             'status': 'error',
             'message': f'Required file not found: {str(e)}',
-            'suggestion': 'Ensure all data files and model are in the current directory'
+            'suggestion': 'Ensure the data and model paths configured in settings exist'
         })
     
     except Exception as e:
@@ -397,4 +521,57 @@ def check_availability(product_name: str, quantity: int):
             'status': 'error',
             'message': f'Error checking availability: {str(e)}',
             'suggestion': 'Please try again or contact support'
-        })
\ No newline at end of file
+        })
+
+
+def check_availability_batch(items: list):
+    """Check availability of several products at once using one ML model inference.
+    
+    Args:
+        items: List of {"product_name": str, "quantity": int} objects
+        
+    Returns:
+        JSON string with one availability result per requested product
+    """
+    scope = "general"
+    function_description = "Check the availability of several products at once, for example a cart or a bulk order. Use this instead of calling check_availability repeatedly when the user asks about more than one product"
+    items_description = "List of objects with product_name and quantity for every product the user wants to check, e.g. [{\"product_name\": \"Premium Bedding Set\", \"quantity\": 2}]. Need to ask user for every quantity"
+    items_schema = {
+        "type": "array",
+        "items": {
+            "type": "object",
+            "properties": {
+                "product_name": {"type": "string"},
+                "quantity": {"type": "integer", "minimum": 1}
+            },
+            "required": ["product_name", "quantity"],
+            "additionalProperties": False
+        }
+    }
+
+    try:
+        pairs = _parse_availability_items(items)
+        if len(pairs) > settings.AVAILABILITY_BATCH_MAX_ITEMS:
+            return json.dumps({
+                'status': 'error',
+                'message': f"Too many products ({len(pairs)}); at most {settings.AVAILABILITY_BATCH_MAX_ITEMS} can be checked at once",
+                'suggestion': 'Please split the list into smaller batches'
+            })
+        results = check_availability_items(pairs)
+        return json.dumps({'status': 'success', 'results': results}, ensure_ascii=False)
+    
+    except FileNotFoundError as e:
+        logger.error(f"File not found: {str(e)}")
+        return json.dumps({
+            'status': 'error',
+            'message': f'Required file not found: {str(e)}',
+            'suggestion': 'Ensure the data and model paths configured in settings exist'
+        })
+    
+    except Exception as e:
+        logger.error(f"Error in check_availability_batch: {str(e)}", exc_info=True)
+        return json.dumps({
+            'status': 'error',
+            'message': f'Error checking availability: {str(e)}',
+            'suggestion': 'Please check the product list and try again'
+        })
@@ -0,0 +1,213 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+import joblib
+import pandas as pd
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class _FileSource:
+    """A single file-backed dataset that is loaded once and reloaded on change."""
+
+    def __init__(self, name: str, path: str, loader, check_interval: float):
+        """Initialize file source.
+
+        Args:
+            name: Short name used in logs and version tuples
+            path: Path to the file on disk
+            loader: Callable taking the path and returning the loaded value
+            check_interval: Minimum seconds between file change checks
+        """
+        self.name = name
+        self.path = path
+        self.loader = loader
+        self.check_interval = check_interval
+        # (value, version) is swapped as one reference so readers never see a torn pair
+        self._current = (None, 0)
+        self._stat = None
+        self._digest = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _file_digest(path: str) -> str:
+        """Hash file contents so touched-but-unchanged files are not reloaded."""
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @property
+    def value(self):
+        return self._current[0]
+
+    @property
+    def version(self) -> int:
+        return self._current[1]
+
+    def get(self):
+        """Return the loaded value, reloading it if the file has changed.
+
+        Returns:
+            The value produced by the loader
+        """
+        return self.get_versioned()[0]
+
+    def get_versioned(self) -> tuple:
+        """Return the loaded value together with the version it was loaded as.
+
+        Returns:
+            Tuple of (value, version) taken from the same load
+        """
+        now = time.monotonic()
+        current = self._current
+        if current[0] is not None and now - self._last_check < self.check_interval:
+            return current
+
+        with self._lock:
+            current = self._current
+            if current[0] is not None and now - self._last_check < self.check_interval:
+                return current
+
+            stat = os.stat(self.path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+            self._last_check = now
+            if current[0] is not None and signature == self._stat:
+                return current
+
+            digest = self._file_digest(self.path)
+            if current[0] is not None and digest == self._digest:
+                self._stat = signature
+                return current
+
+            started = time.perf_counter()
+            current = (self.loader(self.path), current[1] + 1)
+            self._current = current
+            self._stat = signature
+            self._digest = digest
+            logger.info(f"Loaded {self.name} from {self.path} in {time.perf_counter() - started:.3f}s (version {current[1]})")
+            return current
+
+    @property
+    def loaded(self) -> bool:
+        return self.value is not None
+
+
+class ProductData:
+    """Product catalog, sales history and inventory indexed by product_id."""
+
+    def __init__(self, catalog_df: pd.DataFrame, sales_df: pd.DataFrame, inventory_df: pd.DataFrame,
+                 version: tuple = None):
+        # Data version of the frames below, as returned by DataStore.data_version()
+        self.version = version
+        self.catalog_df = catalog_df
+        self.sales_df = sales_df
+        self.inventory_df = inventory_df
+        # Positional indices per product so lookups avoid scanning whole frames
+        self._catalog_index = catalog_df.groupby('product_id', sort=False).indices
+        self._sales_index = sales_df.groupby('product_id', sort=False).indices
+        self._inventory_index = inventory_df.groupby('product_id', sort=False).indices
+
+    def get_product(self, product_id):
+        """Return the first catalog row for the product or None."""
+        positions = self._catalog_index.get(product_id)
+        if positions is None:
+            return None
+        return self.catalog_df.iloc[positions[0]]
+
+    def get_sales(self, product_id) -> pd.DataFrame:
+        """Return the product's sales history sorted by date."""
+        positions = self._sales_index.get(product_id)
+        if positions is None:
+            return self.sales_df.iloc[0:0]
+        return self.sales_df.iloc[positions]
+
+    def get_inventory(self, product_id):
+        """Return the first inventory row for the product or None."""
+        positions = self._inventory_index.get(product_id)
+        if positions is None:
+            return None
+        return self.inventory_df.iloc[positions[0]]
+
+
+def _load_csv(path: str) -> pd.DataFrame:
+    return pd.read_csv(path)
+
+
+def _load_sales(path: str) -> pd.DataFrame:
+    sales_df = pd.read_csv(path)
+    sales_df['date'] = pd.to_datetime(sales_df['date'])
+    # Sorted once here so per-product slices are already in date order
+    return sales_df.sort_values(['product_id', 'date'], kind='mergesort').reset_index(drop=True)
+
+
+class DataStore:
+    """Process-wide, thread-safe store for the forecast data and model artifacts.
+
+    Each source is loaded on first use and reloaded only when its file changes.
+    """
+
+    def __init__(self, catalog_path: str = None, sales_path: str = None,
+                 inventory_path: str = None, model_path: str = None,
+                 check_interval: float = None):
+        """Initialize data store.
+
+        Args:
+            catalog_path: Product catalog CSV path (defaults to settings)
+            sales_path: Sales history CSV path (defaults to settings)
+            inventory_path: Current inventory CSV path (defaults to settings)
+            model_path: Demand forecast model artifact path (defaults to settings)
+            check_interval: Seconds between file change checks (defaults to settings)
+        """
+        if check_interval is None:
+            check_interval = settings.DATA_RELOAD_CHECK_SECONDS
+        self.catalog = _FileSource('catalog', catalog_path or settings.product_data_path, _load_csv, check_interval)
+        self.sales = _FileSource('sales', sales_path or settings.sales_data_path, _load_sales, check_interval)
+        self.inventory = _FileSource('inventory', inventory_path or settings.inventory_data_path, _load_csv, check_interval)
+        self.model = _FileSource('model', model_path or settings.forecast_model_path, joblib.load, check_interval)
+        self._product_data = None
+        self._lock = threading.Lock()
+
+    def data_version(self) -> tuple:
+        """Return a tuple that changes whenever any data source is reloaded."""
+        return (self.catalog.version, self.sales.version, self.inventory.version)
+
+    def version(self) -> tuple:
+        """Return a tuple that changes whenever any data source or the model is reloaded."""
+        return self.data_version() + (self.model.version,)
+
+    def get_product_data(self) -> ProductData:
+        """Return indexed product data, rebuilding the indices if a source changed.
+
+        Returns:
+            ProductData with catalog, sales and inventory lookups by product_id;
+            its version is the data version the frames were loaded as
+        """
+        catalog_df, catalog_version = self.catalog.get_versioned()
+        sales_df, sales_version = self.sales.get_versioned()
+        inventory_df, inventory_version = self.inventory.get_versioned()
+        version = (catalog_version, sales_version, inventory_version)
+        product_data = self._product_data
+        if product_data is not None and product_data.version == version:
+            return product_data
+
+        with self._lock:
+            if self._product_data is None or self._product_data.version != version:
+                self._product_data = ProductData(catalog_df, sales_df, inventory_df, version)
+            return self._product_data
+
+    def get_model_artifacts(self) -> dict:
+        """Return the loaded model artifacts (model, scaler, feature_names, ...)."""
+        return self.model.get()
+
+    def get_versioned_model_artifacts(self) -> tuple:
+        """Return the loaded model artifacts together with the model version they were loaded as."""
+        return self.model.get_versioned()
+
+
+data_store = DataStore()
@@ -0,0 +1,173 @@
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from array import array
+from langchain_core.embeddings import Embeddings
+from app.core.metrics import record_cache
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_query(text: str) -> str:
+    """Normalize query text so trivially different phrasings share a cache entry."""
+    return _WHITESPACE.sub(' ', str(text)).strip().lower()
+
+
+class _DiskTier:
+    """SQLite-backed store of query embeddings that survives restarts."""
+
+    PRUNE_EVERY = 500
+
+    def __init__(self, path: str, model_name: str, max_entries: int, ttl_seconds: float = 0):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._inserts = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS query_embeddings ("
+            "model TEXT NOT NULL, query TEXT NOT NULL, vector BLOB NOT NULL, created REAL NOT NULL, "
+            "PRIMARY KEY (model, query))"
+        )
+        self._conn.commit()
+
+    def get(self, query: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT vector, created FROM query_embeddings WHERE model = ? AND query = ?", (self.model_name, query)
+            ).fetchone()
+        if row is None:
+            return None
+        vector, created = row
+        if self.ttl_seconds and time.time() - created > self.ttl_seconds:
+            return None
+        return array('d', vector).tolist()
+
+    def put(self, query: str, vector: list):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO query_embeddings (model, query, vector, created) VALUES (?, ?, ?, ?)",
+                (self.model_name, query, array('d', vector).tobytes(), time.time())
+            )
+            self._inserts += 1
+            if self._inserts % self.PRUNE_EVERY == 0:
+                if self.ttl_seconds:
+                    self._conn.execute(
+                        "DELETE FROM query_embeddings WHERE model = ? AND created < ?",
+                        (self.model_name, time.time() - self.ttl_seconds)
+                    )
+                self._conn.execute(
+                    "DELETE FROM query_embeddings WHERE model = ? AND query NOT IN ("
+                    "SELECT query FROM query_embeddings WHERE model = ? ORDER BY created DESC LIMIT ?)",
+                    (self.model_name, self.model_name, self.max_entries)
+                )
+            self._conn.commit()
+
+
+class CachedQueryEmbeddings(Embeddings):
+    """Embeddings wrapper that caches query vectors by normalized query text.
+
+    Query embeddings are kept in a bounded in-memory LRU with a TTL and, when a
+    disk path is configured, in a SQLite tier that survives restarts. Document
+    embedding (index builds) passes straight through to the wrapped model.
+    """
+
+    def __init__(self, embeddings: Embeddings, max_size: int = 2048, ttl_seconds: float = 3600,
+                 disk_path: str = None, model_name: str = "", disk_max_entries: int = 100000):
+        """Initialize cached embeddings.
+
+        Args:
+            embeddings: Underlying embedding model
+            max_size: Maximum number of query vectors held in memory
+            ttl_seconds: Seconds an entry stays valid in memory and on disk (0 disables expiry)
+            disk_path: SQLite file for the persistent tier (None or empty disables it)
+            model_name: Model name stored with disk entries so a model change misses
+            disk_max_entries: Maximum number of entries kept in the disk tier
+        """
+        self.embeddings = embeddings
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = _DiskTier(disk_path, model_name, disk_max_entries, ttl_seconds) if disk_path else None
+
+    def _get_memory(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            vector, stored_at = entry
+            if self.ttl_seconds and time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return vector
+
+    def _put_memory(self, key: str, vector: list):
+        with self._lock:
+            self._entries[key] = (vector, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def _count(self, counter: str, result: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+        record_cache("query_embedding", result)
+
+    def embed_query(self, text: str) -> list:
+        """Embed a query, skipping the model forward pass on a cache hit."""
+        # Normalized text is only the cache key; a miss embeds the caller's text
+        key = normalize_query(text)
+        vector = self._get_memory(key)
+        if vector is not None:
+            self._count('hits', "hit")
+            return vector
+
+        if self._disk is not None:
+            vector = self._disk.get(key)
+            if vector is not None:
+                self._count('disk_hits', "disk_hit")
+                self._put_memory(key, vector)
+                return vector
+
+        self._count('misses', "miss")
+        vector = self.embeddings.embed_query(text)
+        self._put_memory(key, vector)
+        if self._disk is not None:
+            try:
+                self._disk.put(key, vector)
+            except sqlite3.Error as e:
+                logger.error(f"Error writing query embedding cache: {str(e)}")
+        return vector
+
+    def embed_documents(self, texts: list) -> list:
+        return self.embeddings.embed_documents(texts)
+
+    def clear(self):
+        """Drop all in-memory entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Return cache counters."""
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+            }
@@ -0,0 +1,335 @@
+import logging
+import os
+import threading
+import time
+import numpy as np
+import pandas as pd
+from app.core.config import settings
+from app.utils.data_store import data_store
+
+logger = logging.getLogger(__name__)
+
+ROLLING_WINDOWS = (7, 14, 30)
+LAGS = (1, 7, 14)
+
+ENGINEERED_FEATURES = (
+    [f'{stat}_{window}d' for window in ROLLING_WINDOWS
+     for stat in ('sales_mean', 'sales_std', 'sales_sum', 'sales_max', 'sales_min', 'revenue_sum')]
+    + [f'sales_lag_{lag}' for lag in LAGS]
+    + ['sales_velocity', 'sales_trend', 'sales_acceleration', 'sales_cv', 'sales_range_30d',
+       'zero_sales_streak', 'days_since_sale', 'product_price', 'product_popularity', 'category_encoded']
+)
+
+# Per-product summary used to detect which products gained or changed sales rows
+_FINGERPRINT_COLUMNS = ('rows', 'last_date', 'sales_total', 'revenue_total')
+
+
+def _sales_fingerprint(sales_df: pd.DataFrame) -> pd.DataFrame:
+    grouped = sales_df.groupby('product_id', sort=False)
+    return pd.DataFrame({
+        'rows': grouped.size(),
+        'last_date': grouped['date'].max().astype('int64'),
+        'sales_total': grouped['daily_sales'].sum().astype('float64'),
+        'revenue_total': grouped['daily_revenue'].sum().astype('float64'),
+    })
+
+
+def compute_features(sales_df: pd.DataFrame, catalog_df: pd.DataFrame) -> pd.DataFrame:
+    """Engineer the demand-forecast features for every product in one group-wise pass.
+
+    Mirrors the per-product feature engineering used at training time: rolling
+    windows and lags are taken over the last N rows of each product's history.
+
+    Args:
+        sales_df: Sales history sorted by product_id and date
+        catalog_df: Product catalog with product_id, price and order_count
+
+    Returns:
+        DataFrame indexed by product_id with ENGINEERED_FEATURES and history_length
+    """
+    sales = sales_df[['product_id', 'date', 'daily_sales', 'daily_revenue']]
+    grouped = sales.groupby('product_id', sort=False)
+    rank_from_end = grouped.cumcount(ascending=False).to_numpy()
+
+    features = pd.DataFrame(index=pd.Index(grouped.size().index, name='product_id'))
+    features['history_length'] = grouped.size()
+
+    # Rolling statistics over the trailing rows
+    for window in ROLLING_WINDOWS:
+        tail = sales[rank_from_end < window].groupby('product_id', sort=False)
+        stats = tail['daily_sales'].agg(['mean', 'std', 'sum', 'max', 'min'])
+        features[f'sales_mean_{window}d'] = stats['mean']
+        features[f'sales_std_{window}d'] = stats['std']
+        features[f'sales_sum_{window}d'] = stats['sum']
+        features[f'sales_max_{window}d'] = stats['max']
+        features[f'sales_min_{window}d'] = stats['min']
+        features[f'revenue_sum_{window}d'] = tail['daily_revenue'].sum()
+
+    # Lag features
+    for lag in LAGS:
+        lagged = sales[rank_from_end == lag - 1].set_index('product_id')['daily_sales']
+        features[f'sales_lag_{lag}'] = lagged
+
+    # Trend features
+    features['sales_velocity'] = features['sales_mean_7d'] / (features['sales_mean_30d'] + 0.1)
+    features['sales_trend'] = features['sales_mean_7d'] - features['sales_mean_14d']
+    features['sales_acceleration'] = 0  # Simplified
+
+    # Variability
+    features['sales_cv'] = features['sales_std_30d'] / (features['sales_mean_30d'] + 0.1)
+    features['sales_range_30d'] = features['sales_max_30d'] - features['sales_min_30d']
+
+    # Zero sales streak: trailing zero days within the last 7 rows
+    last_7 = sales[rank_from_end < 7].assign(rank=rank_from_end[rank_from_end < 7])
+    first_nonzero = last_7[last_7['daily_sales'] != 0].groupby('product_id', sort=False)['rank'].min()
+    features['zero_sales_streak'] = first_nonzero.reindex(features.index).fillna(
+        last_7.groupby('product_id', sort=False).size())
+
+    # Days since last sale
+    latest_date = grouped['date'].max()
+    last_sale_date = sales[sales['daily_sales'] > 0].groupby('product_id', sort=False)['date'].max()
+    days_since_sale = (latest_date - last_sale_date.reindex(features.index)).dt.days
+    features['days_since_sale'] = days_since_sale.fillna(30)
+
+    # Product features
+    catalog = catalog_df.drop_duplicates('product_id').set_index('product_id')
+    features['product_price'] = catalog['price'].reindex(features.index)
+    features['product_popularity'] = catalog['order_count'].reindex(features.index)
+    features['category_encoded'] = 0  # Simplified
+
+    return features[['history_length'] + ENGINEERED_FEATURES].fillna(0)
+
+
+class FeatureSnapshot:
+    """One immutable version of the per-product feature matrix.
+
+    A refresh builds a new snapshot and publishes it with a single reference
+    assignment, so a request that holds a snapshot keeps reading consistent
+    ids, rows and history lengths even while the store is being refreshed.
+    """
+
+    def __init__(self, product_ids: np.ndarray, matrix: np.ndarray, history_length: np.ndarray,
+                 fingerprint: pd.DataFrame, data_version: tuple = None):
+        """Initialize feature snapshot.
+
+        Args:
+            product_ids: Product id of every matrix row
+            matrix: Float matrix of ENGINEERED_FEATURES, one row per product
+            history_length: Number of sales rows per product
+            fingerprint: Per-product sales fingerprint the features were computed from
+            data_version: Data version of the sales and catalog the features came from
+        """
+        self.product_ids = product_ids
+        self.matrix = matrix
+        self.history_length = history_length
+        self.fingerprint = fingerprint
+        self.data_version = data_version
+        self.row_index = {product_id: i for i, product_id in enumerate(product_ids)}
+        for array in (self.product_ids, self.matrix, self.history_length):
+            array.flags.writeable = False
+
+    @classmethod
+    def empty(cls) -> 'FeatureSnapshot':
+        return cls(np.array([], dtype=object), np.empty((0, len(ENGINEERED_FEATURES)), dtype=np.float64),
+                   np.array([], dtype=np.int64), pd.DataFrame(columns=list(_FINGERPRINT_COLUMNS)))
+
+    @classmethod
+    def from_frame(cls, features: pd.DataFrame, fingerprint: pd.DataFrame,
+                   data_version: tuple = None) -> 'FeatureSnapshot':
+        return cls(
+            features.index.to_numpy(dtype=object),
+            features[ENGINEERED_FEATURES].to_numpy(dtype=np.float64),
+            features['history_length'].to_numpy(dtype=np.int64),
+            fingerprint.reindex(features.index),
+            data_version,
+        )
+
+    def as_frame(self) -> pd.DataFrame:
+        features = pd.DataFrame(self.matrix.copy(), index=pd.Index(self.product_ids, name='product_id'),
+                                columns=ENGINEERED_FEATURES)
+        features.insert(0, 'history_length', self.history_length)
+        return features
+
+    def get_features(self, product_id):
+        """Return the engineered features for a product.
+
+        Args:
+            product_id: Product identifier
+
+        Returns:
+            Tuple of (features dict, history length) or (None, 0) if the product has no sales
+        """
+        row = self.row_index.get(product_id)
+        if row is None:
+            return None, 0
+        return dict(zip(ENGINEERED_FEATURES, self.matrix[row].tolist())), int(self.history_length[row])
+
+    def get_vectors(self, product_ids: list, feature_names: list) -> np.ndarray:
+        """Return model-ready feature rows for several products.
+
+        Args:
+            product_ids: Products to look up (all must be present in the snapshot)
+            feature_names: Model feature order; names not engineered here are 0
+
+        Returns:
+            Array of shape (len(product_ids), len(feature_names))
+        """
+        rows = [self.row_index[product_id] for product_id in product_ids]
+        vectors = np.zeros((len(rows), len(feature_names)), dtype=np.float64)
+        for j, name in enumerate(feature_names):
+            column = _COLUMN_INDEX.get(name)
+            if column is not None:
+                vectors[:, j] = self.matrix[rows, column]
+        return vectors
+
+
+_COLUMN_INDEX = {name: i for i, name in enumerate(ENGINEERED_FEATURES)}
+
+
+class FeatureStore:
+    """Precomputed per-product feature vectors for online demand-forecast inference.
+
+    Features for all products are computed in one vectorized pass and kept as a
+    float matrix keyed by product_id. When the sales history changes, only
+    products whose rows changed are recomputed.
+    """
+
+    def __init__(self, store=None, persist_path: str = None):
+        """Initialize feature store.
+
+        Args:
+            store: DataStore providing catalog and sales data
+            persist_path: .npz path to persist features to (defaults to settings, empty disables)
+        """
+        self.store = store or data_store
+        self.persist_path = settings.feature_store_path if persist_path is None else persist_path
+        self._snapshot = FeatureSnapshot.empty()
+        self._lock = threading.Lock()
+        self._loaded_from_disk = False
+
+    def _load(self):
+        """Load persisted features, if present and written for the same feature layout."""
+        self._loaded_from_disk = True
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return
+        try:
+            with np.load(self.persist_path, allow_pickle=False) as stored:
+                if list(stored['columns']) != ENGINEERED_FEATURES:
+                    logger.info("Persisted feature store has a different layout, rebuilding")
+                    return
+                index = pd.Index(stored['product_ids'].astype(object), name='product_id')
+                features = pd.DataFrame(stored['matrix'], index=index, columns=ENGINEERED_FEATURES)
+                features.insert(0, 'history_length', stored['history_length'])
+                fingerprint = pd.DataFrame({column: stored[f'fingerprint_{column}'] for column in _FINGERPRINT_COLUMNS},
+                                           index=index)
+            # No data version: the persisted rows are a starting point for the incremental refresh
+            self._snapshot = FeatureSnapshot.from_frame(features, fingerprint)
+            logger.info(f"Loaded {len(self._snapshot.product_ids)} product feature vectors from {self.persist_path}")
+        except Exception as e:
+            logger.error(f"Error loading feature store from {self.persist_path}: {str(e)}")
+
+    def _persist(self, snapshot: FeatureSnapshot):
+        if not self.persist_path:
+            return
+        try:
+            tmp_path = f"{self.persist_path}.tmp.npz"
+            np.savez(
+                tmp_path,
+                product_ids=snapshot.product_ids.astype(str),
+                matrix=snapshot.matrix,
+                history_length=snapshot.history_length,
+                columns=np.array(ENGINEERED_FEATURES),
+                **{f'fingerprint_{column}': snapshot.fingerprint[column].to_numpy() for column in _FINGERPRINT_COLUMNS},
+            )
+            os.replace(tmp_path, self.persist_path)
+        except Exception as e:
+            logger.error(f"Error persisting feature store to {self.persist_path}: {str(e)}")
+
+    def refresh(self) -> dict:
+        """Bring features up to date with the current sales history and catalog.
+
+        Only products whose sales rows changed (or that are new) are recomputed;
+        a catalog change refreshes the product columns for every product.
+
+        Returns:
+            Dict with counts of recomputed and removed products
+        """
+        product_data = self.store.get_product_data()
+        version = product_data.version
+        if version == self._snapshot.data_version:
+            return {'recomputed': 0, 'removed': 0}
+
+        with self._lock:
+            if version == self._snapshot.data_version:
+                return {'recomputed': 0, 'removed': 0}
+            if not self._loaded_from_disk:
+                self._load()
+
+            started = time.perf_counter()
+            current = self._snapshot
+            sales_df = product_data.sales_df
+            catalog_df = product_data.catalog_df
+            fingerprint = _sales_fingerprint(sales_df)
+
+            previous = current.fingerprint.reindex(fingerprint.index)
+            changed = (previous[list(_FINGERPRINT_COLUMNS)] != fingerprint[list(_FINGERPRINT_COLUMNS)]).any(axis=1)
+            changed_ids = fingerprint.index[changed.to_numpy()]
+            removed = len(set(current.row_index) - set(fingerprint.index))
+
+            if len(changed_ids) == len(fingerprint):
+                features = compute_features(sales_df, catalog_df)
+            else:
+                features = current.as_frame().reindex(fingerprint.index)
+                if len(changed_ids):
+                    subset = sales_df[sales_df['product_id'].isin(changed_ids)]
+                    features.loc[changed_ids] = compute_features(subset, catalog_df)
+                # Catalog attributes may have changed even when sales did not
+                catalog = catalog_df.drop_duplicates('product_id').set_index('product_id')
+                features['product_price'] = catalog['price'].reindex(features.index).fillna(0)
+                features['product_popularity'] = catalog['order_count'].reindex(features.index).fillna(0)
+
+            snapshot = FeatureSnapshot.from_frame(features, fingerprint, version)
+            self._snapshot = snapshot
+            if len(changed_ids) or removed:
+                self._persist(snapshot)
+            logger.info(f"Feature store refreshed: {len(changed_ids)} recomputed, {removed} removed "
+                        f"in {time.perf_counter() - started:.3f}s")
+            return {'recomputed': int(len(changed_ids)), 'removed': int(removed)}
+
+    def snapshot(self) -> FeatureSnapshot:
+        """Refresh if the data changed and return the current feature snapshot.
+
+        Callers that look up several products should take one snapshot and read
+        every product from it, so all lookups see the same data version.
+
+        Returns:
+            The current FeatureSnapshot
+        """
+        self.refresh()
+        return self._snapshot
+
+    def get_features(self, product_id):
+        """Return the engineered features for a product from the current snapshot.
+
+        Args:
+            product_id: Product identifier
+
+        Returns:
+            Tuple of (features dict, history length) or (None, 0) if the product has no sales
+        """
+        return self.snapshot().get_features(product_id)
+
+    def get_vectors(self, product_ids: list, feature_names: list) -> np.ndarray:
+        """Return model-ready feature rows for several products from the current snapshot.
+
+        Args:
+            product_ids: Products to look up (all must be present in the store)
+            feature_names: Model feature order; names not engineered here are 0
+
+        Returns:
+            Array of shape (len(product_ids), len(feature_names))
+        """
+        return self.snapshot().get_vectors(product_ids, feature_names)
+
+
+feature_store = FeatureStore()
@@ -1,47 +1,126 @@
+import asyncio
 import logging
-from app.utils.jinja_prompt import render_chat_prompt
+from app.utils.jinja_prompt import render_chat_prompt, render_system_prompt
 from app.utils.llm_call import LLMTrigger
 from app.utils.tool_constructor import LLMToolConstructor
+from app.utils.history_compactor import history_compactor, count_tokens
+from app.core.metrics import span, PROMPT_TOKENS
 
 logger = logging.getLogger(__name__)
 
 
-def format_conversation_history(history: list) -> str:
-    """Format conversation history into a readable string format.
+def build_prompt(user_query: str, conversation_history: list, session_id: str = None, history_offset: int = 0):
+    """Render the chat prompt with history compacted to the configured token budget.
     
     Args:
-        history: List of dicts with 'role' and 'content' keys
+        user_query: User's input query
+        conversation_history: List of dicts with 'role' and 'content' keys
+        session_id: Session the history belongs to (keys its rolling summary)
+        history_offset: Session messages trimmed before conversation_history[0]
         
     Returns:
-        Formatted conversation history as string
+        Tuple of (formatted history, user prompt, token count including the system prompt)
     """
-    return '\n'.join([f"{item['role']}: {item['content']}" for item in history])
+    with span("history_compaction"):
+        compacted = history_compactor.compact(conversation_history, session_id, history_offset)
+    with span("render_prompt"):
+        prompt = render_chat_prompt(user_query, compacted.text)
+    prompt_tokens = count_tokens(render_system_prompt()) + count_tokens(prompt)
+    PROMPT_TOKENS.observe(prompt_tokens)
+    logger.info(f"Built prompt: {prompt_tokens} tokens ({compacted.tokens} history tokens, "
+                f"{compacted.verbatim_messages}/{len(conversation_history)} messages verbatim)")
+    return compacted.text, prompt, prompt_tokens
 
 
-def run_bot(provider: str, tools, user_query: str, user_type: str, conversation_history: list) -> str:
+def run_bot(provider: str, tools, user_query: str, user_type: str, conversation_history: list, session_id: str = None, history_offset: int = 0) -> str:
     """Execute chatbot flow: append query, generate prompt, call LLM, append response.
     
     Args:
-        provider: LLM provider ('groq' or 'openai')
+        provider: LLM provider ('groq', 'openai' or 'local')
         tools: List of tool definitions for the LLM
         user_query: User's input query
         user_type: Type of user (e.g., 'general')
         conversation_history: List maintaining conversation history
+        session_id: Session the history belongs to
+        history_offset: Session messages trimmed before conversation_history[0]
         
     Returns:
         LLM response string
     """
     conversation_history.append({"role": "user", "content": user_query})
     
-    formatted_history = format_conversation_history(conversation_history)
-    prompt = render_chat_prompt(user_query, formatted_history)
-    print("Generated Prompt:\n", prompt)
+    formatted_history, prompt, _ = build_prompt(user_query, conversation_history, session_id, history_offset)
+    logger.debug("Generated prompt:\n%s", prompt)
     tool_constructor = LLMToolConstructor(provider, user_type)
-    tools = tool_constructor.main()
+    with span("tool_definitions"):
+        tools = tool_constructor.main()
     
     llm = LLMTrigger(provider, tools, user_query, user_type, formatted_history, prompt)
     response = llm.main()
     
     conversation_history.append({"role": "assistant", "content": response})
     
-    return response
\ No newline at end of file
+    return response
+
+async def run_bot_async(provider: str, tools, user_query: str, user_type: str, conversation_history: list, session_id: str = None, history_offset: int = 0) -> str:
+    """Async version of run_bot: awaits the LLM round-trips instead of blocking a thread.
+    
+    Args:
+        provider: LLM provider ('groq', 'openai' or 'local')
+        tools: List of tool definitions for the LLM
+        user_query: User's input query
+        user_type: Type of user (e.g., 'general')
+        conversation_history: List maintaining conversation history
+        session_id: Session the history belongs to
+        history_offset: Session messages trimmed before conversation_history[0]
+        
+    Returns:
+        LLM response string
+    """
+    conversation_history.append({"role": "user", "content": user_query})
+    
+    formatted_history, prompt, _ = await asyncio.to_thread(
+        build_prompt, user_query, conversation_history, session_id, history_offset
+    )
+    logger.debug("Generated prompt:\n%s", prompt)
+    tool_constructor = LLMToolConstructor(provider, user_type)
+    with span("tool_definitions"):
+        tools = tool_constructor.main()
+    
+    llm = LLMTrigger(provider, tools, user_query, user_type, formatted_history, prompt)
+    response = await llm.amain()
+    
+    conversation_history.append({"role": "assistant", "content": response})
+    
+    return response
+
+
+async def stream_bot(provider: str, user_query: str, user_type: str, conversation_history: list, session_id: str = None,
+                     history_offset: int = 0):
+    """Streaming version of run_bot_async: yields tool progress and answer token events.
+    
+    Args:
+        provider: LLM provider ('groq', 'openai' or 'local')
+        user_query: User's input query
+        user_type: Type of user (e.g., 'general')
+        conversation_history: List maintaining conversation history
+        session_id: Session the history belongs to
+        history_offset: Session messages trimmed before conversation_history[0]
+        
+    Yields:
+        Event dicts from LLMTrigger.astreamLoop; the last one has type 'done'
+    """
+    conversation_history.append({"role": "user", "content": user_query})
+    
+    formatted_history, prompt, _ = await asyncio.to_thread(
+        build_prompt, user_query, conversation_history, session_id, history_offset
+    )
+    tool_constructor = LLMToolConstructor(provider, user_type)
+    with span("tool_definitions"):
+        tools = tool_constructor.main()
+    
+    llm = LLMTrigger(provider, tools, user_query, user_type, formatted_history, prompt)
+    async for event in llm.astream():
+        if event["type"] == "done":
+            conversation_history.append({"role": "assistant", "content": event["response"]})
+        yield event
@@ -0,0 +1,196 @@
+import logging
+import re
+import threading
+from collections import OrderedDict, namedtuple
+from functools import lru_cache
+from app.core.config import settings
+from app.utils.product_index import product_resolver
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:  # tiktoken is optional; fall back to a character estimate
+    _ENCODING = None
+
+CompactHistory = namedtuple('CompactHistory', ['text', 'tokens', 'summary', 'facts', 'verbatim_messages'])
+
+# Longest snippet of a folded message kept in the rolling summary
+SUMMARY_SNIPPET_CHARS = 160
+# Cached rolling summaries (one per session)
+MAX_CACHED_SUMMARIES = 10000
+
+_QUANTITY_PATTERNS = [
+    re.compile(r'\b(?:quantity|qty)\s*(?:of|is|:|=)?\s*(\d{1,5})\b', re.I),
+    re.compile(r'\b(\d{1,5})\s*(?:units?|pieces?|pcs|items?|nos?|qty)\b', re.I),
+    re.compile(r'\b(?:need|want|buy|order|get|purchase)\s+(\d{1,5})\b', re.I),
+    re.compile(r'^\s*(\d{1,5})\s*$'),
+]
+
+
+def count_tokens(text: str) -> int:
+    """Count prompt tokens with tiktoken when installed, else estimate ~4 characters per token."""
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    return (len(text) + 3) // 4
+
+
+def format_message(message: dict) -> str:
+    return f"{message['role']}: {message['content']}"
+
+
+def _extract_quantity(text: str):
+    for pattern in _QUANTITY_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            return int(match.group(1))
+    return None
+
+
+@lru_cache(maxsize=4096)
+def _digest_message(role: str, content: str) -> tuple:
+    """Summary line and facts for one message; memoized since messages never change."""
+    content = content or ''
+    snippet = ' '.join(content.split())
+    if len(snippet) > SUMMARY_SNIPPET_CHARS:
+        snippet = snippet[:SUMMARY_SNIPPET_CHARS - 3].rstrip() + '...'
+    facts = {}
+    try:
+        mentions = product_resolver.find_mentions(content, limit=1)
+        if mentions:
+            facts['product_name'] = mentions[0].product_name
+    except Exception as e:
+        logger.debug(f"Product mention lookup failed: {str(e)}")
+    if role == 'user':
+        quantity = _extract_quantity(content)
+        if quantity:
+            facts['quantity'] = quantity
+    return f"{role}: {snippet}", tuple(facts.items())
+
+
+class _RollingSummary:
+    __slots__ = ('lines', 'facts', 'folded_until')
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.lines = []
+        self.facts = {}
+        # Session position (offset + index) just past the last folded message
+        self.folded_until = 0
+
+
+class HistoryCompactor:
+    """Fits conversation history into a token budget for the chat prompt.
+
+    The most recent turns are kept verbatim. Older messages are folded into a
+    rolling summary of short snippets plus extracted facts (last mentioned
+    product name and quantity), which the tools need to be called without
+    asking the user again. Summaries are cached per session and extended only
+    with newly folded messages, so they also outlive turns trimmed from the
+    conversation store.
+    """
+
+    def __init__(self, token_budget: int = None, recent_turns: int = None, summary_tokens: int = None):
+        """Initialize history compactor.
+
+        Args:
+            token_budget: Maximum tokens for the formatted history (defaults to settings)
+            recent_turns: Maximum user/assistant turns kept verbatim (defaults to settings)
+            summary_tokens: Part of the budget reserved for the summary (defaults to settings)
+        """
+        self.token_budget = settings.HISTORY_TOKEN_BUDGET if token_budget is None else token_budget
+        self.recent_turns = settings.HISTORY_RECENT_TURNS if recent_turns is None else recent_turns
+        self.summary_tokens = settings.HISTORY_SUMMARY_TOKENS if summary_tokens is None else summary_tokens
+        self._summaries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _split(self, history: list) -> int:
+        """Index of the first message kept verbatim."""
+        budget = self.token_budget - self.summary_tokens
+        used = 0
+        start = len(history)
+        while start > 0 and len(history) - start < self.recent_turns * 2:
+            tokens = count_tokens(format_message(history[start - 1]))
+            # The newest message is always kept, even if it alone exceeds the budget
+            if start < len(history) and used + tokens > budget:
+                break
+            used += tokens
+            start -= 1
+        return start
+
+    def _summary_for(self, session_id):
+        with self._lock:
+            summary = self._summaries.get(session_id)
+            if summary is None:
+                summary = _RollingSummary()
+                self._summaries[session_id] = summary
+                while len(self._summaries) > MAX_CACHED_SUMMARIES:
+                    self._summaries.popitem(last=False)
+            self._summaries.move_to_end(session_id)
+            return summary
+
+    @staticmethod
+    def _fold(summary: _RollingSummary, messages: list, offset: int = 0):
+        """Fold messages not yet in the summary into it.
+
+        Args:
+            summary: Rolling summary of the session
+            messages: Messages to fold, oldest first
+            offset: Session position of messages[0]
+        """
+        start = max(summary.folded_until - offset, 0)
+        for message in messages[start:]:
+            line, facts = _digest_message(message['role'], message['content'])
+            summary.lines.append(line)
+            summary.facts.update(facts)
+        summary.folded_until = max(summary.folded_until, offset + len(messages))
+
+    def _summary_text(self, summary: _RollingSummary) -> str:
+        if not summary.lines and not summary.facts:
+            return ''
+        facts = ', '.join(f"{key}={value}" for key, value in summary.facts.items())
+        header = f"Known facts: {facts}\n" if facts else ''
+        lines = list(summary.lines)
+        text = header + "Earlier conversation (summarized):\n" + '\n'.join(lines)
+        # Drop the oldest snippets until the summary fits its reserve
+        while lines and count_tokens(text) > self.summary_tokens:
+            lines.pop(0)
+            text = header + "Earlier conversation (summarized):\n" + '\n'.join(lines)
+        del summary.lines[:len(summary.lines) - len(lines)]
+        return text if lines else header.rstrip('\n')
+
+    def compact(self, history: list, session_id: str = None, offset: int = 0) -> CompactHistory:
+        """Format history for the prompt within the token budget.
+
+        Args:
+            history: List of dicts with 'role' and 'content' keys, oldest first
+            session_id: Session the history belongs to; keys the cached rolling summary
+            offset: Messages of the session trimmed before history[0] (ConversationStore.get_window)
+
+        Returns:
+            CompactHistory with the formatted text and its token count
+        """
+        split = self._split(history)
+        verbatim = '\n'.join(format_message(message) for message in history[split:])
+        summary_text = ''
+        facts = {}
+        if split > 0 or session_id in self._summaries:
+            summary = self._summary_for(session_id) if session_id is not None else _RollingSummary()
+            with self._lock:
+                if summary.folded_until > offset + split:
+                    # The fold point only moves forward within a session, so the session
+                    # restarted (cleared or expired) and its old summary no longer applies
+                    summary.reset()
+                self._fold(summary, history[:split], offset)
+                summary_text = self._summary_text(summary)
+                facts = dict(summary.facts)
+        text = f"{summary_text}\n\nRecent conversation:\n{verbatim}" if summary_text else verbatim
+        return CompactHistory(text, count_tokens(text), summary_text, facts, len(history) - split)
+
+
+history_compactor = HistoryCompactor()
@@ -1,9 +1,33 @@
-from jinja2 import Environment, FileSystemLoader
+from functools import lru_cache
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache
+from app.core.config import settings
 import os
 
 PROMPT_DIR = os.path.join(os.path.dirname(__file__), '..', 'prompts')
 
+
+@lru_cache(maxsize=1)
+def get_environment() -> Environment:
+    """Shared template environment; templates are compiled once per process."""
+    bytecode_cache = None
+    if settings.PROMPT_BYTECODE_CACHE_DIR:
+        os.makedirs(settings.PROMPT_BYTECODE_CACHE_DIR, exist_ok=True)
+        bytecode_cache = FileSystemBytecodeCache(settings.PROMPT_BYTECODE_CACHE_DIR)
+    # Prompts only change with a deploy, so skip the per-render template mtime check
+    return Environment(loader=FileSystemLoader(PROMPT_DIR), auto_reload=False, bytecode_cache=bytecode_cache)
+
+
+@lru_cache(maxsize=1)
+def render_system_prompt() -> str:
+    """Static instructions sent as the system message.
+
+    The text is identical for every request, so with the (equally stable) tool
+    definitions it forms a prefix that provider-side prompt caching can reuse.
+    """
+    return get_environment().get_template('system_prompt.j2').render()
+
+
 def render_chat_prompt(user_query, formatted_history):
-    env = Environment(loader=FileSystemLoader(PROMPT_DIR))
-    template = env.get_template('chat_prompt.j2')
-    return template.render(user_query=user_query, formatted_history=formatted_history)
\ No newline at end of file
+    """Per-request user message: conversation history followed by the query."""
+    template = get_environment().get_template('chat_prompt.j2')
+    return template.render(user_query=user_query, formatted_history=formatted_history)
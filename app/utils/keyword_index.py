@@ -0,0 +1,212 @@
+import hashlib
+import heapq
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+from langchain_core.documents import Document
+from app.core.config import settings
+from app.utils.retrieval_format import parse_product_document
+from app.utils.retrieval_filters import metadata_matches
+
+logger = logging.getLogger(__name__)
+
+KEYWORD_INDEX_FILE = "keyword_index.json"
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+_STOPWORDS = frozenset(
+    "a an and any are at be by can do does for from get have i in is it me my of on or show "
+    "tell the this to what which with you your".split()
+)
+# Share of the query's keywords a product name or category must account for to take the fast path
+FAST_PATH_COVERAGE = 0.5
+
+
+def content_hash(text: str) -> str:
+    """Hash of a document's text, stored as 'content_hash' metadata by VectorDBGenerator."""
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def tokenize(text: str) -> list:
+    """Lowercase alphanumeric tokens; underscores split, so 'furniture_decor' matches 'furniture decor'."""
+    return [token for token in _TOKEN.findall(str(text).lower()) if token not in _STOPWORDS]
+
+
+class KeywordIndex:
+    """In-memory BM25 index over the product documents of the vector DB.
+
+    Product names and categories are indexed twice so that exact name and
+    category queries outrank incidental mentions in descriptions.
+    """
+
+    def __init__(self, entries: list, k1: float = 1.2, b: float = 0.75):
+        """Initialize keyword index.
+
+        Args:
+            entries: Dicts with 'id', 'text' and 'metadata' of each product document
+            k1: BM25 term frequency saturation
+            b: BM25 document length normalization
+        """
+        self.entries = entries
+        self.k1 = k1
+        self.b = b
+        self._fields = []
+        self._lengths = []
+        self._postings = {}
+        for position, entry in enumerate(entries):
+            fields = parse_product_document(self.document(position))
+            name_tokens = tokenize(fields.get('name', ''))
+            category_tokens = tokenize(fields.get('category', ''))
+            self._fields.append((frozenset(name_tokens), frozenset(category_tokens)))
+            tokens = tokenize(entry['text']) + name_tokens + category_tokens
+            self._lengths.append(len(tokens))
+            for token, count in Counter(tokens).items():
+                self._postings.setdefault(token, []).append((position, count))
+        self._average_length = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+
+    @classmethod
+    def from_documents(cls, documents: list) -> "KeywordIndex":
+        """Build the index from (doc_id, Document) pairs."""
+        return cls([{'id': doc_id, 'text': document.page_content, 'metadata': document.metadata}
+                    for doc_id, document in documents])
+
+    @classmethod
+    def load(cls, path: str) -> "KeywordIndex":
+        with open(path) as f:
+            return cls(json.load(f)['entries'])
+
+    def save(self, path: str):
+        """Write the index atomically next to the Chroma files."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'entries': self.entries}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def document(self, position: int) -> Document:
+        entry = self.entries[position]
+        return Document(page_content=entry['text'], metadata=entry['metadata'])
+
+    def search(self, query: str, k: int = 5, filters: dict = None) -> list:
+        """Return up to k (position, BM25 score) pairs, best first.
+
+        Args:
+            query: Search text
+            k: Maximum number of hits
+            filters: Retrieval filters the document metadata must match (see retrieval_filters)
+        """
+        total = len(self.entries)
+        allowed = None
+        if filters:
+            allowed = {position for position, entry in enumerate(self.entries)
+                       if metadata_matches(entry['metadata'], filters)}
+        scores = {}
+        for token in set(tokenize(query)):
+            postings = self._postings.get(token)
+            if not postings:
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for position, count in postings:
+                if allowed is not None and position not in allowed:
+                    continue
+                norm = 1 - self.b + self.b * self._lengths[position] / self._average_length
+                scores[position] = scores.get(position, 0.0) + idf * count * (self.k1 + 1) / (count + self.k1 * norm)
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def is_confident(self, query: str, hits: list) -> bool:
+        """True when the top hit's full product name or category is most of what the query says.
+
+        Such queries ('Premium Bedding Set', 'furniture_decor') are answered
+        from the keyword index alone, without embedding the query.
+        """
+        if not hits:
+            return False
+        query_tokens = set(tokenize(query))
+        if not query_tokens:
+            return False
+        for field_tokens in self._fields[hits[0][0]]:
+            if field_tokens and field_tokens <= query_tokens and len(field_tokens) >= FAST_PATH_COVERAGE * len(query_tokens):
+                return True
+        return False
+
+
+class KeywordIndexHandle:
+    """Loads the keyword index written by VectorDBGenerator and reloads it when the file changes."""
+
+    def __init__(self, persist_directory: str = None, check_interval: float = None):
+        """Initialize keyword index handle.
+
+        Args:
+            persist_directory: Vector DB directory holding the index file (defaults to settings)
+            check_interval: Seconds between checks of the index file (defaults to settings)
+        """
+        self.persist_directory = persist_directory or settings.vectorDBPath
+        self.check_interval = settings.DATA_RELOAD_CHECK_SECONDS if check_interval is None else check_interval
+        self._index = None
+        self._signature = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.persist_directory, KEYWORD_INDEX_FILE)
+
+    def get(self):
+        """Return the KeywordIndex, or None if the vector DB was built without one."""
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return self._index
+
+        with self._lock:
+            self._last_check = now
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                self._index, self._signature = None, None
+                return None
+            signature = (stat.st_mtime_ns, stat.st_size)
+            if signature != self._signature:
+                started = time.perf_counter()
+                self._index = KeywordIndex.load(self.path)
+                self._signature = signature
+                logger.info(f"Loaded keyword index of {len(self._index)} docs in {time.perf_counter() - started:.3f}s")
+            return self._index
+
+
+def _fusion_key(document: Document) -> str:
+    # Keyword and vector hits of one product share their text, whatever ids or metadata the stores have
+    return (document.metadata or {}).get('content_hash') or content_hash(document.page_content)
+
+
+def reciprocal_rank_fusion(result_lists: list, k: int = 60) -> list:
+    """Merge ranked (Document, score) lists by reciprocal rank fusion.
+
+    Each document scores sum(1 / (k + rank)) over the lists it appears in, so
+    documents ranked well by both keyword and vector search come first. Raw
+    scores are ignored since BM25 scores and vector distances are not comparable.
+    Documents are matched across lists by their text; within one list only the
+    best rank of a document counts.
+
+    Returns:
+        (Document, fused score) pairs, best first
+    """
+    fused = {}
+    for results in result_lists:
+        seen = set()
+        for rank, (document, _) in enumerate(results, start=1):
+            key = _fusion_key(document)
+            if key in seen:
+                continue
+            seen.add(key)
+            entry = fused.setdefault(key, [document, 0.0])
+            entry[1] += 1.0 / (k + rank)
+    return sorted((tuple(entry) for entry in fused.values()), key=lambda pair: pair[1], reverse=True)
+
+
+keyword_index = KeywordIndexHandle()
@@ -0,0 +1,49 @@
+import logging
+import threading
+import time
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+
+class LazyEmbeddings(Embeddings):
+    """Embeddings proxy that builds the underlying model on first use.
+
+    Keeps torch and sentence-transformers out of import time so API workers,
+    tests and CLIs only pay for the model when it is needed (or at warmup).
+    """
+
+    def __init__(self, factory):
+        """Initialize lazy embeddings.
+
+        Args:
+            factory: Zero-argument callable returning the embedding model
+        """
+        self.factory = factory
+        self._model = None
+        self._lock = threading.Lock()
+
+    def load(self) -> Embeddings:
+        """Build the model if needed and return it."""
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    started = time.perf_counter()
+                    self._model = self.factory()
+                    logger.info(f"Loaded embedding model in {time.perf_counter() - started:.3f}s")
+        return self._model
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    @property
+    def client(self):
+        """Underlying SentenceTransformer, used for multi-process index builds."""
+        return getattr(self.load(), 'client', None)
+
+    def embed_query(self, text: str) -> list:
+        return self.load().embed_query(text)
+
+    def embed_documents(self, texts: list) -> list:
+        return self.load().embed_documents(texts)
@@ -1,17 +1,19 @@
-import json
-import os
-import inspect
+import asyncio
+import time
+from types import SimpleNamespace
 from dotenv import load_dotenv
 from app.core.config import settings
-import app.utils.custom_functions as functions
-from app.utils.tool_execution import ExecuteTool
-
-import httpx
-from groq import Groq
-from openai import OpenAI
+from app.utils.tool_execution import ParallelToolExecutor
+from app.utils.tool_registry import tool_registry
+from app.utils.jinja_prompt import render_system_prompt
+from app.utils.llm_clients import llm_clients
+from app.core.metrics import span, record_stage, LLM_ROUNDS, record_llm_usage
 
 load_dotenv()
 
+TOOL_RETRY_MESSAGE = "I attempted to call a function but encountered a formatting issue. Let me try a different approach without using the tool."
+
+
 class LLMTrigger:
     def __init__(self, provider, tools, userQuery, userType, conversationHistory, prompt):
         self.provider = provider
@@ -21,184 +23,305 @@ class LLMTrigger:
         self.userType = userType
         self.messages = None
         self.conversationHistory = conversationHistory
-        # Use httpx client with verify=False for Groq (corporate proxy/SSL inspection)
-        http_client = httpx.Client(verify=False)
-        self.groqClient = Groq(api_key=os.getenv("groq_api_key"), http_client=http_client)
-        self.openaiClient = OpenAI(api_key=os.getenv("openai_api_key"))
         self.prompt = prompt
         self.configData = settings  # Use settings from app.core.config
-    
-    def functionCollector(self, module):
-        import ast
-        func_dict = {}
-        for name, obj in inspect.getmembers(module, inspect.isfunction):
-            source = inspect.getsource(obj)
-            try:
-                tree = ast.parse(source)
-                scope_value = None
-                for node in ast.walk(tree):
-                    if isinstance(node, ast.Assign):
-                        for target in node.targets:
-                            if isinstance(target, ast.Name) and target.id == "scope":
-                                if isinstance(node.value, ast.Str):
-                                    scope_value = node.value.s
-                                elif isinstance(node.value, ast.Constant):
-                                    scope_value = node.value.value
-                if scope_value == self.userType:
-                    func_dict[name] = obj
-            except Exception:
-                continue
-        return func_dict
-    
+
+    @property
+    def groqClient(self):
+        return llm_clients.get_sync("groq")
+
+    @property
+    def openaiClient(self):
+        return llm_clients.get_sync("openai")
+
     def messageConstructor(self, prompt):
+        # Static system prompt first so every request shares the same cacheable prefix
         self.messages = [
-                    {"role": "system", "content": "You are an supportive e commerce assitant, who helps customers find products and answer questions related to the products. Use the information provided in the conversation history and product catalog to assist the user effectively."},
+                    {"role": "system", "content": render_system_prompt()},
                     {
                         "role": "user",
                         "content": prompt,
                     },
                 ]
         return self.messages
-    
-    def openaicall(self):
-        """Call OpenAI API with tool support and error handling."""
+
+    def completionArgs(self, messages):
+        """Build chat completion arguments for the configured provider."""
+        if self.provider == "groq":
+            return dict(
+                model=self.configData.GROQ_MODEL_NAME,
+                messages=messages,
+                tools=self.tools,
+                tool_choice=getattr(self.configData, 'TOOL_CHOICE', None),
+                max_tokens=getattr(self.configData, 'MAX_TOKENS', 1024),
+                temperature=getattr(self.configData, 'TEMPERATURE', 0.7)
+            )
+        return dict(
+            model=self.configData.OPENAI_MODEL_NAME,
+            messages=messages,
+            tools=self.tools if self.tools else None,
+            tool_choice="auto" if self.tools else None,
+            # max_tokens=getattr(self.configData, 'MAX_TOKENS', 1024)
+        )
+
+    def streamArgs(self, messages):
+        """Completion arguments for a streamed call; OpenAI reports token usage in a final chunk."""
+        args = self.completionArgs(messages)
+        if self.provider == "openai":
+            args["stream_options"] = {"include_usage": True}
+        return args
+
+    def isRetryableToolError(self, api_error):
+        """Whether the provider rejected a malformed tool call that is worth retrying without it."""
+        if self.provider == "groq":
+            return "Failed to call a function" in str(api_error)
+        return "tool" in str(api_error).lower()
+
+    def isFinalMessage(self, response_message):
+        """Whether a message without tool calls is the final answer."""
+        # Groq sometimes emits raw <function> markup instead of a tool call; ask again
+        if self.provider == "groq":
+            return '</function>' not in (response_message.content or '')
+        return True
+
+    @staticmethod
+    def appendToolCallMessage(messages, tool_calls):
+        messages.append(
+            {
+                "role": "assistant",
+                "tool_calls": [
+                    {
+                        "id": tool_call.id,
+                        "function": {
+                            "name": tool_call.function.name,
+                            "arguments": tool_call.function.arguments,
+                        },
+                        "type": tool_call.type,
+                    }
+                    for tool_call in tool_calls
+                ],
+            }
+        )
+
+    @staticmethod
+    def appendToolResultMessage(messages, tool_call, function_response):
+        messages.append(
+            {
+                "tool_call_id": tool_call.id,
+                "role": "tool",
+                "name": tool_call.function.name,
+                "content": function_response,
+            }
+        )
+
+    def toolLoop(self, client):
+        """Run the tool-calling conversation loop on a sync client."""
         final_response = None
         messages = self.messageConstructor(self.prompt)
         retry_count = 0
         max_retries = 2
-        
+
         try:
             while self.tool_call_identified:
                 try:
-                    response = self.openaiClient.chat.completions.create(
-                        model=self.configData.OPENAI_MODEL_NAME,
-                        messages=messages,
-                        tools=self.tools if self.tools else None,
-                        tool_choice="auto" if self.tools else None,
-                        # max_tokens=getattr(self.configData, 'MAX_TOKENS', 1024)
-                    )
+                    LLM_ROUNDS.labels(provider=self.provider).inc()
+                    with span("llm_round"):
+                        response = client.chat.completions.create(**self.completionArgs(messages))
+                    record_llm_usage(self.provider, getattr(response, "usage", None))
                 except Exception as api_error:
-                    if "tool" in str(api_error).lower() and retry_count < max_retries:
+                    if self.isRetryableToolError(api_error) and retry_count < max_retries:
                         retry_count += 1
-                        messages.append({
-                            "role": "assistant",
-                            "content": "I attempted to call a function but encountered a formatting issue. Let me try a different approach without using the tool."
-                        })
+                        messages.append({"role": "assistant", "content": TOOL_RETRY_MESSAGE})
                         continue
                     raise api_error
-                
+
                 response_message = response.choices[0].message
                 tool_calls = response_message.tool_calls
-                
+
                 if tool_calls:
-                    available_functions = self.functionCollector(functions)
-                    messages.append(
-                        {
-                            "role": "assistant",
-                            "tool_calls": [
-                                {
-                                    "id": tool_call.id,
-                                    "function": {
-                                        "name": tool_call.function.name,
-                                        "arguments": tool_call.function.arguments,
-                                    },
-                                    "type": tool_call.type,
-                                }
-                                for tool_call in tool_calls
-                            ],
-                        }
-                    )
-                    for tool_call in tool_calls:
-                        function_name = tool_call.function.name
-                        function_args = json.loads(tool_call.function.arguments)
-                        function_response = ExecuteTool(function_name, function_args, available_functions).mainExecution()
-                        messages.append(
-                            {
-                                "tool_call_id": tool_call.id,
-                                "role": "tool",
-                                "name": function_name,
-                                "content": function_response,
-                            }
-                        )
-                else:
+                    available_functions = tool_registry.functions_for(self.userType)
+                    self.appendToolCallMessage(messages, tool_calls)
+                    function_responses = ParallelToolExecutor(available_functions).runAll(tool_calls)
+                    for tool_call, function_response in zip(tool_calls, function_responses):
+                        self.appendToolResultMessage(messages, tool_call, function_response)
+                elif self.isFinalMessage(response_message):
                     self.tool_call_identified = False
-                    final_response = response.choices[0].message.content
+                    final_response = response_message.content
         except Exception as e:
             final_response = f"Error: {str(e)}"
         return final_response
-    
-    def groqCall(self):
-        """Call Groq API with tool support and error handling."""
+
+    async def atoolLoop(self, client):
+        """Run the tool-calling conversation loop on an async client.
+
+        LLM round-trips are awaited and the (blocking) tools run in worker
+        threads, so the event loop stays free for other chats meanwhile.
+        """
         final_response = None
         messages = self.messageConstructor(self.prompt)
         retry_count = 0
         max_retries = 2
-        
+
         try:
             while self.tool_call_identified:
                 try:
-                    response = self.groqClient.chat.completions.create(
-                        model=self.configData.GROQ_MODEL_NAME,
-                        messages=messages,
-                        tools=self.tools,
-                        tool_choice=getattr(self.configData, 'TOOL_CHOICE', None),
-                        max_tokens=getattr(self.configData, 'MAX_TOKENS', 1024),
-                        temperature=getattr(self.configData, 'TEMPERATURE', 0.7)
-                    )
+                    LLM_ROUNDS.labels(provider=self.provider).inc()
+                    with span("llm_round"):
+                        response = await client.chat.completions.create(**self.completionArgs(messages))
+                    record_llm_usage(self.provider, getattr(response, "usage", None))
                 except Exception as api_error:
-                    if "Failed to call a function" in str(api_error) and retry_count < max_retries:
+                    if self.isRetryableToolError(api_error) and retry_count < max_retries:
                         retry_count += 1
-                        messages.append({
-                            "role": "assistant",
-                            "content": "I attempted to call a function but encountered a formatting issue. Let me try a different approach without using the tool."
-                        })
+                        messages.append({"role": "assistant", "content": TOOL_RETRY_MESSAGE})
                         continue
                     raise api_error
-                
+
                 response_message = response.choices[0].message
                 tool_calls = response_message.tool_calls
+
                 if tool_calls:
-                    available_functions = self.functionCollector(functions)
-                    messages.append(
-                        {
-                            "role": "assistant",
-                            "tool_calls": [
-                                {
-                                    "id": tool_call.id,
-                                    "function": {
-                                        "name": tool_call.function.name,
-                                        "arguments": tool_call.function.arguments,
-                                    },
-                                    "type": tool_call.type,
-                                }
-                                for tool_call in tool_calls
-                            ],
-                        }
-                    )
+                    available_functions = tool_registry.functions_for(self.userType)
+                    self.appendToolCallMessage(messages, tool_calls)
+                    function_responses = await ParallelToolExecutor(available_functions).arunAll(tool_calls)
+                    for tool_call, function_response in zip(tool_calls, function_responses):
+                        self.appendToolResultMessage(messages, tool_call, function_response)
+                elif self.isFinalMessage(response_message):
+                    self.tool_call_identified = False
+                    final_response = response_message.content
+        except Exception as e:
+            final_response = f"Error: {str(e)}"
+        return final_response
+
+    @staticmethod
+    def mergeToolCallDelta(partial_calls, delta_calls):
+        """Accumulate streamed tool call fragments, keyed by their index in the message."""
+        for delta in delta_calls:
+            call = partial_calls.setdefault(delta.index, {"id": None, "type": "function", "name": "", "arguments": ""})
+            if delta.id:
+                call["id"] = delta.id
+            if getattr(delta, "type", None):
+                call["type"] = delta.type
+            if delta.function is not None:
+                call["name"] += delta.function.name or ""
+                call["arguments"] += delta.function.arguments or ""
+
+    async def astreamLoop(self, client):
+        """Run the tool-calling loop with streamed completions, yielding progress events.
+
+        Yields dicts with a 'type' of:
+            tool_call: the model requested a tool (name, arguments)
+            tool_result: the tool finished (name)
+            token: a fragment of the final answer (content)
+            discard: tokens streamed so far were not a final answer and should be dropped
+            done: the loop finished (response holds the full answer or error)
+        """
+        final_response = None
+        messages = self.messageConstructor(self.prompt)
+        retry_count = 0
+        max_retries = 2
+
+        try:
+            while self.tool_call_identified:
+                content_parts = []
+                partial_calls = {}
+                try:
+                    LLM_ROUNDS.labels(provider=self.provider).inc()
+                    # llm_round leaves out the time suspended at a yield, which the SSE consumer spends
+                    started = time.perf_counter()
+                    suspended = 0.0
+                    try:
+                        stream = await client.chat.completions.create(stream=True, **self.streamArgs(messages))
+                        async for chunk in stream:
+                            record_llm_usage(self.provider, getattr(chunk, "usage", None))
+                            if not chunk.choices:
+                                continue
+                            delta = chunk.choices[0].delta
+                            if delta.tool_calls:
+                                self.mergeToolCallDelta(partial_calls, delta.tool_calls)
+                            if delta.content:
+                                content_parts.append(delta.content)
+                                yielded = time.perf_counter()
+                                try:
+                                    yield {"type": "token", "content": delta.content}
+                                finally:
+                                    suspended += time.perf_counter() - yielded
+                    finally:
+                        record_stage("llm_round", time.perf_counter() - started - suspended)
+                except Exception as api_error:
+                    if self.isRetryableToolError(api_error) and retry_count < max_retries:
+                        retry_count += 1
+                        if content_parts:
+                            yield {"type": "discard"}
+                        messages.append({"role": "assistant", "content": TOOL_RETRY_MESSAGE})
+                        continue
+                    raise api_error
+
+                response_message = SimpleNamespace(content="".join(content_parts) or None)
+                if partial_calls:
+                    if content_parts:
+                        yield {"type": "discard"}
+                    tool_calls = [
+                        SimpleNamespace(id=call["id"], type=call["type"],
+                                        function=SimpleNamespace(name=call["name"], arguments=call["arguments"]))
+                        for _, call in sorted(partial_calls.items())
+                    ]
+                    available_functions = tool_registry.functions_for(self.userType)
+                    self.appendToolCallMessage(messages, tool_calls)
                     for tool_call in tool_calls:
-                        function_name = tool_call.function.name
-                        function_args = json.loads(tool_call.function.arguments)
-                        function_response = ExecuteTool(function_name, function_args, available_functions).mainExecution()
-                        messages.append(
-                            {
-                                "tool_call_id": tool_call.id,
-                                "role": "tool",
-                                "name": function_name,
-                                "content": function_response,
-                            }
-                        )
+                        yield {"type": "tool_call", "name": tool_call.function.name, "arguments": tool_call.function.arguments}
+                    function_responses = await ParallelToolExecutor(available_functions).arunAll(tool_calls)
+                    for tool_call, function_response in zip(tool_calls, function_responses):
+                        self.appendToolResultMessage(messages, tool_call, function_response)
+                        yield {"type": "tool_result", "name": tool_call.function.name}
+                elif self.isFinalMessage(response_message):
+                    self.tool_call_identified = False
+                    final_response = response_message.content
                 else:
-                    if '</function>' in response.choices[0].message.content:
-                        pass
-                    else:
-                        self.tool_call_identified = False
-                        final_response = response.choices[0].message.content
+                    yield {"type": "discard"}
         except Exception as e:
             final_response = f"Error: {str(e)}"
-        return final_response
-     
+        yield {"type": "done", "response": final_response}
+
+    def openaicall(self):
+        """Call OpenAI API with tool support and error handling."""
+        return self.toolLoop(self.openaiClient)
+
+    def groqCall(self):
+        """Call Groq API with tool support and error handling."""
+        return self.toolLoop(self.groqClient)
+
+    def localCall(self):
+        """Call the offline local provider with tool support and error handling."""
+        return self.toolLoop(llm_clients.get_sync("local"))
+
+    async def aopenaicall(self):
+        """Call OpenAI API asynchronously with tool support and error handling."""
+        return await self.atoolLoop(llm_clients.get_async("openai"))
+
+    async def agroqCall(self):
+        """Call Groq API asynchronously with tool support and error handling."""
+        return await self.atoolLoop(llm_clients.get_async("groq"))
+
+    async def alocalCall(self):
+        """Call the offline local provider asynchronously with tool support and error handling."""
+        return await self.atoolLoop(llm_clients.get_async("local"))
+
+    def astream(self):
+        """Stream the conversation for the configured provider as progress events."""
+        return self.astreamLoop(llm_clients.get_async(self.provider))
+
     def main(self):
         if self.provider == "groq":
             return self.groqCall()
         elif self.provider == "openai":
-            return self.openaicall()
\ No newline at end of file
+            return self.openaicall()
+        elif self.provider == "local":
+            return self.localCall()
+
+    async def amain(self):
+        if self.provider == "groq":
+            return await self.agroqCall()
+        elif self.provider == "openai":
+            return await self.aopenaicall()
+        elif self.provider == "local":
+            return await self.alocalCall()
@@ -0,0 +1,102 @@
+import logging
+import threading
+import httpx
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401  (httpx needs it for HTTP/2)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class LLMClientPool:
+    """Process-wide LLM provider clients over pooled, keep-alive HTTP connections.
+
+    One sync and one async client per provider, each created on first use, so
+    only the configured provider pays for client setup and TLS handshakes are
+    reused across requests. Pool sizes, timeouts and HTTP/2 come from settings.
+    """
+
+    def __init__(self):
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _http_options(provider: str) -> dict:
+        http2 = settings.LLM_HTTP2 and HTTP2_AVAILABLE
+        if settings.LLM_HTTP2 and not HTTP2_AVAILABLE:
+            logger.info("HTTP/2 requested for LLM clients but the h2 package is not installed, using HTTP/1.1")
+        return dict(
+            http2=http2,
+            # Groq traffic goes through a corporate proxy with SSL inspection
+            verify=provider != "groq",
+            timeout=httpx.Timeout(
+                settings.LLM_READ_TIMEOUT,
+                connect=settings.LLM_CONNECT_TIMEOUT,
+                pool=settings.LLM_POOL_TIMEOUT
+            ),
+            limits=httpx.Limits(
+                max_connections=settings.LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY
+            ),
+        )
+
+    @classmethod
+    def _create(cls, provider: str, is_async: bool):
+        if provider == "local":
+            from app.utils.local_llm import LocalLLMClient
+            logger.info(f"Created {'async' if is_async else 'sync'} local LLM client")
+            return LocalLLMClient(is_async=is_async)
+        options = cls._http_options(provider)
+        if provider == "groq":
+            from groq import Groq, AsyncGroq
+            client_class, api_key, key_name = (AsyncGroq if is_async else Groq), settings.GROQ_API_KEY, "GROQ_API_KEY"
+        elif provider == "openai":
+            from openai import OpenAI, AsyncOpenAI
+            client_class, api_key, key_name = (AsyncOpenAI if is_async else OpenAI), settings.OPENAI_API_KEY, "OPENAI_API_KEY"
+        else:
+            raise ValueError(f"Unknown LLM provider: {provider}")
+        if not api_key:
+            raise ValueError(f"LLM provider '{provider}' is selected but {key_name} is not set")
+        http_client = httpx.AsyncClient(**options) if is_async else httpx.Client(**options)
+        logger.info(f"Created {'async' if is_async else 'sync'} {provider} client (http2={options['http2']})")
+        return client_class(api_key=api_key, http_client=http_client, max_retries=settings.LLM_MAX_RETRIES)
+
+    def _get(self, provider: str, is_async: bool):
+        key = (provider, is_async)
+        client = self._clients.get(key)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(key)
+                if client is None:
+                    client = self._create(provider, is_async)
+                    self._clients[key] = client
+        return client
+
+    def get_sync(self, provider: str):
+        """Shared sync client for a provider ('groq', 'openai' or 'local')."""
+        return self._get(provider, False)
+
+    def get_async(self, provider: str):
+        """Shared async client for a provider ('groq', 'openai' or 'local')."""
+        return self._get(provider, True)
+
+    async def aclose(self):
+        """Close every client and its connection pool (on application shutdown)."""
+        with self._lock:
+            clients, self._clients = self._clients, {}
+        for (provider, is_async), client in clients.items():
+            try:
+                if is_async and provider != "local":
+                    await client.close()
+                else:
+                    client.close()
+            except Exception as e:
+                logger.warning(f"Error closing {provider} client: {str(e)}")
+
+
+llm_clients = LLMClientPool()
@@ -0,0 +1,261 @@
+import asyncio
+import json
+import logging
+import random
+import re
+import time
+from types import SimpleNamespace
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+USER_QUERY_MARKER = "Below is the user query:"
+
+_AVAILABILITY_WORDS = re.compile(r'\b(available|availability|in stock|stock|buy|order|purchase)\b', re.I)
+_QUANTITY = re.compile(r'\b(\d{1,5})\s*(?:units?|pieces?|pcs|items?|nos?)?\b', re.I)
+_STREAM_TOKEN = re.compile(r'\S+\s*|\s+')
+
+
+def _latest_user_query(messages: list) -> str:
+    """The current user query, taken from the rendered chat prompt."""
+    for message in reversed(messages):
+        if message.get('role') == 'user':
+            content = message.get('content') or ''
+            if USER_QUERY_MARKER in content:
+                return content.rsplit(USER_QUERY_MARKER, 1)[1].strip()
+            return content.strip()
+    return ''
+
+
+def _tool_round(messages: list) -> int:
+    """Number of tool-calling rounds already completed in this conversation loop."""
+    return sum(1 for message in messages if message.get('role') == 'assistant' and message.get('tool_calls'))
+
+
+def _tool_results(messages: list) -> list:
+    results = []
+    for message in reversed(messages):
+        if message.get('role') != 'tool':
+            break
+        results.append((message.get('name'), message.get('content') or ''))
+    return list(reversed(results))
+
+
+def _normalize_turn(turn: dict) -> dict:
+    """Accept scripted turns ({'name', 'arguments'}) and recorded OpenAI messages ({'function': {...}})."""
+    tool_calls = []
+    for call in turn.get('tool_calls') or []:
+        function = call.get('function', call)
+        arguments = function.get('arguments', {})
+        if not isinstance(arguments, str):
+            arguments = json.dumps(arguments)
+        tool_calls.append({'name': function['name'], 'arguments': arguments})
+    return {'content': turn.get('content'), 'tool_calls': tool_calls}
+
+
+def load_transcripts(path: str) -> list:
+    """Load scripted or recorded transcripts.
+
+    The file is a JSON list of {"match": regex, "turns": [...]} entries. Each
+    turn is an assistant message: {"content": text} or {"tool_calls": [...]}.
+    Tool calls may be written as {"name", "arguments"} or copied from recorded
+    OpenAI messages as {"function": {"name", "arguments"}}. Final content may
+    reference {query} and {tool_results}.
+    """
+    with open(path) as f:
+        entries = json.load(f)
+    transcripts = []
+    for entry in entries:
+        transcripts.append({
+            'match': re.compile(entry.get('match', '.*'), re.I | re.S),
+            'turns': [_normalize_turn(turn) for turn in entry['turns']],
+        })
+    logger.info(f"Loaded {len(transcripts)} local LLM transcripts from {path}")
+    return transcripts
+
+
+class _SafeFormat(dict):
+    def __missing__(self, key):
+        return '{' + key + '}'
+
+
+class LocalScript:
+    """Decides the assistant turn for a conversation, without any network access.
+
+    Scripted transcripts are matched against the user query first. Otherwise a
+    built-in policy calls check_availability for products named with a
+    quantity, asks for the quantity if it is missing, and falls back to
+    retrieve_document; after tool results it answers from them.
+    """
+
+    def __init__(self, transcripts: list = None):
+        self.transcripts = transcripts or []
+
+    def next_turn(self, messages: list, tools: list) -> dict:
+        query = _latest_user_query(messages)
+        tool_round = _tool_round(messages)
+        for transcript in self.transcripts:
+            if transcript['match'].search(query):
+                turns = transcript['turns']
+                turn = turns[min(tool_round, len(turns) - 1)]
+                if turn['tool_calls'] and tool_round >= len(turns):
+                    break
+                return self._render(turn, query, messages)
+        return self._default_turn(query, tool_round, messages, tools)
+
+    @staticmethod
+    def _render(turn: dict, query: str, messages: list) -> dict:
+        if turn['content'] is None:
+            return turn
+        tool_results = '\n'.join(content for _, content in _tool_results(messages))
+        content = turn['content'].format_map(_SafeFormat(query=query, tool_results=tool_results))
+        return {'content': content, 'tool_calls': []}
+
+    def _default_turn(self, query: str, tool_round: int, messages: list, tools: list) -> dict:
+        tool_names = {tool['function']['name'] for tool in tools or []}
+        if tool_round > 0:
+            return {'content': self._answer_from_results(_tool_results(messages)), 'tool_calls': []}
+
+        products = []
+        try:
+            from app.utils.product_index import product_resolver
+            products = [match.product_name for match in product_resolver.find_mentions(query, limit=3)]
+        except Exception as e:
+            logger.debug(f"Local LLM product lookup failed: {str(e)}")
+
+        if products and _AVAILABILITY_WORDS.search(query) and 'check_availability' in tool_names:
+            quantity = _QUANTITY.search(query)
+            if not quantity:
+                return {'content': f"How many units of {products[0]} would you like?", 'tool_calls': []}
+            calls = [
+                {'name': 'check_availability',
+                 'arguments': json.dumps({'product_name': product, 'quantity': int(quantity.group(1))})}
+                for product in products
+            ]
+            return {'content': None, 'tool_calls': calls}
+
+        if 'retrieve_document' in tool_names and query:
+            return {'content': None, 'tool_calls': [{'name': 'retrieve_document', 'arguments': json.dumps({'query': query})}]}
+        return {'content': "Could you tell me which product you are looking for?", 'tool_calls': []}
+
+    @staticmethod
+    def _answer_from_results(results: list) -> str:
+        lines = []
+        for name, content in results:
+            try:
+                data = json.loads(content)
+            except ValueError:
+                data = None
+            if isinstance(data, dict) and 'availability' in data:
+                lines.append(f"{data['product']['name']} is currently {data['availability']['status']}.")
+            elif isinstance(data, dict) and data.get('status') == 'error':
+                lines.append(f"Sorry, I couldn't complete that: {data.get('message', 'unknown error')}")
+            else:
+                lines.append(f"Here is what I found: {content[:300]}")
+        return ' '.join(lines) or "I couldn't find anything for that."
+
+
+def _message_response(turn: dict, tool_round: int):
+    tool_calls = [
+        SimpleNamespace(id=f"call_{tool_round}_{i}", type="function",
+                        function=SimpleNamespace(name=call['name'], arguments=call['arguments']))
+        for i, call in enumerate(turn['tool_calls'])
+    ] or None
+    message = SimpleNamespace(role="assistant", content=turn['content'], tool_calls=tool_calls)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="tool_calls" if tool_calls else "stop")])
+
+
+def _stream_chunks(turn: dict, tool_round: int) -> list:
+    """Split a turn into streaming chunks: tool calls in two fragments, content word by word."""
+    def chunk(content=None, tool_calls=None):
+        return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content, tool_calls=tool_calls))])
+
+    chunks = []
+    for i, call in enumerate(turn['tool_calls']):
+        half = len(call['arguments']) // 2
+        chunks.append(chunk(tool_calls=[SimpleNamespace(
+            index=i, id=f"call_{tool_round}_{i}", type="function",
+            function=SimpleNamespace(name=call['name'], arguments=call['arguments'][:half]))]))
+        chunks.append(chunk(tool_calls=[SimpleNamespace(
+            index=i, id=None, type=None,
+            function=SimpleNamespace(name=None, arguments=call['arguments'][half:]))]))
+    for token in _STREAM_TOKEN.findall(turn['content'] or ''):
+        chunks.append(chunk(content=token))
+    return chunks
+
+
+class _LocalCompletions:
+    def __init__(self, client):
+        self._client = client
+
+    def create(self, messages, tools=None, stream=False, **kwargs):
+        client = self._client
+        if client.is_async:
+            return client._acreate(messages, tools, stream)
+        turn = client.script.next_turn(messages, tools)
+        tool_round = _tool_round(messages)
+        time.sleep(client.first_token_delay())
+        if not stream:
+            time.sleep(client.token_interval * len(_STREAM_TOKEN.findall(turn['content'] or '')))
+            return _message_response(turn, tool_round)
+        return client._iter_chunks(turn, tool_round)
+
+
+class LocalLLMClient:
+    """Offline, deterministic stand-in for the OpenAI/Groq chat completions client.
+
+    Implements chat.completions.create (sync or async, with or without
+    stream=True) on top of LocalScript, with simulated time to first token
+    and per-token delays, so the /chat pipeline can be load-tested without
+    network access or API quota.
+    """
+
+    def __init__(self, is_async: bool = False, transcripts: list = None, latency: float = None,
+                 token_interval: float = None, jitter: float = None, seed: int = None):
+        """Initialize local LLM client.
+
+        Args:
+            is_async: Return awaitables / async iterators like AsyncOpenAI
+            transcripts: Scripted transcripts (defaults to LOCAL_LLM_SCRIPT_PATH, if set)
+            latency: Seconds before the first token of every completion (defaults to settings)
+            token_interval: Seconds between streamed content tokens (defaults to settings)
+            jitter: Maximum random fraction added to latency, drawn from a seeded RNG (defaults to settings)
+            seed: RNG seed for the jitter (defaults to settings)
+        """
+        if transcripts is None and settings.LOCAL_LLM_SCRIPT_PATH:
+            transcripts = load_transcripts(settings.LOCAL_LLM_SCRIPT_PATH)
+        self.is_async = is_async
+        self.script = LocalScript(transcripts)
+        self.latency = settings.LOCAL_LLM_LATENCY_SECONDS if latency is None else latency
+        self.token_interval = settings.LOCAL_LLM_TOKEN_INTERVAL_SECONDS if token_interval is None else token_interval
+        self.jitter = settings.LOCAL_LLM_JITTER if jitter is None else jitter
+        self._random = random.Random(settings.LOCAL_LLM_SEED if seed is None else seed)
+        self.chat = SimpleNamespace(completions=_LocalCompletions(self))
+
+    def first_token_delay(self) -> float:
+        return self.latency * (1 + self.jitter * self._random.random())
+
+    def _iter_chunks(self, turn: dict, tool_round: int):
+        for i, chunk in enumerate(_stream_chunks(turn, tool_round)):
+            if i and chunk.choices[0].delta.content:
+                time.sleep(self.token_interval)
+            yield chunk
+
+    async def _acreate(self, messages: list, tools: list, stream: bool):
+        # The built-in policy may load the catalog and build the name index; keep that off the event loop
+        turn = await asyncio.to_thread(self.script.next_turn, messages, tools)
+        tool_round = _tool_round(messages)
+        await asyncio.sleep(self.first_token_delay())
+        if not stream:
+            await asyncio.sleep(self.token_interval * len(_STREAM_TOKEN.findall(turn['content'] or '')))
+            return _message_response(turn, tool_round)
+        return self._aiter_chunks(turn, tool_round)
+
+    async def _aiter_chunks(self, turn: dict, tool_round: int):
+        for i, chunk in enumerate(_stream_chunks(turn, tool_round)):
+            if i and chunk.choices[0].delta.content:
+                await asyncio.sleep(self.token_interval)
+            yield chunk
+
+    def close(self):
+        pass
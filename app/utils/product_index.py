@@ -0,0 +1,269 @@
+import logging
+import re
+import threading
+import time
+from collections import namedtuple
+from functools import lru_cache
+import numpy as np
+from app.core.config import settings
+from app.utils.data_store import data_store
+
+logger = logging.getLogger(__name__)
+
+ProductMatch = namedtuple('ProductMatch', ['product_id', 'product_name', 'score', 'position'])
+
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+NGRAM_SIZE = 3
+# Upper bound on names scored in full per query; candidates are pre-ranked by rare n-gram hits
+MAX_CANDIDATES = 24
+# Candidate generation merges the rarest posting lists until this many ids have been read
+MAX_POSTING_SCAN = 8192
+
+
+def _stem(token: str) -> str:
+    """Very small plural stemmer so 'sets' matches 'set' and 'accessories' matches 'accessory'."""
+    if len(token) <= 3:
+        return token
+    if token.endswith('ies'):
+        return token[:-3] + 'y'
+    if token.endswith(('sses', 'shes', 'ches', 'xes', 'zes')):
+        return token[:-2]
+    if token.endswith('s') and not token.endswith('ss'):
+        return token[:-1]
+    return token
+
+
+def normalize_tokens(text: str) -> list:
+    """Lowercase, strip punctuation and stem a product name into tokens."""
+    return [_stem(token) for token in _NON_ALNUM.sub(' ', str(text).lower()).split()]
+
+
+@lru_cache(maxsize=1 << 16)
+def _ngrams(text: str) -> frozenset:
+    padded = f' {text} '
+    return frozenset(padded[i:i + NGRAM_SIZE] for i in range(len(padded) - NGRAM_SIZE + 1))
+
+
+def _dice(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+class ProductNameIndex:
+    """Inverted index over normalized product names for ranked fuzzy lookup.
+
+    Names are normalized into stemmed tokens; both the tokens and the character
+    trigrams of the normalized name are indexed. A query is answered from the
+    exact-name map when possible, otherwise candidates are gathered from the
+    rarest token and trigram postings and scored by trigram Dice similarity,
+    token overlap and substring containment.
+    """
+
+    def __init__(self, product_names: list, product_ids: list):
+        """Build the index.
+
+        Args:
+            product_names: Catalog product names in catalog order
+            product_ids: Product ids aligned with product_names
+        """
+        self.names = []
+        self.normalized = []
+        self.product_ids = []
+        self.positions = []
+        self._exact = {}
+        token_postings = {}
+        gram_postings = {}
+
+        # Duplicate names collapse onto their first catalog row, as the old scan picked iloc[0]
+        for position, (product_name, product_id) in enumerate(zip(product_names, product_ids)):
+            tokens = normalize_tokens(product_name)
+            key = ' '.join(tokens)
+            if not key or key in self._exact:
+                continue
+            name_id = len(self.names)
+            self._exact[key] = name_id
+            self.names.append(product_name)
+            self.normalized.append(key)
+            self.product_ids.append(product_id)
+            self.positions.append(position)
+            for token in set(tokens):
+                token_postings.setdefault(token, []).append(name_id)
+            for gram in _ngrams.__wrapped__(key):
+                gram_postings.setdefault(gram, []).append(name_id)
+
+        self._token_postings = {token: np.asarray(ids, dtype=np.int32) for token, ids in token_postings.items()}
+        self._gram_postings = {gram: np.asarray(ids, dtype=np.int32) for gram, ids in gram_postings.items()}
+
+    def __len__(self):
+        return len(self.names)
+
+    def _candidates(self, tokens: list, grams: set) -> list:
+        """Collect candidate name ids, pre-ranked by how many rare postings they appear in."""
+        postings = [self._token_postings[token] for token in tokens if token in self._token_postings]
+        postings += [self._gram_postings[gram] for gram in grams if gram in self._gram_postings]
+        if not postings:
+            return []
+        postings.sort(key=len)
+        rare, scanned = [], 0
+        for posting in postings:
+            if rare and scanned + len(posting) > MAX_POSTING_SCAN:
+                break
+            rare.append(posting[:MAX_POSTING_SCAN])
+            scanned += len(rare[-1])
+        hits = np.concatenate(rare)
+        name_ids, counts = np.unique(hits, return_counts=True)
+        if len(name_ids) > MAX_CANDIDATES:
+            top = np.argpartition(-counts, MAX_CANDIDATES - 1)[:MAX_CANDIDATES]
+            name_ids, counts = name_ids[top], counts[top]
+        # Lexsort keeps catalog order among equally ranked names
+        order = np.lexsort((name_ids, -counts))
+        return name_ids[order].tolist()
+
+    def _score(self, name_id: int, query_key: str, query_tokens: list, query_grams: set) -> float:
+        key = self.normalized[name_id]
+        dice = _dice(query_grams, _ngrams(key))
+        if query_key in key:
+            return 0.75 + 0.25 * dice
+
+        name_tokens = key.split()
+        token_scores = []
+        for token in query_tokens:
+            if token in name_tokens:
+                token_scores.append(1.0)
+            elif len(token) >= 3 and any(name_token.startswith(token) for name_token in name_tokens):
+                token_scores.append(0.85)
+            else:
+                best = max(_dice(_ngrams(token), _ngrams(name_token)) for name_token in name_tokens)
+                token_scores.append(0.8 * best if best >= 0.5 else 0.0)
+        token_score = sum(token_scores) / len(token_scores) if token_scores else 0.0
+        return 0.5 * token_score + 0.5 * dice
+
+    def exact(self, query: str):
+        """Return the ProductMatch whose normalized name equals the query, or None."""
+        name_id = self._exact.get(' '.join(normalize_tokens(query)))
+        return None if name_id is None else self._match(name_id, 1.0)
+
+    def search(self, query: str, limit: int = 5) -> list:
+        """Rank catalog products against a free-text product name.
+
+        Args:
+            query: Product name as given by the user
+            limit: Maximum number of matches to return
+
+        Returns:
+            List of ProductMatch sorted by descending score (1.0 for an exact name)
+        """
+        query_tokens = normalize_tokens(query)
+        query_key = ' '.join(query_tokens)
+        if not query_key:
+            return []
+
+        exact = self._exact.get(query_key)
+        if exact is not None and limit == 1:
+            return [self._match(exact, 1.0)]
+
+        query_grams = _ngrams(query_key)
+        scored = {}
+        if exact is not None:
+            scored[exact] = 1.0
+        for name_id in self._candidates(query_tokens, query_grams):
+            if name_id not in scored:
+                scored[name_id] = self._score(name_id, query_key, query_tokens, query_grams)
+
+        ranked = sorted(scored.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [self._match(name_id, score) for name_id, score in ranked]
+
+    def find_mentions(self, text: str, limit: int = 3) -> list:
+        """Find catalog names that appear verbatim (after normalization) in free text.
+
+        Args:
+            text: Free text such as a chat message
+            limit: Maximum number of names to return
+
+        Returns:
+            List of ProductMatch, longest names first, with score 1.0
+        """
+        tokens = normalize_tokens(text)
+        if not tokens:
+            return []
+        padded_text = f" {' '.join(tokens)} "
+        postings = [self._token_postings[token] for token in set(tokens) if token in self._token_postings]
+        if not postings:
+            return []
+        name_ids, counts = np.unique(np.concatenate(postings), return_counts=True)
+        if len(name_ids) > MAX_POSTING_SCAN:
+            top = np.argpartition(-counts, MAX_POSTING_SCAN - 1)[:MAX_POSTING_SCAN]
+            name_ids = name_ids[top]
+        mentioned = [name_id for name_id in name_ids.tolist() if f" {self.normalized[name_id]} " in padded_text]
+        mentioned.sort(key=lambda name_id: (-len(self.normalized[name_id]), name_id))
+        return [self._match(name_id, 1.0) for name_id in mentioned[:limit]]
+
+    def _match(self, name_id: int, score: float) -> ProductMatch:
+        return ProductMatch(self.product_ids[name_id], self.names[name_id], round(float(score), 4), self.positions[name_id])
+
+
+class ProductResolver:
+    """Resolves user-supplied product names to catalog rows for every product tool.
+
+    The name index is built lazily from the shared catalog and rebuilt when the
+    catalog file changes.
+    """
+
+    def __init__(self, store=None, min_score: float = None):
+        """Initialize product resolver.
+
+        Args:
+            store: DataStore providing the product catalog
+            min_score: Minimum match score accepted as a resolution (defaults to settings)
+        """
+        self.store = store or data_store
+        self.min_score = settings.PRODUCT_MATCH_MIN_SCORE if min_score is None else min_score
+        self._index = None
+        self._catalog_version = None
+        self._lock = threading.Lock()
+
+    def get_index(self) -> ProductNameIndex:
+        """Return the name index for the current catalog, rebuilding it if needed."""
+        catalog_df, version = self.store.catalog.get_versioned()
+        if self._index is not None and self._catalog_version == version:
+            return self._index
+
+        with self._lock:
+            if self._index is None or self._catalog_version != version:
+                started = time.perf_counter()
+                self._index = ProductNameIndex(catalog_df['product_name'].tolist(), catalog_df['product_id'].tolist())
+                self._catalog_version = version
+                logger.info(f"Built product name index for {len(self._index)} names in {time.perf_counter() - started:.3f}s")
+            return self._index
+
+    def search(self, product_name: str, limit: int = 5) -> list:
+        """Return ranked ProductMatch candidates for a product name."""
+        return self.get_index().search(product_name, limit=limit)
+
+    def find_mentions(self, text: str, limit: int = 3) -> list:
+        """Return catalog products named verbatim in free text."""
+        return self.get_index().find_mentions(text, limit=limit)
+
+    def resolve(self, product_name: str):
+        """Resolve a product name to its best catalog match.
+
+        Args:
+            product_name: Product name as given by the user
+
+        Returns:
+            Tuple of (best ProductMatch or None, ranked candidates)
+        """
+        index = self.get_index()
+        exact = index.exact(product_name)
+        if exact is not None:
+            return exact, [exact]
+
+        # Only a fuzzy name needs the ranked candidates (also used for "did you mean")
+        matches = index.search(product_name, limit=5)
+        if matches and matches[0].score >= self.min_score:
+            return matches[0], matches
+        return None, matches
+
+
+product_resolver = ProductResolver()
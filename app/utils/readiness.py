@@ -0,0 +1,62 @@
+import logging
+import threading
+import time
+from app.utils import embedding
+from app.utils.data_store import data_store
+from app.utils.feature_store import feature_store
+from app.utils.product_index import product_resolver
+from app.utils.vector_store import vector_store
+from app.utils.keyword_index import keyword_index
+from app.utils.llm_clients import llm_clients
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_warmup_errors = {}
+
+
+def warmup():
+    """Load the forecast model, feature store, product index, vector and keyword indexes, embedding model and LLM client.
+
+    Each component is loaded independently so one failure does not keep the
+    others cold; failures are reported by readiness_status().
+    """
+    steps = [
+        ('forecast_model', data_store.get_model_artifacts),
+        ('feature_store', feature_store.refresh),
+        ('product_index', product_resolver.get_index),
+        ('vector_store', vector_store.get),
+        ('keyword_index', keyword_index.get),
+        ('embedding_model', embedding.embeddings.load),
+        ('llm_client', lambda: llm_clients.get_async(settings.LLM_PROVIDER)),
+    ]
+    started = time.perf_counter()
+    for name, step in steps:
+        try:
+            step()
+            _warmup_errors.pop(name, None)
+        except Exception as e:
+            _warmup_errors[name] = str(e)
+            logger.error(f"Warmup of {name} failed: {str(e)}")
+    logger.info(f"Warmup finished in {time.perf_counter() - started:.3f}s")
+
+
+def start_warmup() -> threading.Thread:
+    """Run warmup in a background thread so the server can answer /health meanwhile."""
+    thread = threading.Thread(target=warmup, name="warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def readiness_status() -> dict:
+    """Report whether the components needed to serve traffic are loaded."""
+    components = {
+        'embedding_model': embedding.embeddings.loaded,
+        'vector_store': vector_store.loaded,
+        'forecast_model': data_store.model.loaded,
+    }
+    return {
+        'ready': all(components.values()),
+        'components': components,
+        'errors': dict(_warmup_errors),
+    }
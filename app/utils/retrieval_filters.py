@@ -0,0 +1,105 @@
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+_SEPARATORS = re.compile(r'[^a-z0-9]+')
+
+
+def normalize_category(value: str) -> str:
+    """'Furniture Decor' and 'furniture-decor' both become 'furniture_decor'."""
+    return _SEPARATORS.sub('_', str(value).lower()).strip('_')
+
+
+def resolve_category(value: str, categories) -> str:
+    """Map a category as the user or LLM wrote it onto a catalog category.
+
+    Exact matches (after normalization) win; otherwise a single category
+    sharing a word with the value is used ('furniture' -> 'furniture_decor').
+
+    Returns:
+        The catalog category, or None if it is unknown or ambiguous
+    """
+    wanted = normalize_category(value)
+    if not wanted:
+        return None
+    normalized = {normalize_category(category): category for category in categories}
+    if wanted in normalized:
+        return normalized[wanted]
+    words = set(wanted.split('_'))
+    candidates = [category for key, category in normalized.items() if words & set(key.split('_'))]
+    return candidates[0] if len(candidates) == 1 else None
+
+
+def _number(value, cast):
+    if value is None or value == "":
+        return None
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        logger.debug("Ignoring non-numeric retrieval filter value %r", value)
+        return None
+
+
+def build_filters(category: str = None, min_price: float = None, max_price: float = None,
+                  min_order_count: int = None, categories=()) -> dict:
+    """Normalize retrieval filter arguments into a dict of the filters to apply.
+
+    Args:
+        category: Product category; resolved against the known categories
+        min_price: Lowest price to include
+        max_price: Highest price to include
+        min_order_count: Minimum order count, used as the popularity filter
+        categories: Categories present in the catalog
+
+    Returns:
+        Dict with any of 'category', 'min_price', 'max_price', 'min_order_count'
+    """
+    filters = {}
+    if category:
+        resolved = resolve_category(category, categories)
+        if resolved is not None:
+            filters['category'] = resolved
+        else:
+            logger.info(f"Ignoring unknown category filter: {category}")
+    for key, value, cast in (('min_price', min_price, float), ('max_price', max_price, float),
+                             ('min_order_count', min_order_count, int)):
+        value = _number(value, cast)
+        if value is not None:
+            filters[key] = value
+    return filters
+
+
+def chroma_where(filters: dict):
+    """Chroma `where` clause for the filters, or None when there are none."""
+    clauses = []
+    if 'category' in filters:
+        clauses.append({'category': {'$eq': filters['category']}})
+    if 'min_price' in filters:
+        clauses.append({'price': {'$gte': filters['min_price']}})
+    if 'max_price' in filters:
+        clauses.append({'price': {'$lte': filters['max_price']}})
+    if 'min_order_count' in filters:
+        clauses.append({'order_count': {'$gte': filters['min_order_count']}})
+    if not clauses:
+        return None
+    # Chroma only accepts $and with two or more clauses
+    return clauses[0] if len(clauses) == 1 else {'$and': clauses}
+
+
+def metadata_matches(metadata: dict, filters: dict) -> bool:
+    """Python equivalent of chroma_where, for documents outside Chroma."""
+    if not filters:
+        return True
+    metadata = metadata or {}
+    if 'category' in filters and metadata.get('category') != filters['category']:
+        return False
+    price = metadata.get('price')
+    if 'min_price' in filters and (price is None or price < filters['min_price']):
+        return False
+    if 'max_price' in filters and (price is None or price > filters['max_price']):
+        return False
+    order_count = metadata.get('order_count')
+    if 'min_order_count' in filters and (order_count is None or order_count < filters['min_order_count']):
+        return False
+    return True
@@ -0,0 +1,157 @@
+import ast
+import json
+import logging
+import re
+from collections import Counter
+from app.core.config import settings
+from app.utils.history_compactor import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# "Key: value" lines of the product chunks written by VectorDBGenerator._row_document
+_FIELD_LINE = re.compile(r'^\s*([A-Za-z][A-Za-z ]*?)\s*:\s*(.*)$')
+_PRODUCT_LIST_PREFIX = "Following are the available products in system:"
+
+# Chunk labels mapped to result keys
+FIELD_NAMES = {
+    'product name': 'name',
+    'category': 'category',
+    'price': 'price',
+    'description': 'description',
+    'specifications': 'specifications',
+    'order count': 'order_count',
+}
+
+
+def _parse_value(key: str, value: str):
+    if key in ('price', 'order_count'):
+        try:
+            number = float(value)
+        except ValueError:
+            return value
+        return int(number) if key == 'order_count' else round(number, 2)
+    if key == 'specifications' and value.startswith('{'):
+        # Stored as a Python dict repr in the catalog
+        try:
+            return ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            return value
+    return value
+
+
+def parse_product_document(document) -> dict:
+    """Turn a product chunk back into a dict of named fields."""
+    fields = {}
+    for line in document.page_content.splitlines():
+        match = _FIELD_LINE.match(line)
+        if not match:
+            continue
+        key = FIELD_NAMES.get(match.group(1).lower())
+        if key:
+            fields[key] = _parse_value(key, match.group(2).strip())
+    metadata = document.metadata or {}
+    if 'product_id' in metadata:
+        fields['id'] = str(metadata['product_id'])
+    if 'name' not in fields and metadata.get('product_name'):
+        fields['name'] = str(metadata['product_name'])
+    # Typed metadata (indexes built since it was added) wins over parsed text
+    for key in ('category', 'price', 'order_count'):
+        if key in metadata:
+            fields[key] = metadata[key]
+    return fields
+
+
+def _product_list_names(document) -> list:
+    text = document.page_content.split(_PRODUCT_LIST_PREFIX, 1)[1].strip()
+    try:
+        return list(ast.literal_eval(text))
+    except (ValueError, SyntaxError):
+        return []
+
+
+def _payload_tokens(payload: dict) -> int:
+    return count_tokens(json.dumps(payload, ensure_ascii=False, separators=(',', ':')))
+
+
+def format_retrieval_results(query: str, results: list, fields: list = None, token_budget: int = None,
+                             filters: dict = None) -> str:
+    """Build the compact JSON that retrieve_document returns to the LLM.
+
+    Results are taken in the given order. Chunks of the same product are merged
+    into one entry (keeping the best match, with a variant count and price
+    range); a product is identified by its product_id metadata, or by its name
+    in indexes built without it. Different products that share a name keep
+    their own entries and carry their ids. Only the selected fields are kept,
+    and entries are added until the JSON reaches the token budget. The
+    catalog-wide product list chunk is reduced to the names not already in
+    the results.
+
+    Args:
+        query: The user's search query
+        results: Ranked (Document, score) pairs, best first
+        fields: Result keys to keep (defaults to RETRIEVAL_FIELDS)
+        token_budget: Maximum tokens of the returned JSON (defaults to RETRIEVAL_TOKEN_BUDGET, 0 disables)
+        filters: Filters applied to the search, echoed back so the model knows the results are filtered
+
+    Returns:
+        JSON string {"query", "filters"?, "results", "other_products"?, "omitted"?}
+    """
+    fields = settings.RETRIEVAL_FIELDS if fields is None else fields
+    token_budget = settings.RETRIEVAL_TOKEN_BUDGET if token_budget is None else token_budget
+
+    products = {}
+    other_products = []
+    for document, _ in results:
+        if document.page_content.startswith(_PRODUCT_LIST_PREFIX):
+            other_products = _product_list_names(document)
+            continue
+        product = parse_product_document(document)
+        name_key = str(product.get('name', '')).strip().lower()
+        key = ('id', product['id']) if 'id' in product else ('name', name_key)
+        entry = products.get(key)
+        if entry is None:
+            entry = products[key] = {name: product[name] for name in fields if name in product}
+            entry['_prices'] = [product.get('price')]
+            entry['_name'] = name_key
+            entry['_id'] = product.get('id')
+        else:
+            entry['variants'] = entry.get('variants', 1) + 1
+            entry['_prices'].append(product.get('price'))
+
+    name_counts = Counter(entry['_name'] for entry in products.values())
+    entries = []
+    for entry in products.values():
+        prices = [price for price in entry.pop('_prices') if isinstance(price, (int, float))]
+        if 'price' in entry and len(set(prices)) > 1:
+            entry['price_range'] = [min(prices), max(prices)]
+        product_id = entry.pop('_id')
+        if name_counts[entry.pop('_name')] > 1 and product_id is not None:
+            entry.setdefault('id', product_id)
+        entries.append(entry)
+
+    payload = {'query': query}
+    if filters:
+        payload['filters'] = filters
+    payload['results'] = []
+    omitted = 0
+    for entry in entries:
+        payload['results'].append(entry)
+        if token_budget and payload['results'][1:] and _payload_tokens(payload) > token_budget:
+            payload['results'].pop()
+            omitted += 1
+    if omitted:
+        payload['omitted'] = omitted
+
+    listed = {str(entry.get('name', '')).lower() for entry in payload['results']}
+    names = [name for name in other_products if str(name).lower() not in listed]
+    if names:
+        payload['other_products'] = names
+        # Drop names from the end until the list fits in what is left of the budget
+        while token_budget and names and _payload_tokens(payload) > token_budget:
+            names.pop()
+        if not names:
+            del payload['other_products']
+
+    text = json.dumps(payload, ensure_ascii=False, separators=(',', ':'))
+    logger.debug("Retrieval payload: %d results, %d omitted, %d tokens", len(payload['results']), omitted, count_tokens(text))
+    return text
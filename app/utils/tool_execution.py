@@ -1,3 +1,27 @@
+import asyncio
+import contextvars
+import inspect
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from functools import lru_cache
+from app.core.config import settings
+from app.core.metrics import span, TOOL_CALLS
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=None)
+def _required_parameters(function) -> tuple:
+    """Parameters without a default; the rest (e.g. search filters) may be null or omitted."""
+    return tuple(
+        name for name, parameter in inspect.signature(function).parameters.items()
+        if parameter.default is inspect.Parameter.empty
+    )
+
+
 class ExecuteTool:
     def __init__(self, functionName, functionArgs, availableFunctions):
         self.functionName = functionName
@@ -9,9 +33,145 @@ class ExecuteTool:
         if not function_to_call:
             return f"Error: Function '{self.functionName}' not found in available functions."
         # Check for required parameters
-        import inspect
-        sig = inspect.signature(function_to_call)
-        missing = [p for p in sig.parameters if p not in self.functionArgs or self.functionArgs[p] in (None, "")]
+        missing = [p for p in _required_parameters(function_to_call) if p not in self.functionArgs or self.functionArgs[p] in (None, "")]
         if missing:
             return f"Missing required parameter(s): {', '.join(missing)}. Please provide the value(s) to continue."
-        return function_to_call(**self.functionArgs)
\ No newline at end of file
+        return function_to_call(**self.functionArgs)
+
+
+class _ToolRun:
+    """Records when a submitted tool call actually starts running on the pool."""
+
+    def __init__(self, onStart=None):
+        self.startedAt = None
+        self.started = threading.Event()
+        self.onStart = onStart
+
+    def run(self, function, *args):
+        self.startedAt = time.monotonic()
+        self.started.set()
+        if self.onStart is not None:
+            self.onStart()
+        return function(*args)
+
+    def deadline(self, timeout):
+        # A call the pool just picked up may not have recorded its start yet
+        return (self.startedAt or time.monotonic()) + timeout
+
+
+class ParallelToolExecutor:
+    """Runs the tool calls of one LLM turn concurrently on a bounded, process-wide pool.
+
+    Results come back in the order of the tool calls. A tool that raises, has
+    unparseable arguments or exceeds its timeout yields an error string, which
+    is returned to the model as that call's tool message. A tool's timeout
+    counts from when it starts running, not from when it was queued; a call
+    that cannot get a worker within the queue timeout is cancelled.
+    """
+
+    _pool = None
+    _poolLock = threading.Lock()
+
+    def __init__(self, availableFunctions, maxWorkers=None, timeout=None, timeoutOverrides=None, queueTimeout=None):
+        """Initialize parallel tool executor.
+
+        Args:
+            availableFunctions: Mapping of tool name to callable
+            maxWorkers: Size of the shared tool pool (defaults to settings, fixed by the first executor)
+            timeout: Default seconds a single tool may run (defaults to settings)
+            timeoutOverrides: Per-tool timeouts by tool name (defaults to settings)
+            queueTimeout: Seconds a call may wait for a free worker (defaults to settings)
+        """
+        self.availableFunctions = availableFunctions
+        self.timeout = settings.TOOL_TIMEOUT_SECONDS if timeout is None else timeout
+        self.timeoutOverrides = settings.TOOL_TIMEOUT_OVERRIDES if timeoutOverrides is None else timeoutOverrides
+        self.queueTimeout = settings.TOOL_QUEUE_TIMEOUT_SECONDS if queueTimeout is None else queueTimeout
+        if ParallelToolExecutor._pool is None:
+            with ParallelToolExecutor._poolLock:
+                if ParallelToolExecutor._pool is None:
+                    ParallelToolExecutor._pool = ThreadPoolExecutor(
+                        max_workers=maxWorkers or settings.TOOL_WORKERS, thread_name_prefix="tool"
+                    )
+
+    def toolTimeout(self, functionName):
+        return self.timeoutOverrides.get(functionName, self.timeout)
+
+    def executeOne(self, functionName, rawArguments):
+        """Run one tool call, converting any failure into an error message for the model."""
+        try:
+            functionArgs = json.loads(rawArguments or "{}")
+        except json.JSONDecodeError as e:
+            TOOL_CALLS.labels(tool=functionName, status="invalid_arguments").inc()
+            return f"Error: Invalid arguments for '{functionName}': {str(e)}"
+        try:
+            with span(f"tool:{functionName}"):
+                response = ExecuteTool(functionName, functionArgs, self.availableFunctions).mainExecution()
+            TOOL_CALLS.labels(tool=functionName, status="ok").inc()
+            return response
+        except Exception as e:
+            TOOL_CALLS.labels(tool=functionName, status="error").inc()
+            logger.error(f"Tool '{functionName}' failed: {str(e)}")
+            return f"Error: Tool '{functionName}' failed: {str(e)}"
+
+    def timeoutMessage(self, functionName):
+        TOOL_CALLS.labels(tool=functionName, status="timeout").inc()
+        logger.warning(f"Tool '{functionName}' timed out after {self.toolTimeout(functionName)}s")
+        return f"Error: Tool '{functionName}' timed out after {self.toolTimeout(functionName)} seconds."
+
+    def queueTimeoutMessage(self, functionName):
+        TOOL_CALLS.labels(tool=functionName, status="queue_timeout").inc()
+        logger.warning(f"Tool '{functionName}' waited more than {self.queueTimeout}s for a worker")
+        return f"Error: Tool '{functionName}' could not start within {self.queueTimeout} seconds because the server is busy."
+
+    def submit(self, call, onStart=None):
+        """Queue one tool call on the shared pool.
+
+        Returns:
+            Tuple of (_ToolRun tracking its start, concurrent future)
+        """
+        run = _ToolRun(onStart)
+        # Each call runs in a copy of the caller's context so logs keep the request id
+        future = self._pool.submit(
+            contextvars.copy_context().run, run.run, self.executeOne, call.function.name, call.function.arguments
+        )
+        return run, future
+
+    def runAll(self, toolCalls):
+        """Run tool calls concurrently and return their responses in call order."""
+        submitted = [(call, *self.submit(call)) for call in toolCalls]
+        queueDeadline = time.monotonic() + self.queueTimeout
+        responses = []
+        for call, run, future in submitted:
+            functionName = call.function.name
+            if not run.started.wait(timeout=max(queueDeadline - time.monotonic(), 0)) and future.cancel():
+                responses.append(self.queueTimeoutMessage(functionName))
+                continue
+            remaining = run.deadline(self.toolTimeout(functionName)) - time.monotonic()
+            try:
+                responses.append(future.result(timeout=max(remaining, 0)))
+            except FutureTimeoutError:
+                future.cancel()
+                responses.append(self.timeoutMessage(functionName))
+        return responses
+
+    async def arunAll(self, toolCalls):
+        """Async version of runAll; awaits the pool instead of blocking the event loop."""
+        loop = asyncio.get_running_loop()
+
+        async def runOne(call):
+            functionName = call.function.name
+            started = asyncio.Event()
+            run, future = self.submit(call, onStart=lambda: loop.call_soon_threadsafe(started.set))
+            try:
+                await asyncio.wait_for(started.wait(), timeout=self.queueTimeout)
+            except asyncio.TimeoutError:
+                if future.cancel():
+                    return self.queueTimeoutMessage(functionName)
+            remaining = run.deadline(self.toolTimeout(functionName)) - time.monotonic()
+            try:
+                # wait_for cancels the wrapped future on timeout
+                return await asyncio.wait_for(asyncio.wrap_future(future), timeout=max(remaining, 0))
+            except asyncio.TimeoutError:
+                return self.timeoutMessage(functionName)
+
+        return list(await asyncio.gather(*(runOne(call) for call in toolCalls)))
@@ -0,0 +1,149 @@
+import ast
+import inspect
+import logging
+import threading
+import typing
+from collections import namedtuple
+import app.utils.custom_functions as functions
+
+logger = logging.getLogger(__name__)
+
+ToolSpec = namedtuple('ToolSpec', ['name', 'scope', 'function', 'parameters', 'schema'])
+
+# JSON schema types for annotated tool parameters; anything else is described as a string
+_JSON_TYPES = {
+    str: "string",
+    int: "integer",
+    float: "number",
+    bool: "boolean",
+    list: "array",
+    dict: "object",
+}
+
+
+def _literal_assignments(func) -> dict:
+    """Return the literal values assigned to plain names in a function body.
+
+    Tools declare their metadata this way: `scope`, `function_description`,
+    `<param>_description` and optionally `<param>_schema` (a full JSON schema).
+    """
+    values = {}
+    tree = ast.parse(inspect.getsource(func))
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Assign):
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    try:
+                        values[target.id] = ast.literal_eval(node.value)
+                    except ValueError:
+                        continue
+    return values
+
+
+def _annotation_schema(annotation) -> dict:
+    origin = typing.get_origin(annotation) or annotation
+    json_type = _JSON_TYPES.get(origin, "string")
+    schema = {"type": json_type}
+    if json_type == "array":
+        args = typing.get_args(annotation)
+        schema["items"] = {"type": _JSON_TYPES.get(args[0], "string") if args else "string"}
+    return schema
+
+
+class ToolRegistry:
+    """Tool definitions and callables discovered once from custom_functions.
+
+    Every public function that assigns a `scope` is a tool. Its schema is built
+    from the signature (annotations give the parameter types) and the
+    description variables in its body. Tool lists and callables are cached per
+    user type, so requests only do dictionary lookups.
+    """
+
+    def __init__(self, module=functions):
+        """Initialize tool registry.
+
+        Args:
+            module: Module whose functions are scanned for tools
+        """
+        self.module = module
+        self._specs = {}
+        self._by_scope = {}
+        self._lock = threading.Lock()
+        self.refresh()
+
+    def refresh(self):
+        """Rescan the module; only needed if tools are added at runtime."""
+        specs = {}
+        for name, obj in inspect.getmembers(self.module, inspect.isfunction):
+            if name.startswith('_') or obj.__module__ != self.module.__name__:
+                continue
+            try:
+                spec = self._build_spec(obj)
+            except Exception as e:
+                logger.warning(f"Skipping tool {name}: {str(e)}")
+                continue
+            if spec is not None:
+                specs[name] = spec
+        with self._lock:
+            self._specs = specs
+            self._by_scope = {}
+        logger.info(f"Registered {len(specs)} tools: {', '.join(specs)}")
+
+    @staticmethod
+    def _build_spec(func):
+        values = _literal_assignments(func)
+        scope = values.get("scope")
+        if scope is None:
+            return None
+
+        params = inspect.signature(func).parameters
+        properties = {}
+        for param, parameter in params.items():
+            schema = values.get(f"{param}_schema") or _annotation_schema(parameter.annotation)
+            properties[param] = {
+                **schema,
+                "description": values.get(f"{param}_description", f"{param} parameter of {func.__name__}")
+            }
+
+        schema = {
+            "type": "function",
+            "function": {
+                "name": func.__name__,
+                "description": values.get("function_description") or "No description available",
+                "parameters": {
+                    "type": "object",
+                    "properties": properties,
+                    "required": list(params.keys()),
+                    "additionalProperties": False
+                },
+                "strict": True
+            }
+        }
+        return ToolSpec(func.__name__, scope, func, tuple(params.keys()), schema)
+
+    def _scope_entry(self, user_type: str):
+        entry = self._by_scope.get(user_type)
+        if entry is None:
+            with self._lock:
+                specs = [spec for spec in self._specs.values() if spec.scope == user_type]
+                entry = (
+                    [spec.schema for spec in specs],
+                    {spec.name: spec.function for spec in specs},
+                )
+                self._by_scope[user_type] = entry
+        return entry
+
+    def tools_for(self, user_type: str) -> list:
+        """Tool definitions available to a user type (shared; do not mutate)."""
+        return self._scope_entry(user_type)[0]
+
+    def functions_for(self, user_type: str) -> dict:
+        """Mapping of tool name to callable for a user type (shared; do not mutate)."""
+        return self._scope_entry(user_type)[1]
+
+    def get(self, name: str):
+        """Return the ToolSpec registered under a name, or None."""
+        return self._specs.get(name)
+
+
+tool_registry = ToolRegistry()
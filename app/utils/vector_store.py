@@ -0,0 +1,110 @@
+import logging
+import os
+import threading
+import time
+from langchain_community.vectorstores import Chroma
+from app.core.config import settings
+from app.utils import embedding
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION_FILE = "index_version"
+
+
+class VectorStoreHandle:
+    """Lazily opened Chroma store shared by every request in the process.
+
+    The store is opened on first use and kept open. It is reopened only after the
+    index is rebuilt, which VectorDBGenerator signals by calling mark_rebuilt()
+    (this also touches a version file so other worker processes notice).
+    """
+
+    def __init__(self, persist_directory: str = None, embedding_function=None, check_interval: float = None):
+        """Initialize vector store handle.
+
+        Args:
+            persist_directory: Chroma persist directory (defaults to settings)
+            embedding_function: Embedding model used for queries
+            check_interval: Seconds between checks of the index version file (defaults to settings)
+        """
+        self.persist_directory = persist_directory or settings.vectorDBPath
+        self.embedding_function = embedding_function or embedding
+        self.check_interval = settings.DATA_RELOAD_CHECK_SECONDS if check_interval is None else check_interval
+        self._db = None
+        self._index_version = None
+        self._typed_metadata = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def version_path(self) -> str:
+        return os.path.join(self.persist_directory, INDEX_VERSION_FILE)
+
+    def _read_index_version(self):
+        try:
+            return os.stat(self.version_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def get(self) -> Chroma:
+        """Return the shared Chroma store, opening or reopening it if needed."""
+        now = time.monotonic()
+        if self._db is not None and now - self._last_check < self.check_interval:
+            return self._db
+
+        with self._lock:
+            index_version = self._read_index_version()
+            self._last_check = now
+            if self._db is None or index_version != self._index_version:
+                self._open(index_version)
+            return self._db
+
+    def _open(self, index_version):
+        started = time.perf_counter()
+        self._db = Chroma(persist_directory=self.persist_directory, embedding_function=self.embedding_function)
+        self._index_version = index_version
+        logger.info(f"Opened vector store at {self.persist_directory} in {time.perf_counter() - started:.3f}s")
+
+    def has_typed_metadata(self) -> bool:
+        """True when the store's product documents carry typed metadata (product_id, category, price, ...).
+
+        Stores built before metadata filters were added have text only, so a
+        Chroma `where` clause on them would match nothing. Checked once per opened store.
+        """
+        db = self.get()
+        typed = self._typed_metadata
+        if typed is None or typed[0] is not db:
+            try:
+                # At most one document (the product list) is not a product
+                sample = db._collection.get(limit=2, include=['metadatas'])['metadatas']
+            except Exception as e:
+                logger.warning(f"Could not check vector store metadata: {str(e)}")
+                sample = []
+            typed = self._typed_metadata = (db, any('product_id' in (metadata or {}) for metadata in sample))
+        return typed[1]
+
+    def mark_rebuilt(self):
+        """Record that the index was rebuilt so every handle reopens the store.
+
+        This process reopens the store right away, so it stays ready (and keeps
+        receiving traffic) after a rebuild; other workers reopen on their next check.
+        """
+        os.makedirs(self.persist_directory, exist_ok=True)
+        with open(self.version_path, 'w') as f:
+            f.write(str(time.time()))
+        with self._lock:
+            self._db = None
+            self._index_version = None
+            try:
+                self._open(self._read_index_version())
+            except Exception as e:
+                # Left closed; the next get() retries the open
+                logger.error(f"Error reopening vector store at {self.persist_directory}: {str(e)}")
+            self._last_check = time.monotonic()
+
+    @property
+    def loaded(self) -> bool:
+        return self._db is not None
+
+
+vector_store = VectorStoreHandle()
@@ -1,33 +1,310 @@
+import json
+import logging
+import os
+import time
 from app.core.config import settings
 import pandas as pd
 from langchain_community.vectorstores import Chroma
-from app.utils import embedding
+from app.utils import embedding, encode_kwargs
+from app.utils.vector_store import vector_store
+from app.utils.keyword_index import KeywordIndex, KEYWORD_INDEX_FILE, content_hash
+from app.core.metrics import span
 from langchain_core.documents import Document
 
+logger = logging.getLogger(__name__)
+
+PRODUCT_LIST_ID = "catalog:product_names"
+CHECKPOINT_FILE = "build_checkpoint.json"
+CATALOG_COLUMNS = ['product_id', 'product_name', 'category', 'price', 'description', 'specifications', 'order_count']
+
+
+def product_doc_id(product_id) -> str:
+    """Stable vector DB id for a catalog product."""
+    return f"product:{product_id}"
+
+
 class VectorDBGenerator:
     def __init__(self):
         self.vectorDBPath = settings.vectorDBPath
         self.product_data_path = settings.product_data_path
-        self.chunks = []
         self.embedding = embedding
+        self.batch_size = settings.EMBEDDING_BATCH_SIZE
+        self.chunk_rows = settings.INDEX_CHUNK_ROWS
+        self.workers = settings.EMBEDDING_WORKERS
+        self.report = {}
+        self._pool = None
 
-    def chunk_preparation(self):
-        df = pd.read_csv(self.product_data_path, usecols=['product_name', 'category','price' ,'description', 'specifications', 'order_count'])
-        for row in df.iterrows():
-            self.chunks.append(f"""Product Name: {row[1]['product_name']}\n Category: {row[1]['category']}\n Price: {row[1]['price']}\n Description: {row[1]['description']}\n Specifications: {row[1]['specifications']}\n Order Count: {row[1]['order_count']}""")
-        self.chunks.append(f"""Following are the available products in system:\n {list(set(df['product_name']))}""")
-        return self.chunks
-    
-    def save_to_chroma(self, chunks):
-        documents = [Document(page_content=chunk) for chunk in chunks]
-        db = Chroma.from_documents(
-            documents,
-            self.embedding,
-            persist_directory=self.vectorDBPath
+    @staticmethod
+    def _row_metadata(row) -> dict:
+        """Typed catalog fields stored as metadata so searches can filter on them."""
+        metadata = {
+            'product_id': str(row['product_id']),
+            'product_name': str(row['product_name']),
+        }
+        if pd.notna(row['category']):
+            metadata['category'] = str(row['category'])
+        if pd.notna(row['price']):
+            metadata['price'] = float(row['price'])
+        if pd.notna(row['order_count']):
+            metadata['order_count'] = int(row['order_count'])
+        if pd.notna(row['specifications']):
+            metadata['specifications'] = str(row['specifications'])
+        return metadata
+
+    @classmethod
+    def _row_document(cls, row) -> Document:
+        chunk = f"""Product Name: {row['product_name']}\n Category: {row['category']}\n Price: {row['price']}\n Description: {row['description']}\n Specifications: {row['specifications']}\n Order Count: {row['order_count']}"""
+        return Document(
+            page_content=chunk,
+            metadata={**cls._row_metadata(row), 'content_hash': content_hash(chunk)}
         )
-        db.persist()
-    
-    def generate_vector_db(self):
-        chunks = self.chunk_preparation()
-        self.save_to_chroma(chunks)
+
+    @staticmethod
+    def _product_list_document(product_names) -> Document:
+        # Sorted so the text (and its hash) does not change between processes
+        product_list = f"""Following are the available products in system:\n {sorted(product_names)}"""
+        return Document(page_content=product_list, metadata={'content_hash': content_hash(product_list)})
+
+    def iter_chunk_batches(self):
+        """Stream product documents from the catalog CSV in fixed-size row batches.
+
+        Yields:
+            Tuple of (rows read so far, list of Documents for this batch)
+        """
+        seen_ids = set()
+        rows_read = 0
+        for frame in pd.read_csv(self.product_data_path, usecols=CATALOG_COLUMNS, chunksize=self.chunk_rows):
+            rows_read += len(frame)
+            # One document per product so ids stay stable across syncs
+            frame = frame.drop_duplicates('product_id')
+            frame = frame[~frame['product_id'].astype(str).isin(seen_ids)]
+            seen_ids.update(frame['product_id'].astype(str))
+            yield rows_read, [self._row_document(row) for _, row in frame.iterrows()]
+
+    @staticmethod
+    def _doc_id(document: Document) -> str:
+        product_id = document.metadata.get('product_id')
+        return product_doc_id(product_id) if product_id is not None else PRODUCT_LIST_ID
+
+    # ------------------------------------------------------------------
+    # Embedding
+    # ------------------------------------------------------------------
+
+    def _sentence_transformer(self):
+        """Return the underlying SentenceTransformer, if the embedding model exposes one."""
+        model = getattr(self.embedding, 'embeddings', self.embedding)
+        return getattr(model, 'client', None)
+
+    def _start_pool(self):
+        if self.workers <= 1:
+            return
+        model = self._sentence_transformer()
+        if model is None or not hasattr(model, 'start_multi_process_pool'):
+            logger.warning("Embedding model does not support multi-process encoding, using a single process")
+            return
+        self._pool = model.start_multi_process_pool(['cpu'] * self.workers)
+
+    def _stop_pool(self):
+        if self._pool is not None:
+            self._sentence_transformer().stop_multi_process_pool(self._pool)
+            self._pool = None
+
+    def _embed(self, texts: list) -> list:
+        """Encode texts in batches of batch_size, across the worker pool when one is running."""
+        if self._pool is not None:
+            # Same preprocessing as HuggingFaceEmbeddings.embed_documents
+            texts = [text.replace("\n", " ") for text in texts]
+            vectors = self._sentence_transformer().encode_multi_process(
+                texts, self._pool, batch_size=self.batch_size,
+                normalize_embeddings=encode_kwargs.get('normalize_embeddings', False)
+            )
+            return vectors.tolist()
+        # encode_kwargs carries EMBEDDING_BATCH_SIZE for the single-process path
+        return self.embedding.embed_documents(texts)
+
+    # ------------------------------------------------------------------
+    # Store writes and checkpoints
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _write(db, documents: list, vectors: list):
+        """Upsert precomputed embeddings in bulk, within the client's max batch size."""
+        # The langchain wrapper always re-embeds, so write to the collection directly
+        collection = db._collection
+        max_batch = db._client.get_max_batch_size() if hasattr(db._client, 'get_max_batch_size') else 5000
+        for start in range(0, len(documents), max_batch):
+            batch = documents[start:start + max_batch]
+            collection.upsert(
+                ids=[VectorDBGenerator._doc_id(document) for document in batch],
+                embeddings=vectors[start:start + max_batch],
+                documents=[document.page_content for document in batch],
+                metadatas=[document.metadata for document in batch],
+            )
+
+    @staticmethod
+    def _update_metadata(db, documents: list):
+        """Replace metadata of documents whose text (and so embedding) is unchanged."""
+        for start in range(0, len(documents), 5000):
+            batch = documents[start:start + 5000]
+            db._collection.update(
+                ids=[VectorDBGenerator._doc_id(document) for document in batch],
+                metadatas=[document.metadata for document in batch],
+            )
+
+    @staticmethod
+    def _delete(db, ids: list):
+        for start in range(0, len(ids), 5000):
+            db.delete(ids=ids[start:start + 5000])
+
+    @property
+    def checkpoint_path(self) -> str:
+        return os.path.join(self.vectorDBPath, CHECKPOINT_FILE)
+
+    @property
+    def keyword_index_path(self) -> str:
+        return os.path.join(self.vectorDBPath, KEYWORD_INDEX_FILE)
+
+    def _source_signature(self) -> list:
+        stat = os.stat(self.product_data_path)
+        return [os.path.abspath(self.product_data_path), stat.st_mtime_ns, stat.st_size]
+
+    def _read_checkpoint(self, mode: str) -> int:
+        """Return rows already indexed by an interrupted build of the same catalog, else 0."""
+        try:
+            with open(self.checkpoint_path) as f:
+                checkpoint = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return 0
+        if checkpoint.get('mode') != mode or checkpoint.get('source') != self._source_signature():
+            return 0
+        return int(checkpoint.get('rows_done', 0))
+
+    def _write_checkpoint(self, mode: str, rows_done: int):
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'mode': mode, 'source': self._source_signature(), 'rows_done': rows_done}, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    # ------------------------------------------------------------------
+    # Build
+    # ------------------------------------------------------------------
+
+    def build(self, mode: str = "incremental", resume: bool = True):
+        """Stream the catalog into the vector DB.
+
+        In 'incremental' mode only new or changed products (by stable id and
+        content hash) are embedded, products whose metadata alone changed get a
+        metadata update, and products no longer in the catalog are deleted. In 'full' mode the collection is cleared and every product is
+        re-embedded. Both modes record a checkpoint after each batch so an
+        interrupted build resumes where it stopped, and finish by writing the
+        BM25 keyword index of all products next to the Chroma files.
+
+        Args:
+            mode: 'incremental' or 'full'
+            resume: Continue an interrupted build of the same catalog instead of restarting
+        """
+        if mode not in ("incremental", "full"):
+            raise ValueError(f"Unknown vector DB build mode: {mode}")
+
+        os.makedirs(self.vectorDBPath, exist_ok=True)
+        db = Chroma(persist_directory=self.vectorDBPath, embedding_function=self.embedding)
+        started = time.perf_counter()
+        report = {'added': 0, 'updated': 0, 'metadata_updated': 0, 'deleted': 0, 'unchanged': 0, 'resumed_rows': 0}
+
+        rows_done = self._read_checkpoint(mode) if resume else 0
+        existing = db.get(include=['metadatas'])
+        existing_metadata = {
+            doc_id: metadata or {} for doc_id, metadata in zip(existing['ids'], existing['metadatas'])
+        }
+        if mode == "full" and not rows_done:
+            self._delete(db, list(existing_metadata))
+            report['deleted'] = len(existing_metadata)
+            existing_metadata = {}
+        report['resumed_rows'] = rows_done
+
+        wanted_ids = set()
+        product_names = set()
+        keyword_documents = []
+        embedded = 0
+        self._start_pool()
+        try:
+            for rows_read, documents in self.iter_chunk_batches():
+                product_names.update(document.metadata['product_name'] for document in documents)
+                upserts = []
+                metadata_updates = []
+                for document in documents:
+                    doc_id = self._doc_id(document)
+                    wanted_ids.add(doc_id)
+                    keyword_documents.append((doc_id, document))
+                    if rows_read <= rows_done:
+                        # Written by the interrupted build; only needed for the removal check
+                        continue
+                    previous = existing_metadata.get(doc_id)
+                    if previous is None:
+                        report['added'] += 1
+                        upserts.append(document)
+                    elif previous.get('content_hash') != document.metadata['content_hash']:
+                        report['updated'] += 1
+                        upserts.append(document)
+                    elif previous != document.metadata:
+                        # Same text, so the stored embedding is still valid
+                        report['metadata_updated'] += 1
+                        metadata_updates.append(document)
+                    else:
+                        report['unchanged'] += 1
+                if metadata_updates:
+                    self._update_metadata(db, metadata_updates)
+                if upserts:
+                    batch_started = time.perf_counter()
+                    with span("vectordb_embed_batch"):
+                        vectors = self._embed([document.page_content for document in upserts])
+                    with span("vectordb_write_batch"):
+                        self._write(db, upserts, vectors)
+                    embedded += len(upserts)
+                    logger.info(f"Indexed {len(upserts)} docs ({rows_read} rows read) at "
+                                f"{len(upserts) / max(time.perf_counter() - batch_started, 1e-9):.1f} docs/sec")
+                if rows_read > rows_done:
+                    self._write_checkpoint(mode, rows_read)
+
+            product_list = self._product_list_document(product_names)
+            wanted_ids.add(PRODUCT_LIST_ID)
+            if existing_metadata.get(PRODUCT_LIST_ID, {}).get('content_hash') != product_list.metadata['content_hash']:
+                self._write(db, [product_list], self._embed([product_list.page_content]))
+                embedded += 1
+        finally:
+            self._stop_pool()
+
+        removed_ids = [doc_id for doc_id in existing_metadata if doc_id not in wanted_ids]
+        self._delete(db, removed_ids)
+        report['deleted'] += len(removed_ids)
+
+        # Rebuilt from every product on each run; it needs no embeddings, so this is cheap
+        with span("keyword_index_build"):
+            KeywordIndex.from_documents(keyword_documents).save(self.keyword_index_path)
+        report['keyword_docs'] = len(keyword_documents)
+
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+        elapsed = time.perf_counter() - started
+        report['elapsed_seconds'] = round(elapsed, 3)
+        report['docs_per_second'] = round(embedded / elapsed, 1) if elapsed > 0 else 0.0
+        self.report = report
+
+    def generate_vector_db(self, mode: str = "incremental", resume: bool = True):
+        """Build or sync the vector DB from the product catalog.
+
+        Args:
+            mode: 'incremental' to sync only changed products, 'full' to rebuild everything
+            resume: Continue an interrupted build of the same catalog
+
+        Returns:
+            Status message; counts and throughput are available in self.report
+        """
+        with span("vectordb_build"):
+            self.build(mode, resume)
+        logger.info(f"Vector DB {mode} build: {self.report}")
+        if self.report['added'] or self.report['updated'] or self.report['metadata_updated'] or self.report['deleted']:
+            # Make the shared retrieval handle reopen the rebuilt index
+            vector_store.mark_rebuilt()
         return "Vector DB generated and saved successfully."
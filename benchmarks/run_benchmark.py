@@ -0,0 +1,455 @@
+"""Load-test and latency benchmark for the chatbot API.
+
+Drives /chat, /chat/stream, /create_vectorDB and the tool functions at one or
+more concurrency levels against the offline 'local' LLM provider, and reports
+throughput and p50/p95/p99 latency overall and per pipeline stage. Stage
+latencies are read from the same STAGE_LATENCY spans the app exports on
+/metrics. The app is served in-process through httpx's ASGI transport, so
+results carry no network noise; the vector DB is copied to a scratch directory
+first so the run never modifies the real index.
+
+Usage (from the repository root):
+
+    python -m benchmarks.run_benchmark
+    python -m benchmarks.run_benchmark --scenarios chat,tools --concurrency 1,16,64 --requests 200
+    python -m benchmarks.run_benchmark --output results.json --compare benchmarks/results/baseline.json
+
+Results are written as JSON (default benchmarks/results/<timestamp>.json).
+With --compare, p95 latencies are checked against an earlier result file and
+the exit code is 1 if any regressed by more than --regression-threshold.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENARIOS = ["chat", "chat_stream", "vectordb", "tools"]
+
+DEFAULT_QUERIES = [
+    "Is the {product} in stock? I need 3 units",
+    "Tell me about the {product}",
+    "I want to buy 2 {product}",
+    "What products do you have for the kitchen?",
+    "Can I order 5 pieces of {product}?",
+    "Show me something for the bedroom",
+]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"Comma-separated scenarios to run ({', '.join(SCENARIOS)})")
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=100, help="Requests per scenario and concurrency level")
+    parser.add_argument("--vectordb-requests", type=int, default=3, help="Incremental /create_vectorDB syncs (run sequentially)")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Local provider time to first token (seconds)")
+    parser.add_argument("--token-interval", type=float, default=0.005, help="Local provider delay per streamed token (seconds)")
+    parser.add_argument("--queries", help="File with one query per line ({product} is replaced with a catalog name)")
+    parser.add_argument("--output", help="Result file (default benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", help="Earlier result file to compare p95 latencies against")
+    parser.add_argument("--regression-threshold", type=float, default=0.2,
+                        help="Relative p95 increase counted as a regression (default 0.2 = 20%%)")
+    parser.add_argument("--keep-vectordb", action="store_true",
+                        help="Use the configured vector DB in place instead of a scratch copy")
+    return parser.parse_args(argv)
+
+
+def configure_environment(args) -> str:
+    """Point settings at the offline provider and a scratch vector DB; must run before importing app."""
+    os.environ["LLM_PROVIDER"] = "local"
+    os.environ["LOCAL_LLM_LATENCY_SECONDS"] = str(args.llm_latency)
+    os.environ["LOCAL_LLM_TOKEN_INTERVAL_SECONDS"] = str(args.token_interval)
+    os.environ["WARMUP_ON_STARTUP"] = "false"
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.chdir(REPO_ROOT)
+    sys.path.insert(0, REPO_ROOT)
+
+    from app.core.config import settings
+    if args.keep_vectordb:
+        return settings.vectorDBPath
+    scratch = tempfile.mkdtemp(prefix="bench_vectordb_")
+    if os.path.isdir(settings.vectorDBPath):
+        shutil.copytree(settings.vectorDBPath, scratch, dirs_exist_ok=True)
+    settings.vectorDBPath = scratch
+    os.environ["vectorDBPath"] = scratch
+    return scratch
+
+
+# ----------------------------------------------------------------------
+# Stage timing
+# ----------------------------------------------------------------------
+
+def stage_histograms() -> dict:
+    """Read the production STAGE_LATENCY histogram.
+
+    Returns:
+        Dict of stage -> {"buckets": {upper bound: cumulative count}, "count": n, "sum": seconds}
+    """
+    from app.core.metrics import STAGE_LATENCY
+    stages = defaultdict(lambda: {"buckets": {}, "count": 0.0, "sum": 0.0})
+    for metric in STAGE_LATENCY.collect():
+        for sample in metric.samples:
+            stage = stages[sample.labels["stage"]]
+            if sample.name.endswith("_bucket"):
+                stage["buckets"][float(sample.labels["le"])] = sample.value
+            elif sample.name.endswith("_count"):
+                stage["count"] = sample.value
+            elif sample.name.endswith("_sum"):
+                stage["sum"] = sample.value
+    return dict(stages)
+
+
+def histogram_quantile(q: float, buckets: dict):
+    """Estimate a quantile from cumulative bucket counts, interpolating linearly like PromQL's histogram_quantile."""
+    bounds = sorted(buckets.items())
+    total = bounds[-1][1] if bounds else 0
+    if not total:
+        return None
+    rank = q * total
+    previous_bound, previous_count = 0.0, 0.0
+    for bound, count in bounds:
+        if count >= rank:
+            if bound == float("inf"):
+                # Above the largest finite bucket; report that bound
+                return previous_bound
+            if count == previous_count:
+                return bound
+            return previous_bound + (bound - previous_bound) * (rank - previous_count) / (count - previous_count)
+        previous_bound, previous_count = bound, count
+    return previous_bound
+
+
+def histogram_delta(after: dict, before: dict = None) -> dict:
+    """Observations of one stage made between two stage_histograms() readings."""
+    before = before or {"buckets": {}, "count": 0.0, "sum": 0.0}
+    return {
+        "buckets": {bound: count - before["buckets"].get(bound, 0.0) for bound, count in after["buckets"].items()},
+        "count": after["count"] - before["count"],
+        "sum": after["sum"] - before["sum"],
+    }
+
+
+def histogram_stats(histogram: dict) -> dict:
+    if not histogram["count"]:
+        return {}
+    stats = {"count": int(histogram["count"]), "mean_ms": round(histogram["sum"] / histogram["count"] * 1000, 3)}
+    for q in (50, 95, 99):
+        stats[f"p{q}_ms"] = round(histogram_quantile(q / 100, histogram["buckets"]) * 1000, 3)
+    return stats
+
+
+class StageRecorder:
+    """Per-stage latency of one benchmark run, from the same spans production exports on /metrics.
+
+    Server-side stages are read from app.core.metrics.STAGE_LATENCY (bucketed, so
+    percentiles are interpolated like a Prometheus dashboard would). Client-side
+    measurements such as time to first token are recorded directly.
+    """
+
+    def __init__(self):
+        self.client_samples = defaultdict(list)
+        self._baseline = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float):
+        """Record a client-side measurement that has no server-side span."""
+        with self._lock:
+            self.client_samples[stage].append(seconds)
+
+    def reset(self):
+        with self._lock:
+            self.client_samples = defaultdict(list)
+        self._baseline = stage_histograms()
+
+    def summary(self) -> dict:
+        """Stage latency statistics since the last reset()."""
+        stages = {}
+        for stage, histogram in stage_histograms().items():
+            stats = histogram_stats(histogram_delta(histogram, self._baseline.get(stage)))
+            if stats:
+                stages[stage] = stats
+        with self._lock:
+            for stage, samples in self.client_samples.items():
+                stages[stage] = percentiles(samples)
+        return dict(sorted(stages.items()))
+
+
+# ----------------------------------------------------------------------
+# Scenarios
+# ----------------------------------------------------------------------
+
+def load_queries(path: str = None) -> list:
+    from app.utils.data_store import data_store
+    templates = DEFAULT_QUERIES
+    if path:
+        with open(path) as f:
+            templates = [line.strip() for line in f if line.strip()]
+    products = data_store.catalog.get()['product_name'].drop_duplicates().tolist() or ["product"]
+    return [template.format(product=products[i % len(products)]) for i, template in enumerate(templates * len(products))]
+
+
+async def run_async_load(make_request, total: int, concurrency: int) -> tuple:
+    """Issue total requests with at most concurrency in flight; return (latencies, errors, wall seconds)."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async def one(i):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                ok = await make_request(i)
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            if not ok:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return latencies, errors, time.perf_counter() - started
+
+
+def run_threaded_load(call, total: int, concurrency: int) -> tuple:
+    latencies, errors = [], 0
+    lock = threading.Lock()
+
+    def one(i):
+        nonlocal errors
+        started = time.perf_counter()
+        try:
+            ok = call(i)
+        except Exception:
+            ok = False
+        with lock:
+            latencies.append(time.perf_counter() - started)
+            if not ok:
+                errors += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+    return latencies, errors, time.perf_counter() - started
+
+
+async def chat_scenario(client, queries, total, concurrency, stream: bool):
+    async def request(i):
+        payload = {"user_query": queries[i % len(queries)], "session_id": f"bench-{i}"}
+        if not stream:
+            response = await client.post("/chat", json=payload, timeout=120)
+            return response.status_code == 200 and not str(response.json().get("response", "")).startswith("Error")
+        first_token = None
+        started = time.perf_counter()
+        async with client.stream("POST", "/chat/stream", json=payload, timeout=120) as response:
+            async for line in response.aiter_lines():
+                if first_token is None and line.startswith("event: token"):
+                    first_token = time.perf_counter() - started
+                if line.startswith("event: done"):
+                    break
+        if first_token is not None:
+            RECORDER.record("time_to_first_token", first_token)
+        return response.status_code == 200
+
+    return await run_async_load(request, total, concurrency)
+
+
+async def vectordb_scenario(client, total):
+    async def request(i):
+        response = await client.post("/create_vectorDB", params={"mode": "incremental"}, timeout=600)
+        return response.status_code == 200 and "report" in response.json()
+
+    return await run_async_load(request, total, 1)
+
+
+def tools_scenario(queries, total, concurrency):
+    from app.utils.tool_registry import tool_registry
+    from app.utils.data_store import data_store
+    from app.utils.tool_execution import ParallelToolExecutor
+
+    functions = tool_registry.functions_for("general")
+    products = data_store.catalog.get()['product_name'].drop_duplicates().tolist()
+    calls = [
+        ("check_availability", lambda i: {"product_name": products[i % len(products)], "quantity": 1 + i % 5}),
+        ("check_availability_batch", lambda i: {"items": [{"product_name": p, "quantity": 2} for p in products[i % len(products):][:3]]}),
+        ("retrieve_document", lambda i: {"query": queries[i % len(queries)]}),
+    ]
+
+    executor = ParallelToolExecutor(functions)
+
+    def call(i):
+        name, make_args = calls[i % len(calls)]
+        # Same entry point as the chat tool loop, so the tool:<name> span is recorded
+        result = executor.executeOne(name, json.dumps(make_args(i)))
+        return '"status": "error"' not in str(result)[:200]
+
+    return run_threaded_load(call, total, concurrency)
+
+
+# ----------------------------------------------------------------------
+# Reporting
+# ----------------------------------------------------------------------
+
+def percentiles(samples: list) -> dict:
+    import numpy as np
+    if not samples:
+        return {}
+    values = np.asarray(samples) * 1000
+    return {
+        "count": int(len(values)),
+        "mean_ms": round(float(values.mean()), 3),
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+        "p99_ms": round(float(np.percentile(values, 99)), 3),
+        "max_ms": round(float(values.max()), 3),
+    }
+
+
+def summarize(scenario, concurrency, latencies, errors, wall_seconds) -> dict:
+    return {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "wall_seconds": round(wall_seconds, 3),
+        "throughput_rps": round(len(latencies) / wall_seconds, 2) if wall_seconds > 0 else 0.0,
+        "latency": percentiles(latencies),
+        "stages": RECORDER.summary(),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True, timeout=10).stdout.strip()
+    except Exception:
+        return ""
+
+
+def print_result(result: dict):
+    out = sys.__stdout__
+    latency = result["latency"]
+    print(f"{result['scenario']:<12} c={result['concurrency']:<4} n={result['requests']:<5} err={result['errors']:<3} "
+          f"{result['throughput_rps']:>8.1f} req/s  p50={latency.get('p50_ms', 0):>9.1f}ms  "
+          f"p95={latency.get('p95_ms', 0):>9.1f}ms  p99={latency.get('p99_ms', 0):>9.1f}ms", file=out, flush=True)
+    for stage, stats in result["stages"].items():
+        print(f"    {stage:<34} n={stats['count']:<6} p50={stats['p50_ms']:>9.2f}ms  "
+              f"p95={stats['p95_ms']:>9.2f}ms  p99={stats['p99_ms']:>9.2f}ms", file=out, flush=True)
+
+
+def compare(results: list, baseline_path: str, threshold: float) -> list:
+    """Return descriptions of scenarios whose p95 latency regressed beyond threshold."""
+    with open(baseline_path) as f:
+        baseline = {(r["scenario"], r["concurrency"]): r for r in json.load(f)["results"]}
+    regressions = []
+    for result in results:
+        previous = baseline.get((result["scenario"], result["concurrency"]))
+        if not previous or not previous["latency"] or not result["latency"]:
+            continue
+        before, after = previous["latency"]["p95_ms"], result["latency"]["p95_ms"]
+        change = (after - before) / before if before else 0.0
+        print(f"{result['scenario']:<12} c={result['concurrency']:<4} p95 {before:>9.1f}ms -> {after:>9.1f}ms ({change:+.1%})")
+        if change > threshold:
+            regressions.append(f"{result['scenario']} c={result['concurrency']}: p95 {before}ms -> {after}ms")
+    return regressions
+
+
+# ----------------------------------------------------------------------
+# Main
+# ----------------------------------------------------------------------
+
+RECORDER = StageRecorder()
+
+
+async def run(args) -> list:
+    import httpx
+    import main as app_main
+    from app.utils.readiness import warmup
+
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    levels = [int(c) for c in args.concurrency.split(",")]
+
+    warmup()
+    queries = load_queries(args.queries)
+    results = []
+
+    transport = httpx.ASGITransport(app=app_main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        # One untimed request so lazy per-process state does not skew the first level
+        await client.post("/chat", json={"user_query": queries[0]}, timeout=120)
+        for scenario in scenarios:
+            for concurrency in ([1] if scenario == "vectordb" else levels):
+                RECORDER.reset()
+                if scenario in ("chat", "chat_stream"):
+                    outcome = await chat_scenario(client, queries, args.requests, concurrency, scenario == "chat_stream")
+                elif scenario == "vectordb":
+                    outcome = await vectordb_scenario(client, args.vectordb_requests)
+                else:
+                    outcome = await asyncio.to_thread(tools_scenario, queries, args.requests, concurrency)
+                result = summarize(scenario, concurrency, *outcome)
+                results.append(result)
+                print_result(result)
+    return results
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    scratch = configure_environment(args)
+    try:
+        # App logs (WARNING and above unless LOG_LEVEL is set) share stdout with the report
+        results = asyncio.run(run(args))
+    finally:
+        if not args.keep_vectordb:
+            shutil.rmtree(scratch, ignore_errors=True)
+    return finish(args, results)
+
+
+def finish(args, results) -> int:
+    from app.core.config import settings
+    output = args.output or os.path.join(REPO_ROOT, "benchmarks", "results",
+                                         f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    payload = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": vars(args),
+            "settings": {
+                "LLM_PROVIDER": settings.LLM_PROVIDER,
+                "TOOL_WORKERS": settings.TOOL_WORKERS,
+                "RETRIEVAL_K": settings.RETRIEVAL_K,
+                "HISTORY_TOKEN_BUDGET": settings.HISTORY_TOKEN_BUDGET,
+            },
+        },
+        "results": results,
+    }
+    with open(output, "w") as f:
+        json.dump(payload, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.regression_threshold)
+        if regressions:
+            print("p95 regressions:\n  " + "\n  ".join(regressions))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,6 @@
 import streamlit as st
 import requests
+import json
 import time
 import urllib3
 
@@ -166,30 +167,70 @@ if "messages" not in st.session_state:
 if "is_loading" not in st.session_state:
     st.session_state.is_loading = False
 
+if "session_id" not in st.session_state:
+    st.session_state.session_id = None
+
 # Backend API URL
-BACKEND_URL = "http://localhost:8000/chat"
+STREAM_URL = "http://localhost:8000/chat/stream"
+
+TOOL_LABELS = {
+    "retrieve_document": "Searching the product catalog...",
+    "check_availability": "Checking availability...",
+    "check_availability_batch": "Checking availability...",
+}
+
+def render_ai_message(content):
+    return f"""
+    <div class="ai-message">
+        <div class="ai-message-content">
+            {content}
+        </div>
+    </div>
+    """
+
+def stream_bot_response(user_message):
+    """Stream events from the backend, yielding (kind, payload) pairs.
 
-def get_bot_response(user_message):
-    """Send message to backend and get response"""
+    kind is 'status' for tool progress, 'text' for the answer rendered so far
+    and 'final' for the complete answer.
+    """
     try:
-        response = requests.post(
-            BACKEND_URL,
-            json={"user_query": user_message},
-            timeout=30,
+        with requests.post(
+            STREAM_URL,
+            json={"user_query": user_message, "session_id": st.session_state.session_id},
+            stream=True,
+            timeout=(5, 120),  # connect timeout, then max gap between streamed chunks
             verify=False  # Disable SSL verification for corporate proxy/Zscaler
-        )
-        
-        if response.status_code == 200:
-            return response.json().get("response", "Sorry, I couldn't generate a response.")
-        else:
-            return f"Error: Unable to get response from server (Status: {response.status_code})"
-    
+        ) as response:
+            if response.status_code != 200:
+                yield "final", f"Error: Unable to get response from server (Status: {response.status_code})"
+                return
+
+            text = ""
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                event = json.loads(line[len("data:"):])
+                if event["type"] == "session":
+                    st.session_state.session_id = event["session_id"]
+                elif event["type"] == "tool_call":
+                    yield "status", TOOL_LABELS.get(event["name"], f"Running {event['name']}...")
+                elif event["type"] == "token":
+                    text += event["content"]
+                    yield "text", text
+                elif event["type"] == "discard":
+                    text = ""
+                elif event["type"] == "done":
+                    yield "final", event.get("response") or text or "Sorry, I couldn't generate a response."
+                    return
+            yield "final", text or "Sorry, I couldn't generate a response."
+
     except requests.exceptions.ConnectionError:
-        return "Error: Cannot connect to the backend server. Please make sure it's running on http://localhost:8000"
+        yield "final", "Error: Cannot connect to the backend server. Please make sure it's running on http://localhost:8000"
     except requests.exceptions.Timeout:
-        return "Error: Request timed out. Please try again."
+        yield "final", "Error: Request timed out. Please try again."
     except Exception as e:
-        return f"Error: {str(e)}"
+        yield "final", f"Error: {str(e)}"
 
 # Header
 st.markdown("""
@@ -221,9 +262,10 @@ with chat_container:
             </div>
             """, unsafe_allow_html=True)
     
-    # Show loader if waiting for response
+    # Show loader if waiting for response; streamed tokens replace it in place
+    response_placeholder = st.empty()
     if st.session_state.is_loading:
-        st.markdown("""
+        response_placeholder.markdown("""
         <div class="ai-message">
             <div class="ai-message-content">
                 <div class="loader">
@@ -253,8 +295,15 @@ if st.session_state.is_loading:
     # Get the last user message
     last_user_message = st.session_state.messages[-1]["content"]
     
-    # Get bot response from backend
-    bot_response = get_bot_response(last_user_message)
+    # Stream bot response from backend, rendering tokens as they arrive
+    bot_response = ""
+    for kind, payload in stream_bot_response(last_user_message):
+        if kind == "status":
+            response_placeholder.markdown(render_ai_message(f"<em>{payload}</em>"), unsafe_allow_html=True)
+        elif kind == "text":
+            response_placeholder.markdown(render_ai_message(payload + " ▌"), unsafe_allow_html=True)
+        else:
+            bot_response = payload
     
     # Add bot response to chat history
     st.session_state.messages.append({"role": "assistant", "content": bot_response})
@@ -271,6 +320,7 @@ with st.sidebar:
     if st.button("🗑️ Clear Chat History", use_container_width=True):
         st.session_state.messages = []
         st.session_state.is_loading = False
+        st.session_state.session_id = None
         st.rerun()
     
     st.markdown("---")
@@ -1,8 +1,23 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from app.routers import router
 from app.core.config import settings
 from app.core.logging_config import setup_logging
+from app.utils.readiness import start_warmup
+from app.utils.llm_clients import llm_clients
+from app.core.metrics import RequestContextMiddleware
 
 setup_logging()
-app = FastAPI(title=settings.PROJECT_NAME)
-app.include_router(router.router)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.WARMUP_ON_STARTUP:
+        start_warmup()
+    yield
+    await llm_clients.aclose()
+
+
+app = FastAPI(title=settings.PROJECT_NAME, lifespan=lifespan)
+app.add_middleware(RequestContextMiddleware)
+app.include_router(router.router)
\ No newline at end of file
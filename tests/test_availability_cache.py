@@ -0,0 +1,44 @@
+from app.utils import availability_cache as availability_cache_module
+from app.utils.availability_cache import AvailabilityCache
+
+
+def test_entries_are_tied_to_the_data_version():
+    cache = AvailabilityCache(max_size=4, ttl_seconds=0)
+    cache.put('p1', (1, 1), {'prediction': 'high'})
+
+    assert cache.get('p1', (1, 1)) == {'prediction': 'high'}
+    assert cache.get('p1', (2, 1)) is None
+    # The stale entry was dropped, so the old version misses too
+    assert cache.get('p1', (1, 1)) is None
+    assert cache.stats() == {'size': 0, 'hits': 1, 'misses': 2}
+
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(availability_cache_module.time, 'monotonic', lambda: now[0])
+    cache = AvailabilityCache(max_size=4, ttl_seconds=10)
+    cache.put('p1', (1,), {'prediction': 'low'})
+
+    now[0] += 9
+    assert cache.get('p1', (1,)) is not None
+    now[0] += 2
+    assert cache.get('p1', (1,)) is None
+
+
+def test_least_recently_used_product_is_evicted():
+    cache = AvailabilityCache(max_size=2, ttl_seconds=0)
+    cache.put('p1', (1,), {})
+    cache.put('p2', (1,), {})
+    cache.get('p1', (1,))
+    cache.put('p3', (1,), {})
+
+    assert cache.get('p2', (1,)) is None
+    assert cache.get('p1', (1,)) is not None and cache.get('p3', (1,)) is not None
+
+
+def test_zero_size_disables_the_cache():
+    cache = AvailabilityCache(max_size=0)
+    cache.put('p1', (1,), {})
+
+    assert cache.get('p1', (1,)) is None
+    assert cache.stats()['size'] == 0
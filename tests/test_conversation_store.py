@@ -0,0 +1,55 @@
+from app.utils.conversation_store import ConversationStore
+
+
+def _turn(i):
+    return [{'role': 'user', 'content': f"question {i}"}, {'role': 'assistant', 'content': f"answer {i}"}]
+
+
+def _store(**kwargs):
+    kwargs.setdefault('max_sessions', 100)
+    kwargs.setdefault('max_turns', 2)
+    kwargs.setdefault('ttl_seconds', 0)
+    kwargs.setdefault('max_bytes', 1 << 20)
+    kwargs.setdefault('db_path', '')
+    return ConversationStore(**kwargs)
+
+
+def test_turn_cap_trims_oldest_messages_and_advances_the_offset():
+    store = _store()
+    for i in range(3):
+        store.extend('s1', _turn(i))
+
+    history, offset = store.get_window('s1')
+
+    assert [message['content'] for message in history] == ["question 1", "answer 1", "question 2", "answer 2"]
+    assert offset == 2
+    # The window is a copy
+    history.append({'role': 'user', 'content': 'x'})
+    assert len(store.get_history('s1')) == 4
+
+
+def test_least_recently_used_sessions_are_dropped_from_memory():
+    store = _store(max_sessions=2)
+    store.extend('s1', _turn(1))
+    store.extend('s2', _turn(2))
+    store.get_window('s1')
+    store.extend('s3', _turn(3))
+
+    assert store.get_window('s2') == ([], 0)
+    assert store.stats()['sessions'] == 2
+
+
+def test_sqlite_persistence_reloads_messages_and_offset(tmp_path):
+    db_path = str(tmp_path / "conversations.sqlite3")
+    store = _store(db_path=db_path)
+    for i in range(3):
+        store.extend('s1', _turn(i))
+
+    # A new process (or an evicted session) reads the same window back
+    reloaded = _store(db_path=db_path)
+
+    assert reloaded.get_window('s1') == store.get_window('s1')
+    assert reloaded.stats()['persistent'] is True
+
+    reloaded.clear('s1')
+    assert _store(db_path=db_path).get_window('s1') == ([], 0)
@@ -0,0 +1,42 @@
+import pandas as pd
+from app.utils import custom_functions
+from app.utils.data_store import ProductData
+from app.utils.product_index import ProductMatch
+
+
+class _Resolver:
+    min_score = 0.45
+
+    def __init__(self, match):
+        self.match = match
+
+    def resolve(self, product_name):
+        return self.match, [self.match]
+
+
+def _product_data(product_ids, names):
+    catalog = pd.DataFrame({'product_id': product_ids, 'product_name': names})
+    empty = pd.DataFrame({'product_id': []})
+    return ProductData(catalog, empty, empty, version=(1,))
+
+
+def test_find_product_returns_catalog_row(monkeypatch):
+    match = ProductMatch('p1', 'Desk Lamp', 1.0, 0)
+    monkeypatch.setattr(custom_functions, 'product_resolver', _Resolver(match))
+
+    product, score, error = custom_functions._find_product(_product_data(['p1'], ['Desk Lamp']), 'desk lamp')
+
+    assert error is None and score == 1.0
+    assert product['product_name'] == 'Desk Lamp'
+
+
+def test_find_product_id_missing_from_snapshot_is_not_found(monkeypatch):
+    # The name index already reloaded a newer catalog than this data snapshot
+    match = ProductMatch('p2', 'Floor Lamp', 1.0, 1)
+    monkeypatch.setattr(custom_functions, 'product_resolver', _Resolver(match))
+
+    product, score, error = custom_functions._find_product(_product_data(['p1'], ['Desk Lamp']), 'floor lamp')
+
+    assert product is None and score is None
+    assert error['status'] == 'error'
+    assert error['did_you_mean'] == ['Floor Lamp']
@@ -0,0 +1,50 @@
+import os
+import pandas as pd
+from app.utils.data_store import DataStore
+
+
+def _write_csvs(directory, price=10.0):
+    paths = {name: str(directory / f"{name}.csv") for name in ('catalog', 'sales', 'inventory')}
+    pd.DataFrame({'product_id': ['p1', 'p2'], 'product_name': ['Desk Lamp', 'Bath Towel'],
+                  'price': [price, 5.0]}).to_csv(paths['catalog'], index=False)
+    pd.DataFrame({'product_id': ['p2', 'p1', 'p1'], 'date': ['2024-01-02', '2024-01-03', '2024-01-01'],
+                  'daily_sales': [1, 2, 3]}).to_csv(paths['sales'], index=False)
+    pd.DataFrame({'product_id': ['p1'], 'current_stock': [7]}).to_csv(paths['inventory'], index=False)
+    return paths
+
+
+def _store(paths):
+    return DataStore(catalog_path=paths['catalog'], sales_path=paths['sales'], inventory_path=paths['inventory'],
+                     model_path=os.devnull, check_interval=0)
+
+
+def test_product_data_indexes_rows_by_product_id(tmp_path):
+    product_data = _store(_write_csvs(tmp_path)).get_product_data()
+
+    assert product_data.get_product('p2')['product_name'] == 'Bath Towel'
+    assert product_data.get_product('missing') is None
+    # Sales are sorted by product and date on load
+    assert product_data.get_sales('p1')['daily_sales'].tolist() == [3, 2]
+    assert product_data.get_sales('missing').empty
+    assert product_data.get_inventory('p1')['current_stock'] == 7
+    assert product_data.get_inventory('p2') is None
+
+
+def test_sources_reload_only_when_file_contents_change(tmp_path):
+    paths = _write_csvs(tmp_path)
+    store = _store(paths)
+    first = store.get_product_data()
+    assert first.version == store.data_version() == (1, 1, 1)
+
+    # Touching a file without changing it keeps the loaded data
+    os.utime(paths['catalog'], ns=(1, 1))
+    assert store.get_product_data() is first
+
+    _write_csvs(tmp_path, price=12.5)
+    second = store.get_product_data()
+
+    assert second is not first
+    assert second.version == (2, 1, 1)
+    assert second.get_product('p1')['price'] == 12.5
+    # The earlier snapshot is unchanged
+    assert first.get_product('p1')['price'] == 10.0
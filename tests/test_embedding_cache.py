@@ -0,0 +1,59 @@
+from langchain_core.embeddings import Embeddings
+from app.utils import embedding_cache as embedding_cache_module
+from app.utils.embedding_cache import CachedQueryEmbeddings, normalize_query
+
+
+class _CountingEmbeddings(Embeddings):
+    def __init__(self):
+        self.queries = []
+
+    def embed_query(self, text):
+        self.queries.append(text)
+        return [float(len(text)), 1.0]
+
+    def embed_documents(self, texts):
+        return [[float(len(text)), 0.0] for text in texts]
+
+
+def test_normalize_query_collapses_case_and_whitespace():
+    assert normalize_query("  Desk\tLAMP \n ") == "desk lamp"
+
+
+def test_equivalent_queries_share_an_entry_but_misses_embed_the_original_text():
+    model = _CountingEmbeddings()
+    cache = CachedQueryEmbeddings(model, max_size=8, ttl_seconds=0)
+
+    first = cache.embed_query("Desk  Lamp")
+    second = cache.embed_query("desk lamp")
+
+    assert first == second
+    assert model.queries == ["Desk  Lamp"]
+    assert cache.stats() == {'size': 1, 'hits': 1, 'disk_hits': 0, 'misses': 1}
+
+
+def test_documents_bypass_the_cache():
+    model = _CountingEmbeddings()
+    cache = CachedQueryEmbeddings(model)
+
+    assert cache.embed_documents(["a", "bb"]) == [[1.0, 0.0], [2.0, 0.0]]
+    assert cache.stats()['size'] == 0
+
+
+def test_disk_tier_survives_a_restart_and_expires(tmp_path, monkeypatch):
+    disk_path = str(tmp_path / "embeddings.sqlite3")
+    now = [1000.0]
+    monkeypatch.setattr(embedding_cache_module.time, 'time', lambda: now[0])
+    CachedQueryEmbeddings(_CountingEmbeddings(), ttl_seconds=60, disk_path=disk_path, model_name="m").embed_query("lamp")
+
+    model = _CountingEmbeddings()
+    restarted = CachedQueryEmbeddings(model, ttl_seconds=60, disk_path=disk_path, model_name="m")
+    assert restarted.embed_query("LAMP") == [4.0, 1.0]
+    assert model.queries == [] and restarted.stats()['disk_hits'] == 1
+
+    # A different model name, or an expired row, misses
+    other = _CountingEmbeddings()
+    CachedQueryEmbeddings(other, ttl_seconds=60, disk_path=disk_path, model_name="other").embed_query("lamp")
+    now[0] += 61
+    expired = _CountingEmbeddings()
+    CachedQueryEmbeddings(expired, ttl_seconds=60, disk_path=disk_path, model_name="m").embed_query("lamp")
+    assert other.queries == ["lamp"] and expired.queries == ["lamp"]
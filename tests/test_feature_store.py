@@ -0,0 +1,158 @@
+import numpy as np
+import pandas as pd
+import pytest
+from app.utils.data_store import ProductData
+from app.utils.feature_store import ENGINEERED_FEATURES, FeatureStore, compute_features
+
+
+def _reference_features(product_sales: pd.DataFrame, product) -> dict:
+    """The per-product feature loop check_availability ran before the feature store."""
+    features = {}
+    for window in [7, 14, 30]:
+        last_window = product_sales.tail(window)
+        features[f'sales_mean_{window}d'] = last_window['daily_sales'].mean()
+        features[f'sales_std_{window}d'] = last_window['daily_sales'].std() if len(last_window) > 1 else 0
+        features[f'sales_sum_{window}d'] = last_window['daily_sales'].sum()
+        features[f'sales_max_{window}d'] = last_window['daily_sales'].max()
+        features[f'sales_min_{window}d'] = last_window['daily_sales'].min()
+        features[f'revenue_sum_{window}d'] = last_window['daily_revenue'].sum()
+    for lag in [1, 7, 14]:
+        features[f'sales_lag_{lag}'] = product_sales['daily_sales'].iloc[-lag] if len(product_sales) >= lag else 0
+    features['sales_velocity'] = features['sales_mean_7d'] / (features['sales_mean_30d'] + 0.1)
+    features['sales_trend'] = features['sales_mean_7d'] - features['sales_mean_14d']
+    features['sales_acceleration'] = 0
+    features['sales_cv'] = features['sales_std_30d'] / (features['sales_mean_30d'] + 0.1)
+    features['sales_range_30d'] = features['sales_max_30d'] - features['sales_min_30d']
+    zero_streak = 0
+    for sale in product_sales['daily_sales'].tail(7).values[::-1]:
+        if sale == 0:
+            zero_streak += 1
+        else:
+            break
+    features['zero_sales_streak'] = zero_streak
+    latest_date = product_sales['date'].max()
+    sales_dates = product_sales[product_sales['daily_sales'] > 0]['date']
+    features['days_since_sale'] = (latest_date - sales_dates.max()).days if len(sales_dates) > 0 else 30
+    features['product_price'] = product['price']
+    features['product_popularity'] = product['order_count']
+    features['category_encoded'] = 0
+    return {key: 0 if pd.isna(value) else value for key, value in features.items()}
+
+
+def _sales(days_by_product: dict, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    frames = []
+    for product_id, days in days_by_product.items():
+        daily_sales = rng.poisson(3, days).astype(float)
+        daily_sales[rng.random(days) < 0.3] = 0
+        frames.append(pd.DataFrame({
+            'product_id': product_id,
+            'date': pd.date_range('2024-01-01', periods=days, freq='D'),
+            'daily_sales': daily_sales,
+            'daily_revenue': daily_sales * 9.5,
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def _catalog(product_ids, price: float = 20.0) -> pd.DataFrame:
+    return pd.DataFrame({
+        'product_id': list(product_ids),
+        'product_name': [f"Product {product_id}" for product_id in product_ids],
+        'price': [price + i for i in range(len(product_ids))],
+        'order_count': [100 + i for i in range(len(product_ids))],
+    })
+
+
+class _Store:
+    """Minimal DataStore stand-in whose data version changes on every update."""
+
+    def __init__(self, sales_df, catalog_df):
+        self.version = 0
+        self.update(sales_df, catalog_df)
+
+    def update(self, sales_df, catalog_df):
+        self.version += 1
+        inventory = pd.DataFrame({'product_id': catalog_df['product_id']})
+        self.product_data = ProductData(catalog_df, sales_df, inventory, version=(self.version,))
+
+    def get_product_data(self):
+        return self.product_data
+
+
+def _assert_matches_reference(features, sales_df, catalog_df, product_ids):
+    for product_id in product_ids:
+        product_sales = sales_df[sales_df['product_id'] == product_id].sort_values('date')
+        product = catalog_df[catalog_df['product_id'] == product_id].iloc[0]
+        expected = _reference_features(product_sales, product)
+        actual, history_length = features.get_features(product_id)
+        assert history_length == len(product_sales)
+        for name in ENGINEERED_FEATURES:
+            assert actual[name] == pytest.approx(float(expected[name]), abs=1e-9), (product_id, name)
+
+
+def test_compute_features_matches_the_per_product_loop():
+    # Histories shorter than the windows and lags, with zero streaks and all-zero products
+    days = {'p1': 90, 'p2': 30, 'p3': 10, 'p4': 1, 'p5': 45}
+    sales_df = _sales(days)
+    sales_df.loc[sales_df['product_id'] == 'p5', 'daily_sales'] = 0.0
+    catalog_df = _catalog(days)
+
+    features = compute_features(sales_df, catalog_df)
+
+    for product_id in days:
+        product_sales = sales_df[sales_df['product_id'] == product_id]
+        expected = _reference_features(product_sales, catalog_df[catalog_df['product_id'] == product_id].iloc[0])
+        assert features.loc[product_id, 'history_length'] == len(product_sales)
+        for name in ENGINEERED_FEATURES:
+            assert features.loc[product_id, name] == pytest.approx(float(expected[name]), abs=1e-9), (product_id, name)
+
+
+def test_refresh_recomputes_only_changed_products():
+    days = {'p1': 60, 'p2': 40, 'p3': 35}
+    sales_df = _sales(days)
+    catalog_df = _catalog(days)
+    store = _Store(sales_df, catalog_df)
+    features = FeatureStore(store=store, persist_path='')
+
+    assert features.refresh() == {'recomputed': 3, 'removed': 0}
+    assert features.refresh() == {'recomputed': 0, 'removed': 0}
+    before = features.snapshot()
+
+    # New sales rows for p2 only
+    extra = _sales({'p2': 41}, seed=1).tail(1).assign(date=pd.Timestamp('2024-02-10'))
+    sales_df = pd.concat([sales_df, extra], ignore_index=True).sort_values(['product_id', 'date'], ignore_index=True)
+    store.update(sales_df, catalog_df)
+
+    assert features.refresh() == {'recomputed': 1, 'removed': 0}
+    _assert_matches_reference(features.snapshot(), sales_df, catalog_df, days)
+    # A snapshot taken before the refresh still reads the old data
+    assert before.get_features('p2')[1] == 40
+
+    # A catalog change without new sales refreshes the product columns in place
+    catalog_df = _catalog(days, price=50.0)
+    store.update(sales_df, catalog_df)
+
+    assert features.refresh() == {'recomputed': 0, 'removed': 0}
+    _assert_matches_reference(features.snapshot(), sales_df, catalog_df, days)
+
+    # A product whose sales disappear is dropped
+    sales_df = sales_df[sales_df['product_id'] != 'p3'].reset_index(drop=True)
+    store.update(sales_df, catalog_df)
+
+    assert features.refresh() == {'recomputed': 0, 'removed': 1}
+    assert features.get_features('p3') == (None, 0)
+    _assert_matches_reference(features.snapshot(), sales_df, catalog_df, ['p1', 'p2'])
+
+
+def test_get_vectors_orders_columns_by_model_feature_names():
+    days = {'p1': 40, 'p2': 35}
+    store = _Store(_sales(days), _catalog(days))
+    features = FeatureStore(store=store, persist_path='')
+
+    vectors = features.get_vectors(['p2', 'p1'], ['product_price', 'not_engineered', 'sales_lag_1'])
+
+    snapshot = features.snapshot()
+    assert vectors.shape == (2, 3)
+    assert vectors[:, 0].tolist() == [21.0, 20.0]
+    assert vectors[:, 1].tolist() == [0.0, 0.0]
+    assert vectors[1, 2] == snapshot.get_features('p1')[0]['sales_lag_1']
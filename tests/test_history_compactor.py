@@ -0,0 +1,94 @@
+import pytest
+from app.utils import history_compactor as compactor_module
+from app.utils.history_compactor import HistoryCompactor
+
+
+class _NoMentions:
+    def find_mentions(self, text, limit=3):
+        return []
+
+
+@pytest.fixture(autouse=True)
+def no_catalog(monkeypatch):
+    # Product mentions need the catalog; these tests only look at folding
+    monkeypatch.setattr(compactor_module, 'product_resolver', _NoMentions())
+    compactor_module._digest_message.cache_clear()
+    yield
+    compactor_module._digest_message.cache_clear()
+
+
+def _turns(*contents):
+    return [{'role': 'user' if i % 2 == 0 else 'assistant', 'content': content} for i, content in enumerate(contents)]
+
+
+def _summary_lines(result):
+    marker = "Earlier conversation (summarized):\n"
+    return result.summary.split(marker, 1)[1].splitlines() if marker in result.summary else []
+
+
+def _compactor():
+    return HistoryCompactor(token_budget=10000, recent_turns=1, summary_tokens=5000)
+
+
+def test_keeps_recent_turns_verbatim_and_folds_the_rest():
+    history = _turns("hello", "hi there", "show me lamps", "here are lamps")
+    result = _compactor().compact(history, session_id="s")
+
+    assert result.verbatim_messages == 2
+    assert _summary_lines(result) == ["user: hello", "assistant: hi there"]
+    assert result.text.endswith("user: show me lamps\nassistant: here are lamps")
+
+
+def test_repeated_message_does_not_skip_unfolded_messages():
+    compactor = _compactor()
+    history = _turns("hi", "ok", "the lamp", "how many?")
+    compactor.compact(history, session_id="s")
+
+    # The last folded message ("ok") repeats; the messages in between must still be folded
+    history += _turns("2", "ok", "thanks", "bye")
+    result = compactor.compact(history, session_id="s")
+
+    assert _summary_lines(result) == [
+        "user: hi", "assistant: ok", "user: the lamp", "assistant: how many?", "user: 2", "assistant: ok",
+    ]
+
+
+def test_trimmed_history_is_not_folded_twice():
+    compactor = _compactor()
+    history = _turns("a", "b", "c", "d", "e", "f")
+    compactor.compact(history, session_id="s")
+
+    # The conversation store dropped the first two messages (offset 2)
+    window = history[2:] + _turns("g", "h")
+    result = compactor.compact(window, session_id="s", offset=2)
+
+    assert _summary_lines(result) == [
+        "user: a", "assistant: b", "user: c", "assistant: d", "user: e", "assistant: f",
+    ]
+
+
+def test_restarted_session_starts_a_new_summary():
+    compactor = _compactor()
+    compactor.compact(_turns("a", "b", "c", "d", "e", "f"), session_id="s")
+
+    result = compactor.compact(_turns("x", "y", "z", "w"), session_id="s")
+
+    assert _summary_lines(result) == ["user: x", "assistant: y"]
+
+
+def test_quantity_is_kept_as_a_fact_after_folding():
+    history = _turns("I need 5 units", "sure", "anything else?", "no")
+    result = _compactor().compact(history, session_id="s")
+
+    assert result.facts == {'quantity': 5}
+    assert "Known facts: quantity=5" in result.text
+
+
+def test_summary_drops_oldest_lines_to_fit_its_reserve():
+    compactor = HistoryCompactor(token_budget=10000, recent_turns=1, summary_tokens=40)
+    history = _turns(*[f"message number {i} " + "x" * 40 for i in range(10)])
+    result = compactor.compact(history, session_id="s")
+
+    lines = _summary_lines(result)
+    assert result.summary and len(lines) < 8
+    assert lines[-1].startswith("assistant: message number 7")
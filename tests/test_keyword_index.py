@@ -0,0 +1,92 @@
+from langchain_core.documents import Document
+from app.utils.keyword_index import KeywordIndex, content_hash, reciprocal_rank_fusion, tokenize
+
+
+def _chunk(name, category, price, description, order_count=10):
+    return (f"Product Name: {name}\n Category: {category}\n Price: {price}\n Description: {description}\n"
+            f" Specifications: {{}}\n Order Count: {order_count}")
+
+
+def _document(product_id, name, category, price, description, order_count=10):
+    text = _chunk(name, category, price, description, order_count)
+    metadata = {'product_id': product_id, 'product_name': name, 'category': category, 'price': price,
+                'order_count': order_count, 'content_hash': content_hash(text)}
+    return f"product:{product_id}", Document(page_content=text, metadata=metadata)
+
+
+DOCUMENTS = [
+    _document('p1', 'Premium Bedding Set', 'bed_bath', 89.0, 'Soft cotton sheets for the bedroom', 300),
+    _document('p2', 'Kitchen Knife Block', 'housewares', 45.0, 'Steel knives, a gift for any kitchen', 120),
+    _document('p3', 'Modern Desk Lamp', 'furniture_decor', 30.0, 'Warm light for your bedding corner', 50),
+]
+
+
+def _index():
+    return KeywordIndex.from_documents(DOCUMENTS)
+
+
+def _names(index, hits):
+    return [index.document(position).metadata['product_name'] for position, _ in hits]
+
+
+def test_tokenize_drops_stopwords_and_splits_underscores():
+    assert tokenize("Show me the Furniture_Decor items!") == ['furniture', 'decor', 'items']
+
+
+def test_product_name_outranks_incidental_mentions():
+    index = _index()
+
+    hits = index.search("bedding", k=3)
+
+    assert _names(index, hits) == ['Premium Bedding Set', 'Modern Desk Lamp']
+    assert hits[0][1] > hits[1][1]
+
+
+def test_search_applies_metadata_filters():
+    index = _index()
+
+    hits = index.search("bedding", k=3, filters={'max_price': 50.0})
+
+    assert _names(index, hits) == ['Modern Desk Lamp']
+    assert index.search("bedding", filters={'category': 'housewares'}) == []
+
+
+def test_exact_name_or_category_queries_are_confident():
+    index = _index()
+
+    assert index.is_confident("Premium Bedding Set", index.search("Premium Bedding Set"))
+    assert index.is_confident("housewares", index.search("housewares"))
+    assert not index.is_confident("something soft for sleeping in bedding", index.search("something soft for sleeping in bedding"))
+    assert not index.is_confident("bedding", [])
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = tmp_path / "keyword_index.json"
+    _index().save(str(path))
+
+    loaded = KeywordIndex.load(str(path))
+
+    assert len(loaded) == 3
+    assert _names(loaded, loaded.search("knife")) == ['Kitchen Knife Block']
+
+
+def test_fusion_matches_hits_from_stores_with_different_metadata():
+    _, keyword_doc = DOCUMENTS[0]
+    # A vector hit from a store built without typed metadata has the same text only
+    vector_doc = Document(page_content=keyword_doc.page_content, metadata={})
+    _, other_doc = DOCUMENTS[1]
+
+    fused = reciprocal_rank_fusion([[(other_doc, 0.1), (vector_doc, 0.2)], [(keyword_doc, 7.0)]], k=60)
+
+    assert len(fused) == 2
+    assert fused[0][0].page_content == keyword_doc.page_content
+    assert fused[0][1] == 1 / 62 + 1 / 61
+    assert fused[1][1] == 1 / 61
+
+
+def test_fusion_counts_a_document_once_per_list():
+    _, document = DOCUMENTS[0]
+
+    fused = reciprocal_rank_fusion([[(document, 0.1), (document, 0.2)]], k=60)
+
+    assert fused == [(document, 1 / 61)]
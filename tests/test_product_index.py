@@ -0,0 +1,84 @@
+import pandas as pd
+from app.utils.product_index import ProductNameIndex, ProductResolver, normalize_tokens
+
+NAMES = ["Premium Bedding Set", "Desk Lamp", "Garden Hose Reel", "Kitchen Knife Set", "Bath Towels", "Desk Lamp"]
+IDS = ["p1", "p2", "p3", "p4", "p5", "p6"]
+
+
+class _Catalog:
+    def __init__(self, catalog_df, version=1):
+        self.catalog_df = catalog_df
+        self.version = version
+
+    def get_versioned(self):
+        return self.catalog_df, self.version
+
+
+class _Store:
+    def __init__(self, names, ids):
+        self.catalog = _Catalog(pd.DataFrame({'product_id': ids, 'product_name': names}))
+
+
+def test_normalize_tokens_strips_case_punctuation_and_plurals():
+    assert normalize_tokens("Bath-Towels!") == ["bath", "towel"]
+    assert normalize_tokens("Kitchen Accessories") == ["kitchen", "accessory"]
+
+
+def test_exact_name_ignores_case_punctuation_and_plurals():
+    index = ProductNameIndex(NAMES, IDS)
+
+    assert index.exact("premium bedding set").product_id == "p1"
+    assert index.exact("Bath Towel").product_id == "p5"
+    assert index.exact("Desk Lamps") == index.search("desk lamp", limit=1)[0]
+    assert index.exact("Bedding") is None
+
+
+def test_duplicate_names_resolve_to_the_first_catalog_row():
+    index = ProductNameIndex(NAMES, IDS)
+
+    assert index.exact("Desk Lamp").product_id == "p2"
+    assert "p6" not in [match.product_id for match in index.search("desk lamp", limit=5)]
+
+
+def test_search_ranks_typos_and_partial_names():
+    index = ProductNameIndex(NAMES, IDS)
+
+    typo = index.search("premum beding set", limit=3)
+    assert typo[0].product_id == "p1"
+    assert 0.45 <= typo[0].score < 1.0
+
+    partial = index.search("knife", limit=3)
+    assert partial[0].product_id == "p4"
+
+
+def test_find_mentions_returns_names_in_free_text():
+    index = ProductNameIndex(NAMES, IDS)
+
+    mentions = index.find_mentions("Do you have 2 garden hose reels and a desk lamp?")
+
+    assert [match.product_id for match in mentions] == ["p3", "p2"]
+
+
+def test_resolver_exact_typo_and_not_found():
+    resolver = ProductResolver(store=_Store(NAMES, IDS), min_score=0.45)
+
+    match, candidates = resolver.resolve("Kitchen Knife Set")
+    assert match.product_id == "p4" and match.score == 1.0
+    assert candidates == [match]
+
+    match, candidates = resolver.resolve("kitchn knife sett")
+    assert match.product_id == "p4" and match.score < 1.0
+    assert candidates[0] == match
+
+    match, candidates = resolver.resolve("zzz qqq")
+    assert match is None
+
+
+def test_resolver_rebuilds_the_index_when_the_catalog_version_changes():
+    store = _Store(NAMES, IDS)
+    resolver = ProductResolver(store=store)
+    assert resolver.resolve("Garden Hose Reel")[0].product_id == "p3"
+
+    store.catalog = _Catalog(pd.DataFrame({'product_id': ["p9"], 'product_name': ["Garden Hose Reel"]}), version=2)
+
+    assert resolver.resolve("Garden Hose Reel")[0].product_id == "p9"
@@ -0,0 +1,46 @@
+from app.utils.retrieval_filters import (
+    build_filters, chroma_where, metadata_matches, normalize_category, resolve_category,
+)
+
+CATEGORIES = ('furniture_decor', 'bed_bath', 'housewares', 'garden_tools')
+
+
+def test_normalize_category():
+    assert normalize_category("Furniture Decor") == "furniture_decor"
+    assert normalize_category(" furniture-decor! ") == "furniture_decor"
+
+
+def test_resolve_category_exact_partial_and_ambiguous():
+    assert resolve_category("Bed & Bath", CATEGORIES) == "bed_bath"
+    assert resolve_category("garden", CATEGORIES) == "garden_tools"
+    assert resolve_category("toys", CATEGORIES) is None
+    assert resolve_category("", CATEGORIES) is None
+    assert resolve_category("decor", ('furniture_decor', 'wall_decor')) is None
+
+
+def test_build_filters_casts_and_drops_unusable_values():
+    filters = build_filters(category="furniture", min_price="20", max_price=None, min_order_count="abc",
+                            categories=CATEGORIES)
+
+    assert filters == {'category': 'furniture_decor', 'min_price': 20.0}
+    assert build_filters(category="toys", max_price="", categories=CATEGORIES) == {}
+
+
+def test_chroma_where_single_and_combined_clauses():
+    assert chroma_where({}) is None
+    assert chroma_where({'category': 'bed_bath'}) == {'category': {'$eq': 'bed_bath'}}
+    assert chroma_where({'min_price': 10.0, 'max_price': 50.0, 'min_order_count': 100}) == {'$and': [
+        {'price': {'$gte': 10.0}}, {'price': {'$lte': 50.0}}, {'order_count': {'$gte': 100}},
+    ]}
+
+
+def test_metadata_matches_mirrors_chroma_where():
+    metadata = {'category': 'bed_bath', 'price': 30.0, 'order_count': 200}
+
+    assert metadata_matches(metadata, {})
+    assert metadata_matches(metadata, {'category': 'bed_bath', 'min_price': 30.0, 'max_price': 30.0})
+    assert not metadata_matches(metadata, {'category': 'housewares'})
+    assert not metadata_matches(metadata, {'min_order_count': 201})
+    # Documents without the filtered field never match, as in Chroma
+    assert not metadata_matches({}, {'max_price': 100.0})
+    assert not metadata_matches(None, {'category': 'bed_bath'})
@@ -0,0 +1,79 @@
+import json
+from langchain_core.documents import Document
+from app.utils.retrieval_format import format_retrieval_results, parse_product_document
+
+FIELDS = ["name", "category", "price", "order_count"]
+
+
+def _product(name, price, category="bed_bath", order_count=10, metadata=None):
+    text = (f"Product Name: {name}\n Category: {category}\n Price: {price}\n Description: Nice {name}\n"
+            f" Specifications: {{'warranty': '1 year'}}\n Order Count: {order_count}")
+    return Document(page_content=text, metadata=metadata or {})
+
+
+def _format(results, **kwargs):
+    kwargs.setdefault('fields', FIELDS)
+    kwargs.setdefault('token_budget', 0)
+    return json.loads(format_retrieval_results("query", [(document, 0.0) for document in results], **kwargs))
+
+
+def test_parse_product_document_prefers_typed_metadata():
+    document = _product("Bedding Set", 89.5, metadata={'product_id': 7, 'price': 79.0, 'category': 'home'})
+
+    fields = parse_product_document(document)
+
+    assert fields['id'] == '7'
+    assert fields['name'] == 'Bedding Set'
+    assert fields['price'] == 79.0 and fields['category'] == 'home'
+    assert fields['order_count'] == 10
+    assert fields['specifications'] == {'warranty': '1 year'}
+
+
+def test_same_name_chunks_merge_into_one_entry_with_a_price_range():
+    payload = _format([_product("Bedding Set", 89.0), _product("Desk Lamp", 30.0), _product("Bedding Set", 99.0)])
+
+    assert payload['results'] == [
+        {'name': 'Bedding Set', 'category': 'bed_bath', 'price': 89.0, 'order_count': 10,
+         'variants': 2, 'price_range': [89.0, 99.0]},
+        {'name': 'Desk Lamp', 'category': 'bed_bath', 'price': 30.0, 'order_count': 10},
+    ]
+
+
+def test_products_sharing_a_name_keep_their_own_ids_and_prices():
+    payload = _format([
+        _product("Bedding Set", 89.0, metadata={'product_id': 'a1'}),
+        _product("Bedding Set", 99.0, metadata={'product_id': 'b2'}),
+        _product("Bedding Set", 89.0, metadata={'product_id': 'a1'}),
+        _product("Desk Lamp", 30.0, metadata={'product_id': 'c3'}),
+    ])
+
+    assert payload['results'] == [
+        {'name': 'Bedding Set', 'category': 'bed_bath', 'price': 89.0, 'order_count': 10, 'variants': 2, 'id': 'a1'},
+        {'name': 'Bedding Set', 'category': 'bed_bath', 'price': 99.0, 'order_count': 10, 'id': 'b2'},
+        {'name': 'Desk Lamp', 'category': 'bed_bath', 'price': 30.0, 'order_count': 10},
+    ]
+
+
+def test_product_list_is_reduced_to_names_not_in_results():
+    product_list = Document(
+        page_content="Following are the available products in system:\n ['Bedding Set', 'Desk Lamp', 'Garden Hose']"
+    )
+
+    payload = _format([_product("Bedding Set", 89.0), product_list], filters={'max_price': 100.0})
+
+    assert payload['filters'] == {'max_price': 100.0}
+    assert [entry['name'] for entry in payload['results']] == ['Bedding Set']
+    assert payload['other_products'] == ['Desk Lamp', 'Garden Hose']
+
+
+def test_token_budget_omits_lower_ranked_results_but_keeps_the_best():
+    results = [_product(f"Product {i}", 10.0 + i) for i in range(20)]
+
+    payload = _format(results, token_budget=120)
+
+    assert payload['results'][0]['name'] == 'Product 0'
+    assert len(payload['results']) + payload['omitted'] == 20
+    assert payload['omitted'] > 0
+
+    # The best result is kept even when it alone exceeds the budget
+    assert len(_format(results[:1], token_budget=1)['results']) == 1
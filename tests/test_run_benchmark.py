@@ -0,0 +1,81 @@
+import json
+import pytest
+from benchmarks import run_benchmark
+from benchmarks.run_benchmark import StageRecorder, compare, histogram_delta, histogram_quantile, histogram_stats
+
+INF = float("inf")
+
+
+def test_histogram_quantile_interpolates_within_bucket():
+    buckets = {0.1: 0.0, 0.2: 10.0, 0.4: 20.0, INF: 20.0}
+
+    assert histogram_quantile(0.5, buckets) == pytest.approx(0.2)
+    assert histogram_quantile(0.75, buckets) == pytest.approx(0.3)
+    assert histogram_quantile(0.25, buckets) == pytest.approx(0.15)
+
+
+def test_histogram_quantile_above_last_finite_bucket_reports_that_bound():
+    assert histogram_quantile(0.99, {1.0: 1.0, INF: 10.0}) == 1.0
+    assert histogram_quantile(0.5, {1.0: 0.0, INF: 0.0}) is None
+
+
+def test_histogram_delta_only_counts_new_observations():
+    before = {"buckets": {0.1: 5.0, INF: 5.0}, "count": 5.0, "sum": 0.25}
+    after = {"buckets": {0.1: 5.0, 1.0: 2.0, INF: 7.0}, "count": 7.0, "sum": 1.25}
+
+    delta = histogram_delta(after, before)
+
+    assert delta == {"buckets": {0.1: 0.0, 1.0: 2.0, INF: 2.0}, "count": 2.0, "sum": 1.0}
+    stats = histogram_stats(delta)
+    assert stats["count"] == 2 and stats["mean_ms"] == 500.0
+    assert histogram_stats(histogram_delta(before, before)) == {}
+
+
+def test_stage_recorder_reads_production_spans():
+    pytest.importorskip("prometheus_client")
+    from app.core.metrics import span
+
+    with span("benchmark_smoke"):
+        pass
+    recorder = StageRecorder()
+    recorder.reset()
+    for _ in range(3):
+        with span("benchmark_smoke"):
+            pass
+
+    stats = recorder.summary()["benchmark_smoke"]
+    assert stats["count"] == 3
+    assert stats["p95_ms"] <= 0.5
+
+
+def test_stage_recorder_includes_client_samples():
+    pytest.importorskip("numpy")
+    pytest.importorskip("prometheus_client")
+    recorder = StageRecorder()
+    recorder.reset()
+    recorder.record("time_to_first_token", 0.2)
+
+    assert recorder.summary()["time_to_first_token"]["p50_ms"] == pytest.approx(200.0)
+
+
+def test_compare_flags_p95_regressions(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps({"results": [
+        {"scenario": "chat", "concurrency": 8, "latency": {"p95_ms": 100.0}},
+        {"scenario": "tools", "concurrency": 8, "latency": {"p95_ms": 100.0}},
+    ]}))
+    results = [
+        {"scenario": "chat", "concurrency": 8, "latency": {"p95_ms": 150.0}},
+        {"scenario": "tools", "concurrency": 8, "latency": {"p95_ms": 110.0}},
+        {"scenario": "vectordb", "concurrency": 1, "latency": {"p95_ms": 900.0}},
+    ]
+
+    regressions = compare(results, str(baseline), threshold=0.2)
+
+    assert regressions == ["chat c=8: p95 100.0ms -> 150.0ms"]
+
+
+def test_scenarios_are_parsed_from_arguments():
+    args = run_benchmark.parse_args(["--scenarios", "tools", "--concurrency", "1,4", "--requests", "3"])
+
+    assert args.scenarios == "tools" and args.concurrency == "1,4" and args.requests == 3
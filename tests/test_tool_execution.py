@@ -0,0 +1,86 @@
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+import pytest
+from app.utils.tool_execution import ParallelToolExecutor
+
+
+def _call(name, **arguments):
+    return SimpleNamespace(function=SimpleNamespace(name=name, arguments=json.dumps(arguments)))
+
+
+def _sleep(seconds: float):
+    time.sleep(seconds)
+    return f"slept {seconds}"
+
+
+def _fail(reason: str):
+    raise RuntimeError(reason)
+
+
+FUNCTIONS = {'sleep': _sleep, 'fail': _fail}
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    """Give each test its own small pool instead of the process-wide one."""
+    def use(workers):
+        monkeypatch.setattr(ParallelToolExecutor, '_pool', ThreadPoolExecutor(max_workers=workers))
+        return ParallelToolExecutor._pool
+    yield use
+    if ParallelToolExecutor._pool is not None:
+        ParallelToolExecutor._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def test_results_keep_call_order_and_failures_become_messages(pool):
+    pool(4)
+    executor = ParallelToolExecutor(FUNCTIONS, timeout=5, timeoutOverrides={}, queueTimeout=5)
+    bad_json = SimpleNamespace(function=SimpleNamespace(name='sleep', arguments='{not json'))
+
+    responses = executor.runAll([
+        _call('sleep', seconds=0.05), _call('fail', reason='boom'), bad_json, _call('missing'), _call('sleep'),
+    ])
+
+    assert responses[0] == "slept 0.05"
+    assert responses[1] == "Error: Tool 'fail' failed: boom"
+    assert responses[2].startswith("Error: Invalid arguments for 'sleep'")
+    assert responses[3] == "Error: Function 'missing' not found in available functions."
+    assert responses[4].startswith("Missing required parameter(s): seconds")
+
+
+def test_timeout_counts_from_when_a_tool_starts(pool):
+    # One worker runs the calls back to back; each finishes well within its own timeout
+    pool(1)
+    executor = ParallelToolExecutor(FUNCTIONS, timeout=0.5, timeoutOverrides={}, queueTimeout=5)
+
+    responses = executor.runAll([_call('sleep', seconds=0.2) for _ in range(3)])
+
+    assert responses == ["slept 0.2"] * 3
+
+
+def test_slow_tool_times_out_and_queued_call_is_cancelled(pool):
+    pool(1)
+    release = threading.Event()
+    functions = {'hang': lambda: release.wait(5) and "released", **FUNCTIONS}
+    executor = ParallelToolExecutor(functions, timeout=0.2, timeoutOverrides={'sleep': 5}, queueTimeout=0.1)
+
+    try:
+        responses = executor.runAll([_call('hang'), _call('sleep', seconds=0.01)])
+    finally:
+        release.set()
+
+    assert responses[0] == "Error: Tool 'hang' timed out after 0.2 seconds."
+    assert responses[1].startswith("Error: Tool 'sleep' could not start within 0.1 seconds")
+
+
+def test_arun_all_matches_run_all(pool):
+    pool(2)
+    executor = ParallelToolExecutor(FUNCTIONS, timeout=0.3, timeoutOverrides={}, queueTimeout=5)
+    calls = [_call('sleep', seconds=0.05), _call('sleep', seconds=1), _call('fail', reason='x')]
+
+    responses = asyncio.run(executor.arunAll(calls))
+
+    assert responses == ["slept 0.05", "Error: Tool 'sleep' timed out after 0.3 seconds.", "Error: Tool 'fail' failed: x"]